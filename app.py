@@ -1,28 +1,40 @@
 #!/usr/bin/env python3
 import os
+import sys
+from datetime import datetime, timezone
 
 import aws_cdk as cdk
 
-from project.application.acceptance_backend import AcceptanceBackend
-from project.application.acceptance_frontend import AcceptanceFrontend
-from project.application.production_backend import ProductionBackend
-from project.application.production_frontend import ProductionFrontend
-from project.infrastructure.authentication import Authentication
-from project.infrastructure.permissions import Permissions
-from project.infrastructure.registries import Registries
+from project.stack_registry import SELECTION_CONTEXT_KEY, SELECTION_ENVIRONMENT_VARIABLE, select_stacks
+from project.tooling.app_synth import synth_app
+from project.tooling.context_prefetch import (
+    LOOKUP_CONTEXT_KEY,
+    LOOKUP_ENVIRONMENT_VARIABLE,
+    OFFLINE,
+    lookup_mode,
+    missing_lookups,
+    offline_problems,
+    problem_report,
+)
+from project.tooling.synth_cache import app_context
 
 
 app = cdk.App()
 
-env = cdk.Environment(account=os.environ.get('CDK_ACCOUNT'), region="eu-west-1")
-
-Permissions(app, "Permissions", env=env)
-Registries(app, "ImageRegistries", env=env)
-Authentication(app, "AuthenticationServer", env=env)
-
-ProductionBackend(app, "ProductionBackend", env=env)
-ProductionFrontend(app, "ProductionFrontend", env=env)
-AcceptanceBackend(app, "AcceptanceBackend", env=env)
-AcceptanceFrontend(app, "AcceptanceFrontend", env=env)
-
-app.synth()
+account = os.environ.get('CDK_ACCOUNT')
+selection = app.node.try_get_context(SELECTION_CONTEXT_KEY) or os.environ.get(SELECTION_ENVIRONMENT_VARIABLE)
+entries = select_stacks(selection)
+
+outdir = synth_app(app, entries, account, app_context())
+
+lookup_setting = app.node.try_get_context(LOOKUP_CONTEXT_KEY) or os.environ.get(LOOKUP_ENVIRONMENT_VARIABLE)
+if lookup_mode(lookup_setting) == OFFLINE:
+    problems = offline_problems(
+        missing_lookups(outdir),
+        app_context(),
+        {(account, entry.region) for entry in entries},
+        datetime.now(timezone.utc),
+    )
+    if problems:
+        print(problem_report(problems, selection), file=sys.stderr)
+        sys.exit(1)
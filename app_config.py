@@ -2,7 +2,20 @@ TOP_DOMAIN = "com"
 SECOND_LVL_DOMAIN = "sanderkrabbenborg"
 
 USER_POOL_ARN = "arn:aws:cognito-idp:eu-west-1:046201199215:userpool/eu-west-1_6wOiibFgH"
-BACKEND_ECR_ARN = "arn:aws:ecr:eu-west-1:046201199215:repository/backend-registry"
+
+# Backend stacks in the primary region keep their plain stack names; other regions are suffixed with the region
+PRIMARY_REGION = "eu-west-1"
+
+BACKEND_REGIONS = {
+    "Prd": ("eu-west-1",),
+    "Acc": ("eu-west-1",),
+}
+
+BACKEND_ECR_ARNS = {
+    "eu-west-1": "arn:aws:ecr:eu-west-1:046201199215:repository/backend-registry",
+}
 
 GLOBAL_SSL_CERT_ARN = "arn:aws:acm:us-east-1:046201199215:certificate/a51769f3-9daf-4597-a73a-7be81c514a06"
-REGIONAL_SSL_CERT_ARN = "arn:aws:acm:eu-west-1:046201199215:certificate/1934a654-53e7-4c68-99ff-9e72b1ab212a"
+REGIONAL_SSL_CERT_ARNS = {
+    "eu-west-1": "arn:aws:acm:eu-west-1:046201199215:certificate/1934a654-53e7-4c68-99ff-9e72b1ab212a",
+}
@@ -1,12 +1,90 @@
+import aws_cdk.aws_ecs as ecs
+import aws_cdk.aws_logs as logs
+from aws_cdk import Duration
+from aws_cdk import Size
 from constructs import Construct
 
+from app_config import BACKEND_REGIONS
 from project.application.base.backend_stack import BackendStack
+from project.application.base.profiles import (
+    CacheProfile,
+    CapacityProfile,
+    ComputeProfile,
+    LoadBalancerAuthProfile,
+    MonitoringProfile,
+    NetworkProfile,
+    RolloutProfile,
+    ScalingProfile,
+    ScheduleProfile,
+)
 from project.application.base.stack_base import SECOND_LVL_DOMAIN, TOP_DOMAIN
 
 CLUSTER_NAME = "Acc"
 
+REGIONS = BACKEND_REGIONS[CLUSTER_NAME]
+
 BE_DOMAIN = f"api.acc.{SECOND_LVL_DOMAIN}.{TOP_DOMAIN}"
 
+SCALING = ScalingProfile(
+    min_capacity=1,
+    max_capacity=2,
+    cpu_target_percent=75,
+    memory_target_percent=85,
+)
+
+COMPUTE = ComputeProfile(
+    cpu=512,
+    memory_limit_mib=1024,
+    cpu_architecture=ecs.CpuArchitecture.ARM64,
+)
+
+ROLLOUT = RolloutProfile(
+    circuit_breaker=True,
+    min_healthy_percent=0,
+    max_healthy_percent=200,
+    health_check_grace_period=Duration.seconds(120),
+    health_check_interval=Duration.seconds(10),
+    health_check_timeout=Duration.seconds(5),
+    healthy_threshold=2,
+    unhealthy_threshold=3,
+    deregistration_delay=Duration.seconds(5),
+)
+
+MONITORING = MonitoringProfile(
+    log_buffer_size=Size.mebibytes(4),
+    log_retention=logs.RetentionDays.TWO_WEEKS,
+    latency_p99_threshold=Duration.seconds(3),
+    server_error_threshold=25,
+)
+
+CACHE = CacheProfile(
+    node_type="cache.t4g.micro",
+    replicas=0,
+)
+
+NETWORK = NetworkProfile(
+    nat_gateways=1,
+    interface_endpoints=True,
+)
+
+LOAD_BALANCER_AUTH = LoadBalancerAuthProfile(
+    paths=("/swagger-ui/*", "/v3/api-docs*"),
+)
+
+CAPACITY = CapacityProfile(
+    on_demand_base=1,
+    on_demand_weight=0,
+    spot_weight=1,
+)
+
+SCHEDULE = ScheduleProfile(
+    day_start_hour=7,
+    day_end_hour=20,
+    prewarm=Duration.minutes(20),
+    week_days="MON-FRI",
+    time_zone="Europe/Amsterdam",
+)
+
 
 class AcceptanceBackend(BackendStack):
 
@@ -18,9 +96,21 @@ class AcceptanceBackend(BackendStack):
         ssl_cert = self.fetch_regional_ssl_cert()
 
         auth_server = self.fetch_authentication_server()
-        server_client = self.create_server_authentication_client(auth_server, CLUSTER_NAME)
+        server_client = self.create_server_authentication_client(auth_server, CLUSTER_NAME, BE_DOMAIN)
         swagger_client = self.create_swagger_authentication_client(auth_server, CLUSTER_NAME, BE_DOMAIN)
 
-        cluster = self.create_cluster(CLUSTER_NAME)
-        backend = self.create_service(cluster, CLUSTER_NAME, registry, ssl_cert, server_client, swagger_client)
-        self.create_dns_record(hosted_zone, backend.load_balancer, BE_DOMAIN)
+        cluster = self.create_cluster(CLUSTER_NAME, MONITORING, NETWORK, CAPACITY)
+        cache = self.create_cache(cluster.vpc, CLUSTER_NAME, CACHE)
+        backend = self.create_service(
+            cluster, CLUSTER_NAME, registry, ssl_cert, server_client, swagger_client,
+            scaling=SCALING,
+            compute=COMPUTE,
+            rollout=ROLLOUT,
+            monitoring=MONITORING,
+            cache=cache,
+            load_balancer_auth=LOAD_BALANCER_AUTH,
+            capacity=CAPACITY,
+            schedule=SCHEDULE,
+        )
+        self.create_dns_record(hosted_zone, backend.load_balancer, BE_DOMAIN, latency_routing=len(REGIONS) > 1)
+        self.create_monitoring(backend, CLUSTER_NAME, MONITORING, cache=cache)
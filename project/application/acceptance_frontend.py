@@ -1,12 +1,21 @@
+import aws_cdk.aws_cloudfront as cf
 from constructs import Construct
 
 from project.application.base.frontend_stack import FrontendStack
+from project.application.base.profiles import DistributionProfile, MonitoringProfile
 from project.application.base.stack_base import SECOND_LVL_DOMAIN, TOP_DOMAIN
 
 CLUSTER_NAME = "Acc"
 
 FE_DOMAIN = f"acc.{SECOND_LVL_DOMAIN}.{TOP_DOMAIN}"
 
+DISTRIBUTION = DistributionProfile(
+    price_class=cf.PriceClass.PRICE_CLASS_100,
+    private_origin=True,
+)
+
+MONITORING = MonitoringProfile()
+
 
 class AcceptanceFrontend(FrontendStack):
 
@@ -19,6 +28,8 @@ class AcceptanceFrontend(FrontendStack):
         auth_server = self.fetch_authentication_server()
         self.create_web_client(auth_server, CLUSTER_NAME, FE_DOMAIN)
 
-        bucket = self.create_bucket(CLUSTER_NAME, FE_DOMAIN)
-        cloudfront = self.create_distribution(bucket, ssl_cert, CLUSTER_NAME, FE_DOMAIN)
+        bucket = self.create_bucket(CLUSTER_NAME, FE_DOMAIN, DISTRIBUTION)
+        cloudfront = self.create_distribution(bucket, ssl_cert, CLUSTER_NAME, FE_DOMAIN, DISTRIBUTION)
         self.create_dns_records(cloudfront, FE_DOMAIN, hosted_zone)
+        self.create_publishing_outputs(bucket, cloudfront)
+        self.create_monitoring(cloudfront, CLUSTER_NAME, MONITORING)
@@ -1,18 +1,76 @@
+import aws_cdk.aws_applicationautoscaling as appscaling
 import aws_cdk.aws_certificatemanager as cert
+import aws_cdk.aws_cloudfront as cf
+import aws_cdk.aws_cloudfront_origins as cfo
+import aws_cdk.aws_cloudwatch as cw
+import aws_cdk.aws_codedeploy as codedeploy
 import aws_cdk.aws_cognito as cognito
+import aws_cdk.aws_ec2 as ec2
 import aws_cdk.aws_ecr as ecr
 import aws_cdk.aws_ecs as ecs
 import aws_cdk.aws_ecs_patterns as ecsp
+import aws_cdk.aws_elasticache as elasticache
 import aws_cdk.aws_elasticloadbalancingv2 as elbv2
+import aws_cdk.aws_elasticloadbalancingv2_actions as elbv2_actions
 import aws_cdk.aws_iam as iam
+import aws_cdk.aws_rds as rds
 import aws_cdk.aws_route53 as r53
 import aws_cdk.aws_route53_targets as r53_targets
 import aws_cdk.aws_secretsmanager as sm
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from aws_cdk import Annotations
+from aws_cdk import CfnOutput
 from aws_cdk import Duration
-from aws_cdk import Size
 
-from app_config import REGIONAL_SSL_CERT_ARN, BACKEND_ECR_ARN
+from app_config import BACKEND_ECR_ARNS, REGIONAL_SSL_CERT_ARNS
+from project.application.base.profiles import (
+    ApiDistributionProfile,
+    BlueGreenProfile,
+    CacheProfile,
+    CapacityProfile,
+    ComputeProfile,
+    DatabaseProfile,
+    LoadBalancerAuthProfile,
+    MonitoringProfile,
+    NetworkProfile,
+    RolloutProfile,
+    ScalingProfile,
+    ScheduleProfile,
+)
 from project.application.base.stack_base import StackBase
+from project.stack_registry import PLACEHOLDER_IMAGE, image_context_key
+
+DEFAULT_COMPUTE = ComputeProfile(cpu=256, memory_limit_mib=512)
+DEFAULT_ROLLOUT = RolloutProfile()
+DEFAULT_MONITORING = MonitoringProfile()
+DEFAULT_NETWORK = NetworkProfile()
+
+DATABASE_PORT = 5432
+
+IMAGE_REFERENCE = re.compile(r"sha256:[0-9a-f]{64}|[A-Za-z0-9_][A-Za-z0-9_.-]{0,127}")
+
+
+@dataclass(frozen=True)
+class PooledDatabase:
+    cluster: rds.IDatabaseCluster
+    secret: sm.ISecret
+    proxy: rds.DatabaseProxy
+    reader_endpoint: Optional[str]
+    profile: DatabaseProfile
+
+    def jdbc_url(self, endpoint: str) -> str:
+        return f"jdbc:postgresql://{endpoint}:{DATABASE_PORT}/{self.profile.database_name}?sslmode=require"
+
+
+@dataclass(frozen=True)
+class BackendCache:
+    replication_group: elasticache.CfnReplicationGroup
+    security_group: ec2.SecurityGroup
+    node_ids: List[str]
+    profile: CacheProfile
 
 
 class BackendStack(StackBase):
@@ -22,18 +80,22 @@ class BackendStack(StackBase):
 
     '''
     The SSL certificate for the backend is different from the frontend, as ECS load balancers are hosted
-    at the regional level, for which certs are defined in the eu-west-1 region.
+    at the regional level, for which certs are defined in the region of the stack.
     '''
 
     def fetch_regional_ssl_cert(self) -> cert.ICertificate:
-        return self.fetch_ssl_cert("RegionalTLSCertificateImport", REGIONAL_SSL_CERT_ARN)
+        certificate_arn = self.regional_config(REGIONAL_SSL_CERT_ARNS, "regional ssl certificate")
+        return self.fetch_ssl_cert("RegionalTLSCertificateImport", certificate_arn)
 
     '''
     Registries should only be created once, and imported afterwards. Creation of this resource is stored
-    as a separate stack.
+    as a separate stack, which replicates the images to the registries of the other regions.
     '''
 
     def fetch_registry(self) -> ecr.IRepository:
+        return self.import_once("registry", self._import_registry)
+
+    def _import_registry(self) -> ecr.IRepository:
         ecs_role = iam.Role(
             self, "EcrEcsTaskRole",
             assumed_by=iam.ServicePrincipal('ecs-tasks.amazonaws.com')
@@ -41,51 +103,118 @@ class BackendStack(StackBase):
 
         backend_ecr = ecr.Repository.from_repository_arn(
             self, "BackendRegistryImport",
-            repository_arn=BACKEND_ECR_ARN,
+            repository_arn=self.regional_config(BACKEND_ECR_ARNS, "backend registry"),
         )
 
         backend_ecr.grant_pull(ecs_role)
 
         return backend_ecr
 
-    def create_cluster(self, name: str) -> ecs.Cluster:
+    def create_cluster(
+            self,
+            name: str,
+            monitoring: MonitoringProfile = DEFAULT_MONITORING,
+            network: NetworkProfile = DEFAULT_NETWORK,
+            capacity: Optional[CapacityProfile] = None,
+    ) -> ecs.Cluster:
         return ecs.Cluster(
             self, f"{name}Cluster",
-            cluster_name=name
+            cluster_name=name,
+            container_insights=monitoring.container_insights,
+            vpc=self.create_vpc(name, network),
+            # Services can only use the providers of their cluster, see create_service
+            enable_fargate_capacity_providers=capacity is not None,
         )
 
+    '''
+    ECR stores image layers in S3, so the S3 gateway endpoint is always added; it is free of charge. Interface
+    endpoints cover the ECR api, secrets and logs that each task uses while starting.
+    '''
+
+    def create_vpc(self, name: str, network: NetworkProfile) -> ec2.Vpc:
+        vpc = ec2.Vpc(
+            self, f"{name}Vpc",
+            max_azs=network.max_azs,
+            nat_gateways=network.nat_gateways,
+            subnet_configuration=[
+                ec2.SubnetConfiguration(name="Public", subnet_type=ec2.SubnetType.PUBLIC),
+                ec2.SubnetConfiguration(name="Private", subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            ],
+            gateway_endpoints=dict(
+                S3=ec2.GatewayVpcEndpointOptions(service=ec2.GatewayVpcEndpointAwsService.S3),
+            ),
+        )
+
+        if network.interface_endpoints:
+            for endpoint_name, service in dict(
+                    EcrApi=ec2.InterfaceVpcEndpointAwsService.ECR,
+                    EcrDocker=ec2.InterfaceVpcEndpointAwsService.ECR_DOCKER,
+                    SecretsManager=ec2.InterfaceVpcEndpointAwsService.SECRETS_MANAGER,
+                    Logs=ec2.InterfaceVpcEndpointAwsService.CLOUDWATCH_LOGS,
+            ).items():
+                vpc.add_interface_endpoint(
+                    endpoint_name,
+                    service=service,
+                    subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+                    private_dns_enabled=True,
+                )
+
+        return vpc
+
     def create_service(
             self,
             cluster: ecs.ICluster,
             cluster_name: str,
             backend_ecr: ecr.IRepository,
             ssl_cert: cert.ICertificate,
-            backend_cognito_client: cognito.UserPoolClient,
-            swagger_cognito_client: cognito.UserPoolClient,
+            backend_cognito_client: Optional[cognito.UserPoolClient],
+            swagger_cognito_client: Optional[cognito.UserPoolClient],
+            scaling: Optional[ScalingProfile] = None,
+            compute: ComputeProfile = DEFAULT_COMPUTE,
+            rollout: RolloutProfile = DEFAULT_ROLLOUT,
+            monitoring: MonitoringProfile = DEFAULT_MONITORING,
+            database: Optional[PooledDatabase] = None,
+            cache: Optional[BackendCache] = None,
+            load_balancer_auth: Optional[LoadBalancerAuthProfile] = None,
+            capacity: Optional[CapacityProfile] = None,
+            schedule: Optional[ScheduleProfile] = None,
+            blue_green: Optional[BlueGreenProfile] = None,
     ) -> ecsp.ApplicationLoadBalancedFargateService:
+        if schedule and not scaling:
+            raise ValueError(f"The schedule of {cluster_name} requires a scaling profile")
+        if blue_green and load_balancer_auth:
+            raise ValueError(f"Blue/green deployments of {cluster_name} only shift the default listener action, "
+                             f"which load balancer auth rules would bypass")
+        if load_balancer_auth and not backend_cognito_client:
+            raise ValueError(f"Load balancer auth of {cluster_name} needs the server client, which is only created "
+                             f"in the primary region")
+
         backend_task = ecs.FargateTaskDefinition(
             self, f"{cluster_name}BackendTask",
-            cpu=256,
-            memory_limit_mib=512,
+            cpu=compute.cpu,
+            memory_limit_mib=compute.memory_limit_mib,
+            runtime_platform=ecs.RuntimePlatform(
+                cpu_architecture=compute.cpu_architecture,
+                operating_system_family=ecs.OperatingSystemFamily.LINUX,
+            ),
         )
 
         backend_task.add_container(
             f"{cluster_name}BackendContainer",
-            image=ecs.ContainerImage.from_ecr_repository(backend_ecr, "latest"),
+            image=self.backend_image(backend_ecr, cluster_name),
             container_name=f"{cluster_name}BackendContainer",
             environment=dict(
                 SPRING_PROFILES_ACTIVE=cluster_name.lower(),
-                OIDC_SWAGGER_CLIENT_ID=swagger_cognito_client.user_pool_client_id,
-                OIDC_SERVER_CLIENT_ID=backend_cognito_client.user_pool_client_id,
-                # TODO This should be passed as a secret instead
-                OIDC_SERVER_CLIENT_SECRET=backend_cognito_client.user_pool_client_secret.unsafe_unwrap(),
+                JAVA_TOOL_OPTIONS=compute.java_tool_options,
+                **self.authentication_environment(backend_cognito_client, swagger_cognito_client),
+                **self.database_environment(database),
+                **self.cache_environment(cache),
+                **(dict(OIDC_LOAD_BALANCER_PATHS=",".join(load_balancer_auth.paths)) if load_balancer_auth else {}),
             ),
             secrets=dict(
                 SERVER_HOST=self.fetch_secret(f"{cluster_name}Secrets", "ServerHost"),
-                DATABASE_URL=self.fetch_secret(f"{cluster_name}Secrets", "DatabaseUrl"),
-                DATABASE_DIALECT=self.fetch_secret(f"{cluster_name}Secrets", "DatabaseDialect"),
-                DATABASE_USERNAME=self.fetch_secret(f"{cluster_name}Secrets", "DatabaseUsername"),
-                DATABASE_PASSWORD=self.fetch_secret(f"{cluster_name}Secrets", "DatabasePassword"),
+                **self.authentication_secrets(cluster_name, backend_cognito_client, swagger_cognito_client),
+                **self.database_secrets(cluster_name, database),
                 OIDC_PROVIDER_CONFIG_URL=self.fetch_secret(f"{cluster_name}Secrets", "OidcConfigUrl"),
                 OIDC_PROVIDER_JWK_URL=self.fetch_secret(f"{cluster_name}Secrets", "OidcJwkUrl"),
                 OIDC_USER_INFO_ENDPOINT=self.fetch_secret(f"{cluster_name}Secrets", "OidcUserInfoEndpoint"),
@@ -96,7 +225,8 @@ class BackendStack(StackBase):
             logging=ecs.LogDrivers.aws_logs(
                 stream_prefix=cluster_name.lower(),
                 mode=ecs.AwsLogDriverMode.NON_BLOCKING,
-                max_buffer_size=Size.mebibytes(1),
+                max_buffer_size=monitoring.log_buffer_size,
+                log_retention=monitoring.log_retention,
             ),
         )
 
@@ -107,66 +237,800 @@ class BackendStack(StackBase):
             cluster=cluster,
             public_load_balancer=True,
             redirect_http=True,
-            desired_count=1,
+            # Scaled services leave the count to auto scaling, so deployments do not reset it
+            desired_count=None if scaling else 1,
             task_definition=backend_task,
-            health_check_grace_period=Duration.seconds(420),
+            health_check_grace_period=rollout.health_check_grace_period,
+            # CodeDeploy rolls blue/green deployments back itself, the circuit breaker only applies to rolling ones
+            circuit_breaker=(
+                ecs.DeploymentCircuitBreaker(rollback=True) if rollout.circuit_breaker and not blue_green else None
+            ),
+            deployment_controller=(
+                ecs.DeploymentController(type=ecs.DeploymentControllerType.CODE_DEPLOY) if blue_green else None
+            ),
+            min_healthy_percent=rollout.min_healthy_percent,
+            max_healthy_percent=rollout.max_healthy_percent,
+            capacity_provider_strategies=self.capacity_provider_strategies(capacity) if capacity else None,
         )
 
-        backend_service.target_group.configure_health_check(
-            path="/actuator/health"
-        )
+        self.configure_target_group(backend_service.target_group, rollout)
 
         backend_service.load_balancer.set_attribute(
             'idle_timeout.timeout_seconds', '420'
         )
 
+        if load_balancer_auth:
+            self.configure_load_balancer_auth(backend_service, cluster_name, backend_cognito_client, load_balancer_auth)
+
+        if database:
+            database.proxy.connections.allow_from(backend_service.service, ec2.Port.tcp(DATABASE_PORT))
+
+        if cache:
+            cache.security_group.connections.allow_from(backend_service.service, ec2.Port.tcp(cache.profile.port))
+
+        if scaling:
+            task_count = self.configure_scaling(backend_service, cluster_name, scaling)
+            if schedule:
+                self.configure_schedule(task_count, cluster_name, scaling, schedule)
+
+        if blue_green:
+            self.configure_blue_green(backend_service, cluster_name, ssl_cert, rollout, monitoring, blue_green)
+
         return backend_service
 
+    @staticmethod
+    def configure_target_group(target_group: elbv2.ApplicationTargetGroup, rollout: RolloutProfile) -> None:
+        target_group.configure_health_check(
+            path="/actuator/health",
+            interval=rollout.health_check_interval,
+            timeout=rollout.health_check_timeout,
+            healthy_threshold_count=rollout.healthy_threshold,
+            unhealthy_threshold_count=rollout.unhealthy_threshold,
+        )
+
+        target_group.set_attribute(
+            'deregistration_delay.timeout_seconds', str(int(rollout.deregistration_delay.to_seconds()))
+        )
+
+        target_group.set_attribute(
+            'slow_start.duration_seconds', str(int(rollout.slow_start.to_seconds()))
+        )
+
+    '''
+    The service starts out in the blue target group behind the production listener; the green target group sits
+    behind the test listener, which is not opened to the internet. Each deployment starts its tasks in the idle
+    group, so new tasks pass their health checks and slow start before they carry their share of production
+    traffic. Rollback alarms watch both groups, as blue and green swap roles with every deployment.
+
+    A service that CodeDeploy deploys refers to its task definition by family, so cdk deploy registers task
+    definition changes without rolling them out. Releases go through project.tooling.backend_deployer, which
+    reads the outputs below.
+    '''
+
+    def configure_blue_green(
+            self,
+            backend_service: ecsp.ApplicationLoadBalancedFargateService,
+            cluster_name: str,
+            ssl_cert: cert.ICertificate,
+            rollout: RolloutProfile,
+            monitoring: MonitoringProfile,
+            blue_green: BlueGreenProfile,
+    ) -> codedeploy.EcsDeploymentGroup:
+        blue_target_group = backend_service.target_group
+        green_target_group = elbv2.ApplicationTargetGroup(
+            self, f"{cluster_name}BackendGreenTargetGroup",
+            vpc=backend_service.cluster.vpc,
+            port=80,
+            protocol=elbv2.ApplicationProtocol.HTTP,
+            target_type=elbv2.TargetType.IP,
+        )
+        self.configure_target_group(green_target_group, rollout)
+
+        test_listener = backend_service.load_balancer.add_listener(
+            f"{cluster_name}BackendTestListener",
+            port=blue_green.test_listener_port,
+            protocol=elbv2.ApplicationProtocol.HTTPS,
+            certificates=[ssl_cert],
+            default_target_groups=[green_target_group],
+            open=False,
+        )
+
+        alarms = []
+        for color, target_group in (("Blue", blue_target_group), ("Green", green_target_group)):
+            metrics = target_group.metrics
+            thresholds = dict(
+                Latency=(
+                    metrics.target_response_time(statistic="p99", period=monitoring.period),
+                    monitoring.latency_p99_threshold.to_seconds(),
+                ),
+                TargetErrors=(
+                    metrics.http_code_target(elbv2.HttpCodeTarget.TARGET_5XX_COUNT, period=monitoring.period),
+                    monitoring.server_error_threshold,
+                ),
+            )
+            alarms.extend(
+                cw.Alarm(
+                    self, f"{cluster_name}Backend{color}{alarm_name}RollbackAlarm",
+                    metric=metric,
+                    threshold=threshold,
+                    evaluation_periods=monitoring.evaluation_periods,
+                    comparison_operator=cw.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                    treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
+                )
+                for alarm_name, (metric, threshold) in thresholds.items()
+            )
+
+        deployment_group = codedeploy.EcsDeploymentGroup(
+            self, f"{cluster_name}BackendDeploymentGroup",
+            service=backend_service.service,
+            blue_green_deployment_config=codedeploy.EcsBlueGreenDeploymentConfig(
+                blue_target_group=blue_target_group,
+                green_target_group=green_target_group,
+                listener=backend_service.listener,
+                test_listener=test_listener,
+                termination_wait_time=blue_green.termination_wait,
+            ),
+            deployment_config=self.create_deployment_config(cluster_name, blue_green),
+            alarms=alarms,
+            auto_rollback=codedeploy.AutoRollbackConfig(
+                failed_deployment=True,
+                stopped_deployment=True,
+                deployment_in_alarm=True,
+            ),
+        )
+
+        CfnOutput(self, "BackendDeploymentApplication", value=deployment_group.application.application_name)
+        CfnOutput(self, "BackendDeploymentGroup", value=deployment_group.deployment_group_name)
+        CfnOutput(self, "BackendClusterName", value=backend_service.cluster.cluster_name)
+        CfnOutput(self, "BackendServiceName", value=backend_service.service.service_name)
+        CfnOutput(self, "BackendTaskFamily", value=backend_service.task_definition.family)
+        CfnOutput(self, "BackendContainerName", value=backend_service.task_definition.default_container.container_name)
+
+        return deployment_group
+
+    def create_deployment_config(
+            self,
+            cluster_name: str,
+            blue_green: BlueGreenProfile,
+    ) -> codedeploy.IEcsDeploymentConfig:
+        if blue_green.traffic_shifting == "all_at_once":
+            return codedeploy.EcsDeploymentConfig.ALL_AT_ONCE
+
+        if blue_green.traffic_shifting == "canary":
+            traffic_routing = codedeploy.TrafficRouting.time_based_canary(
+                interval=blue_green.step_interval,
+                percentage=blue_green.step_percent,
+            )
+        else:
+            traffic_routing = codedeploy.TrafficRouting.time_based_linear(
+                interval=blue_green.step_interval,
+                percentage=blue_green.step_percent,
+            )
+
+        return codedeploy.EcsDeploymentConfig(
+            self, f"{cluster_name}BackendDeploymentConfig",
+            traffic_routing=traffic_routing,
+        )
+
+    '''
+    The service runs without a launch type once it has a capacity provider strategy, so the cluster must have
+    been created with the same capacity profile. Spot tasks receive SIGTERM two minutes before they are
+    reclaimed; the deregistration delay and graceful shutdown of the application fit well within that.
+    '''
+
+    @staticmethod
+    def capacity_provider_strategies(capacity: CapacityProfile) -> List[ecs.CapacityProviderStrategy]:
+        strategies = [ecs.CapacityProviderStrategy(
+            capacity_provider="FARGATE",
+            base=capacity.on_demand_base,
+            weight=capacity.on_demand_weight,
+        )]
+        if capacity.spot_weight:
+            strategies.append(ecs.CapacityProviderStrategy(
+                capacity_provider="FARGATE_SPOT",
+                weight=capacity.spot_weight,
+            ))
+        return strategies
+
+    '''
+    Backends run the version or digest passed through context, so every task of a deployment starts the same
+    image; tags in the registry are immutable, so a version pins an image as firmly as a digest. Tools that
+    synthesize the app without deploying it pass placeholder images from project/tooling/cdk_context.py.
+
+    A missing or floating image is reported as an error on the stack instead of raised, as the app builds every
+    stack: the toolkit only fails on the errors of the stacks it synthesizes or deploys, so the other stacks can
+    be deployed without an image for each backend.
+    '''
+
+    def backend_image(self, backend_ecr: ecr.IRepository, cluster_name: str) -> ecs.ContainerImage:
+        key = image_context_key(cluster_name)
+        reference = self.node.try_get_context(key)
+
+        if reference is None:
+            Annotations.of(self).add_error(f"No backend image given, pass a version or digest with -c {key}=...")
+            reference = PLACEHOLDER_IMAGE
+        elif reference == "latest" or not IMAGE_REFERENCE.fullmatch(str(reference)):
+            Annotations.of(self).add_error(f"{key} must be a version or sha256 digest, got {reference}")
+            reference = PLACEHOLDER_IMAGE
+
+        return ecs.ContainerImage.from_ecr_repository(backend_ecr, reference)
+
+    '''
+    The load balancer runs the login with the confidential server client, whose callback must therefore include
+    the idpresponse endpoint of the load balancer; see create_server_authentication_client. Paths that are not
+    listed keep being forwarded unauthenticated by the default action of the listener.
+    '''
+
+    def configure_load_balancer_auth(
+            self,
+            backend_service: ecsp.ApplicationLoadBalancedFargateService,
+            cluster_name: str,
+            backend_cognito_client: cognito.UserPoolClient,
+            load_balancer_auth: LoadBalancerAuthProfile,
+    ) -> None:
+        for index, path in enumerate(load_balancer_auth.paths):
+            backend_service.listener.add_action(
+                f"{cluster_name}LoadBalancerAuth{index}",
+                priority=load_balancer_auth.first_rule_priority + index,
+                conditions=[elbv2.ListenerCondition.path_patterns([path])],
+                action=elbv2_actions.AuthenticateCognitoAction(
+                    user_pool=self.fetch_authentication_server(),
+                    user_pool_client=backend_cognito_client,
+                    user_pool_domain=self.fetch_authentication_domain(),
+                    scope=load_balancer_auth.scope,
+                    session_timeout=load_balancer_auth.session_timeout,
+                    next=elbv2.ListenerAction.forward([backend_service.target_group]),
+                ),
+            )
+
+    '''
+    Each configured target becomes its own target tracking policy. Request count scaling is based on the ALB
+    target group, so it reacts to load before the CPU of the running tasks is saturated.
+    '''
+
+    @staticmethod
+    def configure_scaling(
+            backend_service: ecsp.ApplicationLoadBalancedFargateService,
+            cluster_name: str,
+            scaling: ScalingProfile,
+    ) -> ecs.ScalableTaskCount:
+        task_count = backend_service.service.auto_scale_task_count(
+            min_capacity=scaling.min_capacity,
+            max_capacity=scaling.max_capacity,
+        )
+
+        if scaling.cpu_target_percent is not None:
+            task_count.scale_on_cpu_utilization(
+                f"{cluster_name}CpuScaling",
+                target_utilization_percent=scaling.cpu_target_percent,
+                scale_in_cooldown=scaling.scale_in_cooldown,
+                scale_out_cooldown=scaling.scale_out_cooldown,
+            )
+
+        if scaling.memory_target_percent is not None:
+            task_count.scale_on_memory_utilization(
+                f"{cluster_name}MemoryScaling",
+                target_utilization_percent=scaling.memory_target_percent,
+                scale_in_cooldown=scaling.scale_in_cooldown,
+                scale_out_cooldown=scaling.scale_out_cooldown,
+            )
+
+        if scaling.requests_per_target is not None:
+            task_count.scale_on_request_count(
+                f"{cluster_name}RequestScaling",
+                requests_per_target=scaling.requests_per_target,
+                target_group=backend_service.target_group,
+                scale_in_cooldown=scaling.scale_in_cooldown,
+                scale_out_cooldown=scaling.scale_out_cooldown,
+            )
+
+        return task_count
+
+    '''
+    Scheduled actions only move the capacity limits; target tracking keeps scaling within them. The prewarm sets
+    the minimum to the maximum capacity, so the service is at full size when the day starts, after which the
+    minimum is lowered again and target tracking scales in once the load allows. CDK 2.102 does not expose the
+    time zone of scheduled actions, so it is set on the scalable target through a property override.
+    '''
+
+    @staticmethod
+    def configure_schedule(
+            task_count: ecs.ScalableTaskCount,
+            cluster_name: str,
+            scaling: ScalingProfile,
+            schedule: ScheduleProfile,
+    ) -> None:
+        prewarm_hour, prewarm_minute = schedule.prewarm_time
+        actions = [
+            ("Prewarm", prewarm_hour, prewarm_minute, scaling.max_capacity, scaling.max_capacity),
+            ("DayStart", schedule.day_start_hour, 0, scaling.min_capacity, scaling.max_capacity),
+            ("DayEnd", schedule.day_end_hour, 0, 0, 0),
+        ]
+
+        for name, hour, minute, min_capacity, max_capacity in actions:
+            task_count.scale_on_schedule(
+                f"{cluster_name}{name}",
+                schedule=appscaling.Schedule.cron(
+                    hour=str(hour),
+                    minute=str(minute),
+                    week_day=schedule.week_days,
+                ),
+                min_capacity=min_capacity,
+                max_capacity=max_capacity,
+            )
+
+        scalable_target = task_count.node.find_child("Target").node.default_child
+        for index in range(len(actions)):
+            scalable_target.add_property_override(f"ScheduledActions.{index}.Timezone", schedule.time_zone)
+
+    @staticmethod
+    def authentication_environment(
+            backend_cognito_client: Optional[cognito.UserPoolClient],
+            swagger_cognito_client: Optional[cognito.UserPoolClient],
+    ) -> Dict[str, str]:
+        if not (backend_cognito_client and swagger_cognito_client):
+            return {}
+
+        return dict(
+            OIDC_SWAGGER_CLIENT_ID=swagger_cognito_client.user_pool_client_id,
+            OIDC_SERVER_CLIENT_ID=backend_cognito_client.user_pool_client_id,
+            # TODO This should be passed as a secret instead
+            OIDC_SERVER_CLIENT_SECRET=backend_cognito_client.user_pool_client_secret.unsafe_unwrap(),
+        )
+
+    def authentication_secrets(
+            self,
+            cluster_name: str,
+            backend_cognito_client: Optional[cognito.UserPoolClient],
+            swagger_cognito_client: Optional[cognito.UserPoolClient],
+    ) -> Dict[str, ecs.Secret]:
+        if backend_cognito_client and swagger_cognito_client:
+            return {}
+
+        return dict(
+            OIDC_SWAGGER_CLIENT_ID=self.fetch_secret(f"{cluster_name}Secrets", "OidcSwaggerClientId"),
+            OIDC_SERVER_CLIENT_ID=self.fetch_secret(f"{cluster_name}Secrets", "OidcServerClientId"),
+            OIDC_SERVER_CLIENT_SECRET=self.fetch_secret(f"{cluster_name}Secrets", "OidcServerClientSecret"),
+        )
+
+    '''
+    The database is only reachable from within the vpc of the cluster. Tasks connect to the proxy, which
+    shares a pool of database connections between them and keeps connections open during a failover. The proxy
+    either fronts a new cluster or, when the profile names one, the existing cluster of the backend.
+    '''
+
+    def create_database(self, vpc: ec2.IVpc, cluster_name: str, database: DatabaseProfile) -> PooledDatabase:
+        if not self.in_primary_region:
+            raise ValueError(f"The database of {cluster_name} can only be pooled in the primary region, other "
+                             f"regions would each front a database of their own")
+
+        engine = rds.DatabaseClusterEngine.aurora_postgres(version=database.engine_version)
+        if database.existing_cluster:
+            db_cluster, secret = self.fetch_database(cluster_name, engine, database)
+        else:
+            db_cluster, secret = self.create_database_cluster(vpc, cluster_name, engine, database)
+
+        proxy = rds.DatabaseProxy(
+            self, f"{cluster_name}DatabaseProxy",
+            proxy_target=rds.ProxyTarget.from_cluster(db_cluster),
+            secrets=[secret],
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            require_tls=True,
+            max_connections_percent=database.max_connections_percent,
+            max_idle_connections_percent=database.max_idle_connections_percent,
+            borrow_timeout=database.borrow_timeout,
+            idle_client_timeout=database.idle_client_timeout,
+        )
+        db_cluster.connections.allow_default_port_from(proxy, "Connections pooled by the database proxy")
+
+        reader_endpoint = None
+        if database.readers:
+            reader_endpoint = rds.CfnDBProxyEndpoint(
+                self, f"{cluster_name}DatabaseProxyReader",
+                db_proxy_endpoint_name=f"{cluster_name.lower()}-database-reader",
+                db_proxy_name=proxy.db_proxy_name,
+                vpc_subnet_ids=vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnet_ids,
+                vpc_security_group_ids=[group.security_group_id for group in proxy.connections.security_groups],
+                target_role="READ_ONLY",
+            ).attr_endpoint
+
+        return PooledDatabase(db_cluster, secret, proxy, reader_endpoint, database)
+
+    def create_database_cluster(
+            self,
+            vpc: ec2.IVpc,
+            cluster_name: str,
+            engine: rds.IClusterEngine,
+            database: DatabaseProfile,
+    ) -> Tuple[rds.DatabaseCluster, sm.ISecret]:
+        db_cluster = rds.DatabaseCluster(
+            self, f"{cluster_name}Database",
+            engine=engine,
+            vpc=vpc,
+            vpc_subnets=ec2.SubnetSelection(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS),
+            port=DATABASE_PORT,
+            default_database_name=database.database_name,
+            credentials=rds.Credentials.from_generated_secret("backend"),
+            writer=rds.ClusterInstance.provisioned("Writer", instance_type=database.instance_type),
+            readers=[
+                rds.ClusterInstance.provisioned(f"Reader{index}", instance_type=database.instance_type)
+                for index in range(1, database.readers + 1)
+            ],
+            storage_encrypted=True,
+            deletion_protection=database.deletion_protection,
+        )
+        return db_cluster, db_cluster.secret
+
+    def fetch_database(
+            self,
+            cluster_name: str,
+            engine: rds.IClusterEngine,
+            database: DatabaseProfile,
+    ) -> Tuple[rds.IDatabaseCluster, sm.ISecret]:
+        db_cluster = rds.DatabaseCluster.from_database_cluster_attributes(
+            self, f"{cluster_name}ExistingDatabase",
+            cluster_identifier=database.existing_cluster,
+            engine=engine,
+            port=DATABASE_PORT,
+            security_groups=[ec2.SecurityGroup.from_security_group_id(
+                self, f"{cluster_name}ExistingDatabaseSecurityGroup", database.existing_security_group,
+            )],
+        )
+        secret = sm.Secret.from_secret_complete_arn(
+            self, f"{cluster_name}ExistingDatabaseSecret",
+            database.existing_secret_arn,
+        )
+        return db_cluster, secret
+
+    @staticmethod
+    def database_environment(database: Optional[PooledDatabase]) -> Dict[str, str]:
+        if not database:
+            return {}
+
+        return dict(
+            DATABASE_URL=database.jdbc_url(database.proxy.endpoint),
+            DATABASE_READER_URL=database.jdbc_url(database.reader_endpoint or database.proxy.endpoint),
+            DATABASE_MAX_POOL_SIZE=str(database.profile.application_pool_size),
+        )
+
+    def database_secrets(self, cluster_name: str, database: Optional[PooledDatabase]) -> Dict[str, ecs.Secret]:
+        if not database:
+            return dict(
+                DATABASE_URL=self.fetch_secret(f"{cluster_name}Secrets", "DatabaseUrl"),
+                DATABASE_DIALECT=self.fetch_secret(f"{cluster_name}Secrets", "DatabaseDialect"),
+                DATABASE_USERNAME=self.fetch_secret(f"{cluster_name}Secrets", "DatabaseUsername"),
+                DATABASE_PASSWORD=self.fetch_secret(f"{cluster_name}Secrets", "DatabasePassword"),
+            )
+
+        return dict(
+            DATABASE_DIALECT=self.fetch_secret(f"{cluster_name}Secrets", "DatabaseDialect"),
+            DATABASE_USERNAME=ecs.Secret.from_secrets_manager(database.secret, "username"),
+            DATABASE_PASSWORD=ecs.Secret.from_secrets_manager(database.secret, "password"),
+        )
+
+    '''
+    The cache is only reachable from the backend tasks, which are allowed in by create_service. Traffic to the
+    cache is encrypted in transit, so clients must connect over tls.
+    '''
+
+    def create_cache(self, vpc: ec2.IVpc, cluster_name: str, cache: CacheProfile) -> BackendCache:
+        security_group = ec2.SecurityGroup(
+            self, f"{cluster_name}CacheSecurityGroup",
+            vpc=vpc,
+            description=f"{cluster_name} backend cache",
+            allow_all_outbound=False,
+        )
+
+        subnet_group = elasticache.CfnSubnetGroup(
+            self, f"{cluster_name}CacheSubnets",
+            description=f"{cluster_name} backend cache",
+            subnet_ids=vpc.select_subnets(subnet_type=ec2.SubnetType.PRIVATE_WITH_EGRESS).subnet_ids,
+        )
+
+        replication_group_id = f"{cluster_name.lower()}-backend-cache"
+
+        replication_group = elasticache.CfnReplicationGroup(
+            self, f"{cluster_name}Cache",
+            replication_group_id=replication_group_id,
+            replication_group_description=f"{cluster_name} backend cache",
+            engine=cache.engine,
+            engine_version=cache.version,
+            cache_node_type=cache.node_type,
+            num_cache_clusters=cache.replicas + 1,
+            automatic_failover_enabled=cache.replicas > 0,
+            multi_az_enabled=cache.replicas > 0,
+            port=cache.port,
+            cache_subnet_group_name=subnet_group.ref,
+            security_group_ids=[security_group.security_group_id],
+            transit_encryption_enabled=True,
+            at_rest_encryption_enabled=True,
+        )
+
+        node_ids = [f"{replication_group_id}-{index:03d}" for index in range(1, cache.replicas + 2)]
+
+        return BackendCache(replication_group, security_group, node_ids, cache)
+
+    @staticmethod
+    def cache_environment(cache: Optional[BackendCache]) -> Dict[str, str]:
+        if not cache:
+            return {}
+
+        return dict(
+            CACHE_HOST=cache.replication_group.attr_primary_end_point_address,
+            CACHE_READER_HOST=cache.replication_group.attr_reader_end_point_address,
+            CACHE_PORT=str(cache.profile.port),
+            CACHE_TLS="true",
+        )
+
+    '''
+    All fields of a secret share a single import of that secret.
+    '''
+
     def fetch_secret(self, name: str, field: str) -> ecs.Secret:
+        secret = self.import_once(f"secret:{name}", lambda: sm.Secret.from_secret_name_v2(
+            self, f"{name}Import",
+            secret_name=name
+        ))
+
         return ecs.Secret.from_secrets_manager(
             field=field,
-            secret=sm.Secret.from_secret_name_v2(
-                self, f"{name}.{field}",
-                secret_name=name
-            )
+            secret=secret,
         )
 
+    '''
+    Clients connect to the nearest edge location, which reuses its connections to the load balancer. The Host
+    header is forwarded, so CloudFront validates the load balancer certificate against the backend domain.
+    Only the cacheable paths of the profile are cached; authenticated and mutating requests pass through.
+    '''
+
+    def create_api_distribution(
+            self,
+            backend_service: ecsp.ApplicationLoadBalancedFargateService,
+            ssl_cert: cert.ICertificate,
+            cluster_name: str,
+            domain_name: str,
+            api_distribution: ApiDistributionProfile,
+    ) -> cf.Distribution:
+        origin = cfo.LoadBalancerV2Origin(
+            backend_service.load_balancer,
+            protocol_policy=cf.OriginProtocolPolicy.HTTPS_ONLY,
+            keepalive_timeout=api_distribution.keepalive_timeout,
+            read_timeout=api_distribution.read_timeout,
+        )
+
+        cache_policy = cf.CachePolicy(
+            self, f"{cluster_name}ApiCachePolicy",
+            comment=f"{cluster_name} cacheable api routes",
+            default_ttl=api_distribution.cache_ttl,
+            min_ttl=Duration.seconds(0),
+            max_ttl=api_distribution.cache_ttl,
+            enable_accept_encoding_brotli=True,
+            enable_accept_encoding_gzip=True,
+            cookie_behavior=cf.CacheCookieBehavior.none(),
+            header_behavior=cf.CacheHeaderBehavior.none(),
+            query_string_behavior=cf.CacheQueryStringBehavior.all(),
+        )
+
+        cached_request_policy = cf.OriginRequestPolicy(
+            self, f"{cluster_name}ApiCachedRequestPolicy",
+            comment=f"{cluster_name} cacheable api routes",
+            cookie_behavior=cf.OriginRequestCookieBehavior.none(),
+            header_behavior=cf.OriginRequestHeaderBehavior.allow_list("Host"),
+            query_string_behavior=cf.OriginRequestQueryStringBehavior.all(),
+        )
+
+        cached_behavior = cf.BehaviorOptions(
+            origin=origin,
+            viewer_protocol_policy=cf.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+            allowed_methods=cf.AllowedMethods.ALLOW_GET_HEAD_OPTIONS,
+            cached_methods=cf.CachedMethods.CACHE_GET_HEAD,
+            compress=True,
+            cache_policy=cache_policy,
+            origin_request_policy=cached_request_policy,
+        )
+
+        return cf.Distribution(
+            self, f"{cluster_name}ApiDistribution",
+            certificate=ssl_cert,
+            domain_names=[domain_name],
+            enabled=True,
+            default_behavior=cf.BehaviorOptions(
+                origin=origin,
+                viewer_protocol_policy=cf.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                allowed_methods=cf.AllowedMethods.ALLOW_ALL,
+                compress=True,
+                cache_policy=cf.CachePolicy.CACHING_DISABLED,
+                origin_request_policy=cf.OriginRequestPolicy.ALL_VIEWER,
+            ),
+            additional_behaviors={path: cached_behavior for path in api_distribution.cacheable_paths},
+            http_version=api_distribution.http_version,
+            price_class=api_distribution.price_class,
+        )
+
+    '''
+    A backend deployed to several regions gets a latency record per region under the same domain name. Route 53
+    answers with the region closest to the client, skipping regions whose load balancer fails its health check.
+    A distribution serves all regions itself, so it cannot be combined with latency routing.
+    '''
+
     def create_dns_record(
             self,
             hosted_zone: r53.IHostedZone,
             loadbalancer: elbv2.IApplicationLoadBalancer,
             domain_name: str,
+            api_distribution: Optional[cf.Distribution] = None,
+            latency_routing: bool = False,
     ) -> r53.ARecord:
-        return r53.ARecord(
+        if api_distribution and latency_routing:
+            raise ValueError("Latency routing requires the domain to alias the regional load balancers")
+
+        target = r53_targets.CloudFrontTarget(api_distribution) if api_distribution \
+            else r53_targets.LoadBalancerTarget(loadbalancer)
+
+        record = r53.ARecord(
             self, f"BackendDnsRecord:{domain_name}",
             zone=hosted_zone,
             delete_existing=False,
             record_name=domain_name,
-            target=r53.RecordTarget.from_alias(r53_targets.LoadBalancerTarget(loadbalancer)),
+            target=r53.RecordTarget.from_alias(target),
+        )
+
+        if latency_routing:
+            health_check = r53.CfnHealthCheck(
+                self, f"BackendHealthCheck:{domain_name}",
+                health_check_config=r53.CfnHealthCheck.HealthCheckConfigProperty(
+                    type="HTTPS",
+                    fully_qualified_domain_name=loadbalancer.load_balancer_dns_name,
+                    port=443,
+                    resource_path="/actuator/health",
+                    request_interval=30,
+                    failure_threshold=3,
+                ),
+            )
+
+            record_set: r53.CfnRecordSet = record.node.default_child
+            record_set.add_property_override("Region", self.region)
+            record_set.add_property_override("SetIdentifier", self.region)
+            record_set.add_property_override("HealthCheckId", health_check.attr_health_check_id)
+
+        return record
+
+    '''
+    The dashboard shows latency percentiles, traffic, errors and saturation of the service, followed by the
+    metrics of the api distribution when there is one. Alarms cover the same signals.
+    '''
+
+    def create_monitoring(
+            self,
+            backend_service: ecsp.ApplicationLoadBalancedFargateService,
+            cluster_name: str,
+            monitoring: MonitoringProfile = DEFAULT_MONITORING,
+            api_distribution: Optional[cf.Distribution] = None,
+            cache: Optional[BackendCache] = None,
+    ) -> cw.Dashboard:
+        metrics = backend_service.load_balancer.metrics
+        service = backend_service.service
+        period = monitoring.period
+
+        latency = {
+            statistic: metrics.target_response_time(statistic=statistic, period=period, label=statistic)
+            for statistic in ("p50", "p90", "p99")
+        }
+        requests = metrics.request_count(period=period)
+        target_errors = metrics.http_code_target(elbv2.HttpCodeTarget.TARGET_5XX_COUNT, period=period)
+        load_balancer_errors = metrics.http_code_elb(elbv2.HttpCodeElb.ELB_5XX_COUNT, period=period)
+        cpu = service.metric_cpu_utilization(period=period)
+        memory = service.metric_memory_utilization(period=period)
+
+        thresholds = dict(
+            Latency=(latency["p99"], monitoring.latency_p99_threshold.to_seconds()),
+            TargetErrors=(target_errors, monitoring.server_error_threshold),
+            LoadBalancerErrors=(load_balancer_errors, monitoring.server_error_threshold),
+            Cpu=(cpu, monitoring.cpu_threshold_percent),
+            Memory=(memory, monitoring.memory_threshold_percent),
+        )
+
+        if cache:
+            cache_metrics = {
+                metric_name: self.cache_metric(cache, metric_name, period)
+                for metric_name in ("EngineCPUUtilization", "DatabaseMemoryUsagePercentage", "CacheHitRate",
+                                    "CurrConnections")
+            }
+            thresholds.update(
+                CacheCpu=(cache_metrics["EngineCPUUtilization"], cache.profile.engine_cpu_threshold_percent),
+                CacheMemory=(cache_metrics["DatabaseMemoryUsagePercentage"], cache.profile.memory_threshold_percent),
+            )
+
+        self.create_alarms(f"{cluster_name}Backend", monitoring, thresholds)
+
+        dashboard = cw.Dashboard(
+            self, f"{cluster_name}BackendDashboard",
+            dashboard_name=self.regional_name(f"{cluster_name}Backend"),
         )
 
+        dashboard.add_widgets(
+            cw.GraphWidget(title="Target response time", left=list(latency.values())),
+            cw.GraphWidget(title="Requests", left=[requests]),
+            cw.GraphWidget(title="5xx responses", left=[target_errors, load_balancer_errors]),
+            cw.GraphWidget(title="Utilization", left=[cpu, memory]),
+        )
+
+        if cache:
+            dashboard.add_widgets(*[
+                cw.GraphWidget(title=f"Cache {metric_name}", left=[metric])
+                for metric_name, metric in cache_metrics.items()
+            ])
+
+        if api_distribution:
+            dashboard.add_widgets(*self.create_cloudfront_widgets(api_distribution, f"{cluster_name}Api", monitoring))
+
+        return dashboard
+
+    '''
+    ElastiCache reports per node; the cache metrics show the highest value across the nodes of the group.
+    '''
+
     @staticmethod
+    def cache_metric(cache: BackendCache, metric_name: str, period: Duration) -> cw.IMetric:
+        node_metrics = {
+            f"n{index}": cw.Metric(
+                namespace="AWS/ElastiCache",
+                metric_name=metric_name,
+                dimensions_map=dict(CacheClusterId=node_id),
+                statistic="Average",
+                period=period,
+            )
+            for index, node_id in enumerate(cache.node_ids)
+        }
+
+        if len(node_metrics) == 1:
+            return next(iter(node_metrics.values()))
+
+        return cw.MathExpression(
+            expression=f"MAX([{', '.join(node_metrics)}])",
+            using_metrics=node_metrics,
+            label=metric_name,
+            period=period,
+        )
+
+    '''
+    Clients are added to the user pool in its own region, so only the stack of the primary region creates them.
+    Stacks in other regions read the ids and secret of the clients from the {cluster}Secrets secret, which is
+    replicated to their region; copy them there once the primary region is deployed.
+    '''
+
     def create_server_authentication_client(
+            self,
             user_pool: cognito.IUserPool,
-            cluster_name: str
-    ) -> cognito.UserPoolClient:
+            cluster_name: str,
+            load_balancer_domain_name: Optional[str] = None,
+    ) -> Optional[cognito.UserPoolClient]:
+        if not self.in_primary_region:
+            return None
+
         return user_pool.add_client(
             f"{cluster_name}BackendClient",
             access_token_validity=Duration.hours(1),
             generate_secret=True,
             o_auth=cognito.OAuthSettings(
+                callback_urls=[f"https://{load_balancer_domain_name}/oauth2/idpresponse"]
+                if load_balancer_domain_name else None,
                 flows=cognito.OAuthFlows(
                     authorization_code_grant=True,
                 ),
             ),
         )
 
-    @staticmethod
     def create_swagger_authentication_client(
+            self,
             user_pool: cognito.IUserPool,
             domain_name: str,
             cluster_name: str
-    ) -> cognito.UserPoolClient:
+    ) -> Optional[cognito.UserPoolClient]:
+        if not self.in_primary_region:
+            return None
+
         return user_pool.add_client(
             id=f"{cluster_name}SwaggerClient",
             access_token_validity=Duration.hours(1),
@@ -1,17 +1,57 @@
 import aws_cdk.aws_certificatemanager as cert
 import aws_cdk.aws_cloudfront as cf
 import aws_cdk.aws_cloudfront_origins as cfo
+import aws_cdk.aws_cloudwatch as cw
 import aws_cdk.aws_cognito as cognito
 import aws_cdk.aws_iam as iam
 import aws_cdk.aws_route53 as r53
 import aws_cdk.aws_route53_targets as r53_targets
 import aws_cdk.aws_s3 as s3
+from typing import List, Optional
+
+from aws_cdk import CfnOutput
 from aws_cdk import Duration
 from aws_cdk import RemovalPolicy
 
-from app_config import GLOBAL_SSL_CERT_ARN
+from project.application.base.profiles import PUBLISHER_PREFIX, DistributionProfile, MonitoringProfile
 from project.application.base.stack_base import StackBase
 
+DEFAULT_DISTRIBUTION = DistributionProfile()
+DEFAULT_MONITORING = MonitoringProfile()
+
+# Paths without a file extension in their last segment are SPA routes, which are all answered by index.html
+VIEWER_REQUEST_CODE = """
+function handler(event) {
+    var request = event.request;
+    var host = request.headers.host ? request.headers.host.value : '';
+
+    if (host.indexOf('www.') === 0) {
+        var query = Object.keys(request.querystring).map(function (name) {
+            var parameter = request.querystring[name];
+            var values = parameter.multiValue ? parameter.multiValue : [parameter];
+            return values.map(function (value) {
+                return value.value ? name + '=' + value.value : name;
+            }).join('&');
+        }).join('&');
+
+        return {
+            statusCode: 301,
+            statusDescription: 'Moved Permanently',
+            headers: {
+                location: {value: 'https://' + host.substring(4) + request.uri + (query ? '?' + query : '')},
+                'cache-control': {value: 'max-age=3600'},
+            },
+        };
+    }
+
+    if (request.uri.lastIndexOf('.') <= request.uri.lastIndexOf('/')) {
+        request.uri = '/index.html';
+    }
+
+    return request;
+}
+"""
+
 
 class FrontendStack(StackBase):
     """
@@ -19,18 +59,30 @@ class FrontendStack(StackBase):
     """
 
     '''
-    The SSL certificate for the frontend is different from the backend, as S3 buckets are always hosted
-    at the global level, for which certs are defined in the us-east-1 region.
+    Frontend bucket should not be recreated, as the name must be unique and equal to our domain. The objects the
+    publisher keeps for itself are only readable within the account, as every path of the bucket is served.
     '''
 
-    def fetch_global_ssl_cert(self) -> cert.ICertificate:
-        return self.fetch_ssl_cert("GlobalTLSCertificateImport", GLOBAL_SSL_CERT_ARN)
-
-    '''
-    Frontend bucket should not be recreated, as the name must be unique and equal to our domain
-    '''
+    def create_bucket(
+            self,
+            cluster_name: str,
+            domain_name: str,
+            distribution: DistributionProfile = DEFAULT_DISTRIBUTION,
+    ) -> s3.Bucket:
+        if distribution.private_origin:
+            bucket = s3.Bucket(
+                self,
+                f"{cluster_name}FrontendBucket",
+                encryption=s3.BucketEncryption.S3_MANAGED,
+                enforce_ssl=True,
+                versioned=False,
+                bucket_name=domain_name,
+                block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+                removal_policy=RemovalPolicy.RETAIN,
+            )
+            self.deny_publisher_reads(bucket)
+            return bucket
 
-    def create_bucket(self, cluster_name: str, domain_name: str) -> s3.Bucket:
         bucket = s3.Bucket(
             self,
             f"{cluster_name}FrontendBucket",
@@ -51,23 +103,183 @@ class FrontendStack(StackBase):
         )
 
         bucket.grant_read(iam.AnyPrincipal())
+        self.deny_publisher_reads(bucket)
 
         return bucket
 
-    def create_distribution(self, bucket: s3.Bucket, ssl_cert: cert.ICertificate, cluster_name: str, domain_name: str):
-        return cf.Distribution(
+    def deny_publisher_reads(self, bucket: s3.Bucket) -> None:
+        # Anonymous and CloudFront requests carry no principal account, so the deny applies to them as well
+        bucket.add_to_resource_policy(iam.PolicyStatement(
+            effect=iam.Effect.DENY,
+            actions=["s3:GetObject"],
+            principals=[iam.AnyPrincipal()],
+            resources=[bucket.arn_for_objects(f"{PUBLISHER_PREFIX}*")],
+            conditions={"StringNotEquals": {"aws:PrincipalAccount": self.account}},
+        ))
+
+    '''
+    Content hashed assets, index.html and all other paths each get their own cache behavior, as they differ in
+    how long they may be cached. Compression is applied at the edge and Brotli/Gzip variants are part of the
+    cache key, so clients only download compressed bundles. With a private origin only the default behavior runs
+    the viewer request function: it answers the SPA routes and the root, so every page a browser navigates to is
+    redirected from www, while requests for index.html and static assets reach the cache without an invocation.
+    '''
+
+    def create_distribution(
+            self,
+            bucket: s3.Bucket,
+            ssl_cert: cert.ICertificate,
+            cluster_name: str,
+            domain_name: str,
+            distribution: DistributionProfile = DEFAULT_DISTRIBUTION,
+    ) -> cf.Distribution:
+        origin_shield = dict(
+            origin_shield_enabled=distribution.origin_shield_region is not None,
+            origin_shield_region=distribution.origin_shield_region,
+        )
+
+        if distribution.private_origin:
+            # The bucket is reached on its REST endpoint, which is turned into an S3 origin below
+            origin = cfo.HttpOrigin(bucket.bucket_regional_domain_name, **origin_shield)
+            function_associations = [cf.FunctionAssociation(
+                function=self.create_viewer_request_function(cluster_name),
+                event_type=cf.FunctionEventType.VIEWER_REQUEST,
+            )]
+        else:
+            origin = cfo.S3Origin(bucket=bucket, **origin_shield)
+            function_associations = None
+
+        static_behavior = self.create_behavior(
+            origin, distribution, f"{cluster_name}StaticAssets",
+            ttl=distribution.static_asset_ttl,
+            browser_cache_control=f"public, max-age={distribution.static_asset_ttl.to_seconds()}, immutable",
+        )
+
+        index_behavior = self.create_behavior(
+            origin, distribution, f"{cluster_name}Index",
+            ttl=distribution.index_ttl,
+            browser_cache_control="no-cache",
+        )
+
+        default_behavior = self.create_behavior(
+            origin, distribution, f"{cluster_name}Default",
+            ttl=distribution.default_ttl,
+            browser_cache_control="no-cache",
+            function_associations=function_associations,
+        )
+
+        cloudfront = cf.Distribution(
             self,
             f"{cluster_name}FrontendDistribution",
             certificate=ssl_cert,
             domain_names=[f"www.{domain_name}", domain_name],
             enabled=True,
-            default_behavior=cf.BehaviorOptions(
-                viewer_protocol_policy=cf.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
-                origin=cfo.S3Origin(
-                    bucket=bucket,
-                )
+            default_behavior=default_behavior,
+            additional_behaviors={
+                "/index.html": index_behavior,
+                **{path: static_behavior for path in distribution.static_asset_paths},
+            },
+            default_root_object="index.html" if distribution.private_origin else None,
+            http_version=distribution.http_version,
+            price_class=distribution.price_class,
+        )
+
+        if distribution.private_origin:
+            self.configure_origin_access_control(bucket, cloudfront, cluster_name)
+
+        return cloudfront
+
+    def create_viewer_request_function(self, cluster_name: str) -> cf.Function:
+        return cf.Function(
+            self, f"{cluster_name}ViewerRequestFunction",
+            comment="Rewrites SPA routes to index.html and redirects www to the apex domain",
+            code=cf.FunctionCode.from_inline(VIEWER_REQUEST_CODE),
+        )
+
+    '''
+    CDK 2.102 has no construct for Origin Access Control on S3 origins, so the control is created as L1 resource
+    and the origin of the distribution is turned from a custom into an S3 origin through escape hatches. The
+    bucket policy only admits CloudFront requests signed on behalf of this distribution.
+    '''
+
+    def configure_origin_access_control(
+            self,
+            bucket: s3.Bucket,
+            cloudfront: cf.Distribution,
+            cluster_name: str,
+    ) -> None:
+        origin_access_control = cf.CfnOriginAccessControl(
+            self, f"{cluster_name}FrontendOriginAccessControl",
+            origin_access_control_config=cf.CfnOriginAccessControl.OriginAccessControlConfigProperty(
+                name=self.regional_name(f"{cluster_name}FrontendOriginAccessControl"),
+                origin_access_control_origin_type="s3",
+                signing_behavior="always",
+                signing_protocol="sigv4",
             ),
-            price_class=cf.PriceClass.PRICE_CLASS_ALL
+        )
+
+        distribution = cloudfront.node.default_child
+        distribution.add_property_deletion_override("DistributionConfig.Origins.0.CustomOriginConfig")
+        distribution.add_property_override("DistributionConfig.Origins.0.S3OriginConfig.OriginAccessIdentity", "")
+        distribution.add_property_override(
+            "DistributionConfig.Origins.0.OriginAccessControlId", origin_access_control.attr_id,
+        )
+
+        bucket.add_to_resource_policy(iam.PolicyStatement(
+            actions=["s3:GetObject"],
+            principals=[iam.ServicePrincipal("cloudfront.amazonaws.com")],
+            resources=[bucket.arn_for_objects("*")],
+            conditions={"StringEquals": {"AWS:SourceArn": self.format_arn(
+                service="cloudfront",
+                region="",
+                resource="distribution",
+                resource_name=cloudfront.distribution_id,
+            )}},
+        ))
+
+    def create_behavior(
+            self,
+            origin: cf.IOrigin,
+            distribution: DistributionProfile,
+            name: str,
+            ttl: Duration,
+            browser_cache_control: Optional[str] = None,
+            function_associations: Optional[List[cf.FunctionAssociation]] = None,
+    ) -> cf.BehaviorOptions:
+        cache_policy = cf.CachePolicy(
+            self, f"{name}CachePolicy",
+            comment=f"{name} cache policy",
+            default_ttl=ttl,
+            min_ttl=Duration.seconds(0),
+            max_ttl=ttl,
+            enable_accept_encoding_brotli=distribution.compress,
+            enable_accept_encoding_gzip=distribution.compress,
+            cookie_behavior=cf.CacheCookieBehavior.none(),
+            header_behavior=cf.CacheHeaderBehavior.none(),
+            query_string_behavior=cf.CacheQueryStringBehavior.none(),
+        )
+
+        response_headers_policy = cf.ResponseHeadersPolicy(
+            self, f"{name}ResponseHeadersPolicy",
+            comment=f"{name} browser caching",
+            custom_headers_behavior=cf.ResponseCustomHeadersBehavior(
+                custom_headers=[cf.ResponseCustomHeader(
+                    header="Cache-Control",
+                    value=browser_cache_control,
+                    override=True,
+                )],
+            ),
+        ) if browser_cache_control else None
+
+        return cf.BehaviorOptions(
+            origin=origin,
+            viewer_protocol_policy=cf.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+            allowed_methods=cf.AllowedMethods.ALLOW_GET_HEAD,
+            cached_methods=cf.CachedMethods.CACHE_GET_HEAD,
+            compress=distribution.compress,
+            cache_policy=cache_policy,
+            response_headers_policy=response_headers_policy,
+            function_associations=function_associations,
         )
 
     def create_dns_records(
@@ -94,6 +306,31 @@ class FrontendStack(StackBase):
 
         return top_domain_record, www_subdomain_record
 
+    '''
+    Only a dashboard is created for the frontend, as CloudFront metrics are published in us-east-1 and alarms
+    can only watch metrics of their own region.
+    '''
+
+    def create_monitoring(
+            self,
+            cloudfront: cf.Distribution,
+            cluster_name: str,
+            monitoring: MonitoringProfile = DEFAULT_MONITORING,
+    ) -> cw.Dashboard:
+        return cw.Dashboard(
+            self, f"{cluster_name}FrontendDashboard",
+            dashboard_name=self.regional_name(f"{cluster_name}Frontend"),
+            widgets=[self.create_cloudfront_widgets(cloudfront, f"{cluster_name}Frontend", monitoring)],
+        )
+
+    '''
+    The frontend publisher reads these outputs to find where a build should be uploaded and invalidated.
+    '''
+
+    def create_publishing_outputs(self, bucket: s3.Bucket, cloudfront: cf.Distribution) -> None:
+        CfnOutput(self, "FrontendBucketName", value=bucket.bucket_name)
+        CfnOutput(self, "FrontendDistributionId", value=cloudfront.distribution_id)
+
     @staticmethod
     def create_web_client(user_pool: cognito.IUserPool, cluster_name: str, domain_name: str) -> cognito.UserPoolClient:
         return user_pool.add_client(
@@ -0,0 +1,405 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import aws_cdk.aws_cloudfront as cf
+import aws_cdk.aws_ec2 as ec2
+import aws_cdk.aws_ecs as ecs
+import aws_cdk.aws_logs as logs
+import aws_cdk.aws_rds as rds
+from aws_cdk import Duration
+from aws_cdk import Size
+
+# Memory combinations Fargate accepts per cpu unit setting
+FARGATE_MEMORY_MIB = {
+    256: (512, 1024, 2048),
+    512: tuple(range(1024, 4096 + 1, 1024)),
+    1024: tuple(range(2048, 8192 + 1, 1024)),
+    2048: tuple(range(4096, 16384 + 1, 1024)),
+    4096: tuple(range(8192, 30720 + 1, 1024)),
+}
+
+# Memory kept outside the heap for metaspace, thread stacks, code cache and direct buffers
+MIN_NON_HEAP_MIB = 192
+
+# Version used when a cache profile names none; Valkey versions start at 7.2, the Redis version it forked from
+CACHE_ENGINE_VERSIONS = {
+    "redis": "7.1",
+    "valkey": "7.2",
+}
+
+# Prefix of the objects the frontend publisher keeps for itself in the frontend bucket, which viewers cannot read
+PUBLISHER_PREFIX = ".publisher/"
+
+
+@dataclass(frozen=True)
+class ScalingProfile:
+    """
+    Target tracking settings for the backend service. Every target that is set results in its own scaling
+    policy; the service scales out on whichever target is breached first and only scales in once all are met.
+    """
+
+    min_capacity: int
+    max_capacity: int
+    cpu_target_percent: Optional[int] = 60
+    memory_target_percent: Optional[int] = 75
+    requests_per_target: Optional[int] = None
+    scale_in_cooldown: Duration = Duration.seconds(300)
+    scale_out_cooldown: Duration = Duration.seconds(60)
+
+    def __post_init__(self) -> None:
+        if self.min_capacity < 0:
+            raise ValueError(f"min_capacity must not be negative, got {self.min_capacity}")
+        if self.max_capacity < max(self.min_capacity, 1):
+            raise ValueError(f"max_capacity must be at least 1 and >= min_capacity, got {self.max_capacity}")
+        for name in ("cpu_target_percent", "memory_target_percent"):
+            value = getattr(self, name)
+            if value is not None and not 0 < value <= 100:
+                raise ValueError(f"{name} must be within (0, 100], got {value}")
+        if self.requests_per_target is not None and self.requests_per_target <= 0:
+            raise ValueError(f"requests_per_target must be positive, got {self.requests_per_target}")
+
+
+@dataclass(frozen=True)
+class ComputeProfile:
+    """
+    Task size and cpu architecture of the backend. The JVM options are derived from the task limits, as the
+    JVM otherwise sizes its heap and gc for the host it detects instead of the share it is given.
+    """
+
+    cpu: int
+    memory_limit_mib: int
+    cpu_architecture: ecs.CpuArchitecture = ecs.CpuArchitecture.X86_64
+    heap_percent: int = 75
+    extra_jvm_options: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        if self.cpu not in FARGATE_MEMORY_MIB:
+            raise ValueError(f"cpu must be one of {sorted(FARGATE_MEMORY_MIB)}, got {self.cpu}")
+        if self.memory_limit_mib not in FARGATE_MEMORY_MIB[self.cpu]:
+            raise ValueError(f"memory_limit_mib {self.memory_limit_mib} is not supported by Fargate for cpu {self.cpu}")
+        if not 0 < self.heap_percent < 100:
+            raise ValueError(f"heap_percent must be within (0, 100), got {self.heap_percent}")
+
+    @property
+    def heap_mib(self) -> int:
+        return min(
+            self.memory_limit_mib * self.heap_percent // 100,
+            self.memory_limit_mib - MIN_NON_HEAP_MIB,
+        )
+
+    @property
+    def java_tool_options(self) -> str:
+        # Fractional vCPUs are rounded up by the JVM; the serial collector avoids gc threads contending for them
+        gc = ["-XX:+UseSerialGC"] if self.cpu < 1024 else ["-XX:+UseG1GC", "-XX:MaxGCPauseMillis=200"]
+
+        return " ".join([
+            f"-Xms{self.heap_mib}m",
+            f"-Xmx{self.heap_mib}m",
+            f"-XX:ActiveProcessorCount={max(self.cpu // 1024, 1)}",
+            *gc,
+            "-XX:+ExitOnOutOfMemoryError",
+            *self.extra_jvm_options,
+        ])
+
+
+@dataclass(frozen=True)
+class DistributionProfile:
+    """
+    Caching and protocol settings of the frontend distribution. Static assets are expected to carry a content
+    hash in their name, so they can be cached for as long as CloudFront allows; index.html references those
+    hashes and must therefore only be cached briefly. The default behavior also answers SPA routes with
+    index.html, so its ttl should stay short as well.
+
+    With a private origin the bucket is only readable by the distribution, through Origin Access Control on the
+    S3 REST endpoint instead of the public website endpoint. SPA routes are then rewritten to index.html at the
+    edge, without a round trip to the origin for its 404, and www requests are redirected to the apex domain.
+    """
+
+    static_asset_paths: Tuple[str, ...] = ("/assets/*", "/static/*")
+    static_asset_ttl: Duration = Duration.days(365)
+    index_ttl: Duration = Duration.seconds(60)
+    default_ttl: Duration = Duration.minutes(5)
+    compress: bool = True
+    http_version: cf.HttpVersion = cf.HttpVersion.HTTP2_AND_3
+    price_class: cf.PriceClass = cf.PriceClass.PRICE_CLASS_ALL
+    origin_shield_region: Optional[str] = None
+    private_origin: bool = False
+
+    def __post_init__(self) -> None:
+        for path in self.static_asset_paths:
+            if not path.startswith("/"):
+                raise ValueError(f"static asset paths must start with '/', got {path}")
+
+
+@dataclass(frozen=True)
+class ApiDistributionProfile:
+    """
+    Settings of a distribution in front of the backend load balancer. Only the given paths are cached, and as
+    their cache key ignores the Authorization header and cookies, they must not serve user specific content.
+    Everything else is passed through to the load balancer over connections CloudFront keeps alive.
+    """
+
+    cacheable_paths: Tuple[str, ...] = ()
+    cache_ttl: Duration = Duration.seconds(60)
+    keepalive_timeout: Duration = Duration.seconds(60)
+    read_timeout: Duration = Duration.seconds(60)
+    http_version: cf.HttpVersion = cf.HttpVersion.HTTP2_AND_3
+    price_class: cf.PriceClass = cf.PriceClass.PRICE_CLASS_ALL
+
+    def __post_init__(self) -> None:
+        for path in self.cacheable_paths:
+            if not path.startswith("/"):
+                raise ValueError(f"cacheable paths must start with '/', got {path}")
+
+
+@dataclass(frozen=True)
+class RolloutProfile:
+    """
+    Deployment and target health settings of the backend service. The defaults match the previous behaviour
+    of the stacks; a faster rollout lowers the grace period and health check cadence to what the application
+    actually needs to boot, and drains old tasks after a short deregistration delay.
+    """
+
+    circuit_breaker: bool = False
+    min_healthy_percent: int = 100
+    max_healthy_percent: int = 200
+    health_check_grace_period: Duration = Duration.seconds(420)
+    health_check_interval: Duration = Duration.seconds(30)
+    health_check_timeout: Duration = Duration.seconds(5)
+    healthy_threshold: int = 5
+    unhealthy_threshold: int = 2
+    deregistration_delay: Duration = Duration.seconds(300)
+    slow_start: Duration = Duration.seconds(0)
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.min_healthy_percent <= 100 <= self.max_healthy_percent:
+            raise ValueError("min_healthy_percent must be within [0, 100] and max_healthy_percent at least 100")
+        if not 5 <= self.health_check_interval.to_seconds() <= 300:
+            raise ValueError("health_check_interval must be within 5 and 300 seconds")
+        if not 2 <= self.health_check_timeout.to_seconds() < self.health_check_interval.to_seconds():
+            raise ValueError("health_check_timeout must be at least 2 seconds and less than the interval")
+        if not (2 <= self.healthy_threshold <= 10 and 2 <= self.unhealthy_threshold <= 10):
+            raise ValueError("health check thresholds must be within 2 and 10")
+        if not 0 <= self.deregistration_delay.to_seconds() <= 3600:
+            raise ValueError("deregistration_delay must be within 0 and 3600 seconds")
+        if self.slow_start.to_seconds() != 0 and not 30 <= self.slow_start.to_seconds() <= 900:
+            raise ValueError("slow_start must be 0 or within 30 and 900 seconds")
+
+
+@dataclass(frozen=True)
+class BlueGreenProfile:
+    """
+    Blue/green deployments of the backend service through CodeDeploy. New tasks start next to the old ones in
+    the idle target group, which the test listener forwards to, and take production traffic once healthy. A
+    canary shift moves `step_percent` of the traffic, waits `step_interval` and then moves the rest; a linear
+    shift moves `step_percent` every `step_interval`. The deployment rolls back as soon as a rollback alarm goes
+    off, and old tasks are kept for `termination_wait` after the shift.
+    """
+
+    traffic_shifting: str = "canary"
+    step_percent: int = 10
+    step_interval: Duration = Duration.minutes(5)
+    test_listener_port: int = 8443
+    termination_wait: Duration = Duration.minutes(10)
+
+    def __post_init__(self) -> None:
+        if self.traffic_shifting not in ("canary", "linear", "all_at_once"):
+            raise ValueError(f"traffic_shifting must be canary, linear or all_at_once, got {self.traffic_shifting}")
+        if not 0 < self.step_percent < 100:
+            raise ValueError(f"step_percent must be within (0, 100), got {self.step_percent}")
+        if self.step_interval.to_seconds() < 60 or self.step_interval.to_seconds() % 60:
+            raise ValueError("step_interval must be a whole number of minutes")
+        if self.test_listener_port in (80, 443) or not 0 < self.test_listener_port < 65536:
+            raise ValueError(f"test_listener_port must be a free port, got {self.test_listener_port}")
+        if not 0 <= self.termination_wait.to_seconds() <= 2880 * 60:
+            raise ValueError("termination_wait must be within 0 and 2880 minutes")
+
+
+@dataclass(frozen=True)
+class MonitoringProfile:
+    """
+    Instrumentation of an environment. Alarms compare a metric over one period against its threshold and go
+    off once the threshold is breached for all evaluation periods. CloudFront only reports cache hit rate and
+    origin latency when its additional metrics, which are billed per distribution, are enabled.
+    """
+
+    container_insights: bool = True
+    log_buffer_size: Size = Size.mebibytes(4)
+    log_retention: logs.RetentionDays = logs.RetentionDays.INFINITE
+    period: Duration = Duration.minutes(1)
+    evaluation_periods: int = 3
+    latency_p99_threshold: Duration = Duration.seconds(2)
+    server_error_threshold: int = 10
+    cpu_threshold_percent: int = 85
+    memory_threshold_percent: int = 85
+    cloudfront_additional_metrics: bool = False
+
+    def __post_init__(self) -> None:
+        if self.evaluation_periods < 1:
+            raise ValueError(f"evaluation_periods must be at least 1, got {self.evaluation_periods}")
+        for name in ("cpu_threshold_percent", "memory_threshold_percent"):
+            if not 0 < getattr(self, name) <= 100:
+                raise ValueError(f"{name} must be within (0, 100], got {getattr(self, name)}")
+
+
+@dataclass(frozen=True)
+class DatabaseProfile:
+    """
+    Aurora PostgreSQL cluster of the backend, which tasks reach through an RDS Proxy. The proxy keeps a pool
+    of connections to the database of at most max_connections_percent of its connection limit, so scaling out
+    the service adds client connections to the proxy instead of to the database. With readers, read-only
+    traffic can be sent to the reader endpoint of the proxy.
+
+    Without existing_cluster a new, empty cluster is created. To pool the connections to a database that
+    already holds data, name its cluster identifier, the arn of a secret with its username and password and
+    the security group of the cluster, which the proxy is allowed into. A proxy only reaches databases in its
+    own vpc, so the cluster must be in the vpc of the backend. Readers then only tells whether the cluster has
+    reader instances to send read-only traffic to.
+    """
+
+    engine_version: rds.AuroraPostgresEngineVersion = rds.AuroraPostgresEngineVersion.VER_15_3
+    instance_type: ec2.InstanceType = ec2.InstanceType.of(ec2.InstanceClass.T4G, ec2.InstanceSize.MEDIUM)
+    readers: int = 0
+    database_name: str = "backend"
+    max_connections_percent: int = 90
+    max_idle_connections_percent: int = 50
+    borrow_timeout: Duration = Duration.seconds(30)
+    idle_client_timeout: Duration = Duration.minutes(30)
+    application_pool_size: int = 10
+    deletion_protection: bool = True
+    existing_cluster: Optional[str] = None
+    existing_secret_arn: Optional[str] = None
+    existing_security_group: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        existing = (self.existing_cluster, self.existing_secret_arn, self.existing_security_group)
+        if any(existing) and not all(existing):
+            raise ValueError("existing_cluster, existing_secret_arn and existing_security_group must be given together")
+        if self.readers < 0:
+            raise ValueError(f"readers must not be negative, got {self.readers}")
+        if not 1 <= self.max_connections_percent <= 100:
+            raise ValueError(f"max_connections_percent must be within [1, 100], got {self.max_connections_percent}")
+        if not 0 <= self.max_idle_connections_percent <= self.max_connections_percent:
+            raise ValueError("max_idle_connections_percent must be within 0 and max_connections_percent")
+        if self.application_pool_size < 1:
+            raise ValueError(f"application_pool_size must be at least 1, got {self.application_pool_size}")
+
+
+@dataclass(frozen=True)
+class CacheProfile:
+    """
+    Shared cache of the backend, as a replication group of one primary and the given number of replicas.
+    Replicas serve the reader endpoint and take over when the primary fails. Without an engine_version the
+    latest supported version of the engine is used.
+    """
+
+    engine: str = "redis"
+    engine_version: Optional[str] = None
+    node_type: str = "cache.t4g.micro"
+    replicas: int = 0
+    port: int = 6379
+    engine_cpu_threshold_percent: int = 80
+    memory_threshold_percent: int = 80
+
+    def __post_init__(self) -> None:
+        if self.engine not in CACHE_ENGINE_VERSIONS:
+            raise ValueError(f"engine must be one of {sorted(CACHE_ENGINE_VERSIONS)}, got {self.engine}")
+        if not 0 <= self.replicas <= 5:
+            raise ValueError(f"replicas must be within 0 and 5, got {self.replicas}")
+
+    @property
+    def version(self) -> str:
+        return self.engine_version or CACHE_ENGINE_VERSIONS[self.engine]
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    """
+    Topology of the cluster vpc. Tasks pull images, read secrets and write logs through vpc endpoints instead
+    of through the NAT gateways, which then only carry traffic to services outside AWS, such as the OIDC
+    provider. A single NAT gateway saves cost, but takes the outbound traffic of all zones down with its zone.
+    """
+
+    max_azs: int = 2
+    nat_gateways: int = 2
+    interface_endpoints: bool = True
+
+    def __post_init__(self) -> None:
+        if self.max_azs < 2:
+            raise ValueError(f"max_azs must be at least 2 for the load balancer, got {self.max_azs}")
+        if not 1 <= self.nat_gateways <= self.max_azs:
+            raise ValueError(f"nat_gateways must be within 1 and max_azs, got {self.nat_gateways}")
+
+
+@dataclass(frozen=True)
+class LoadBalancerAuthProfile:
+    """
+    Paths for which the load balancer performs the OIDC login against Cognito before forwarding requests.
+    Forwarded requests carry the verified identity in the x-amzn-oidc-* headers, so the application does not
+    need to run the authorization code flow itself for these paths.
+    """
+
+    paths: Tuple[str, ...]
+    session_timeout: Duration = Duration.hours(8)
+    scope: str = "openid email profile"
+    first_rule_priority: int = 10
+
+    def __post_init__(self) -> None:
+        if not self.paths:
+            raise ValueError("at least one path must be authenticated by the load balancer")
+        for path in self.paths:
+            if not path.startswith("/"):
+                raise ValueError(f"paths must start with '/', got {path}")
+
+
+@dataclass(frozen=True)
+class CapacityProfile:
+    """
+    Fargate capacity providers of the backend service. The first `on_demand_base` tasks always run on regular
+    Fargate, tasks above the base are spread over Fargate and Fargate Spot by weight. Spot tasks cost up to 70%
+    less but can be reclaimed with a two minute warning, so the on-demand base keeps serving while they are
+    replaced.
+    """
+
+    on_demand_base: int = 1
+    on_demand_weight: int = 0
+    spot_weight: int = 1
+
+    def __post_init__(self) -> None:
+        if self.on_demand_base < 0:
+            raise ValueError(f"on_demand_base must not be negative, got {self.on_demand_base}")
+        if self.on_demand_weight < 0 or self.spot_weight < 0:
+            raise ValueError(f"weights must not be negative, got {self.on_demand_weight} and {self.spot_weight}")
+        if self.on_demand_weight + self.spot_weight == 0:
+            raise ValueError("at least one of on_demand_weight and spot_weight must be positive")
+
+
+@dataclass(frozen=True)
+class ScheduleProfile:
+    """
+    Working hours of an environment that is not used at night. The service is scaled to zero tasks at
+    `day_end_hour` and scaled to its maximum capacity `prewarm` before `day_start_hour`, so tasks have started and
+    warmed up when the day begins. From `day_start_hour` on, auto scaling takes over again within the limits of
+    the scaling profile. Hours are in `time_zone`; days outside `week_days` stay scaled to zero.
+    """
+
+    day_start_hour: int = 8
+    day_end_hour: int = 19
+    prewarm: Duration = Duration.minutes(30)
+    week_days: str = "MON-FRI"
+    time_zone: str = "Europe/Amsterdam"
+
+    def __post_init__(self) -> None:
+        if not 0 <= self.day_start_hour < self.day_end_hour <= 23:
+            raise ValueError(f"hours must satisfy 0 <= day_start_hour < day_end_hour <= 23, "
+                             f"got {self.day_start_hour} and {self.day_end_hour}")
+        if not 0 < self.prewarm.to_minutes() <= self.day_start_hour * 60:
+            raise ValueError(f"prewarm must be positive and start on the same day, got {self.prewarm.to_minutes()}m")
+
+    @property
+    def prewarm_time(self) -> Tuple[int, int]:
+        """
+        Hour and minute at which the service is scaled up before the day starts.
+        """
+        minutes = self.day_start_hour * 60 - int(self.prewarm.to_minutes())
+        return minutes // 60, minutes % 60
@@ -1,9 +1,38 @@
 import aws_cdk.aws_certificatemanager as cert
+import aws_cdk.aws_cloudfront as cf
+import aws_cdk.aws_cloudwatch as cw
+import aws_cdk.aws_cloudwatch_actions as cw_actions
 import aws_cdk.aws_cognito as cognito
 import aws_cdk.aws_route53 as r53
+import aws_cdk.aws_sns as sns
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple, TypeVar
+
+from aws_cdk import CfnResource
 from aws_cdk import Stack
+from constructs import Construct
+
+from app_config import GLOBAL_SSL_CERT_ARN, PRIMARY_REGION, SECOND_LVL_DOMAIN, TOP_DOMAIN, USER_POOL_ARN
+from project.application.base.profiles import MonitoringProfile
+from project.infrastructure.authentication import SERVER_PREFIX
+
+
+T = TypeVar("T")
+
+
+@dataclass
+class ImportStats:
+    imports: int = 0
+    hits: int = 0
+    constructs_saved: int = 0
+    resources_saved: int = 0
 
-from app_config import SECOND_LVL_DOMAIN, TOP_DOMAIN, USER_POOL_ARN
+
+@dataclass(frozen=True)
+class _ImportEntry:
+    value: object
+    constructs: int
+    resources: int
 
 
 class StackBase(Stack):
@@ -11,34 +40,174 @@ class StackBase(Stack):
     The stack base contains methods and information required by any application in any cluster to deploy.
     """
 
+    def __init__(self, scope: Construct, construct_id: str, **kwargs: object) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+        self._imports: Dict[str, _ImportEntry] = {}
+        self.import_stats = ImportStats()
+
+    '''
+    Names that must be unique per account, rather than per region, get the region appended outside the primary
+    region. Resources of the primary region keep their names.
+    '''
+
+    @property
+    def in_primary_region(self) -> bool:
+        return self.region == PRIMARY_REGION
+
+    def regional_name(self, name: str) -> str:
+        return name if self.in_primary_region else f"{name}-{self.region}"
+
+    def regional_config(self, config: Dict[str, str], description: str) -> str:
+        if self.region not in config:
+            raise ValueError(f"No {description} configured for region {self.region} in app_config.py")
+        return config[self.region]
+
+    '''
+    Existing resources are imported once per stack; fetching the same logical resource again returns the
+    construct created by the first fetch instead of adding another import with a colliding id.
+    '''
+
+    def import_once(self, key: str, factory: Callable[[], T]) -> T:
+        entry = self._imports.get(key)
+
+        if entry is None:
+            # Imports are added as children of the stack, so only the subtrees of the new children are walked
+            children_before = len(self.node.children)
+            value = factory()
+            created = [
+                construct
+                for child in self.node.children[children_before:]
+                for construct in child.node.find_all()
+            ]
+
+            entry = _ImportEntry(
+                value=value,
+                constructs=len(created),
+                resources=sum(1 for construct in created if isinstance(construct, CfnResource)),
+            )
+            self._imports[key] = entry
+            self.import_stats.imports += 1
+        else:
+            self.import_stats.hits += 1
+            self.import_stats.constructs_saved += entry.constructs
+            self.import_stats.resources_saved += entry.resources
+
+        return entry.value
+
     '''
     SSL Certs should be created through the ui/cli in combination with route 53 registrations. This 
     single cert should contain all the subdomains applicable, such as those with acc and tst prefixes.
     '''
 
     def fetch_ssl_cert(self, resource_id: str, certificate_arn: str) -> cert.ICertificate:
-        return cert.Certificate.from_certificate_arn(
+        return self.import_once(f"certificate:{certificate_arn}", lambda: cert.Certificate.from_certificate_arn(
             self, resource_id,
             certificate_arn=certificate_arn,
-        )
+        ))
+
+    '''
+    CloudFront distributions are hosted at the global level, for which certs are defined in the us-east-1
+    region. This applies to the frontend as well as to a distribution in front of the backend.
+    '''
+
+    def fetch_global_ssl_cert(self) -> cert.ICertificate:
+        return self.fetch_ssl_cert("GlobalTLSCertificateImport", GLOBAL_SSL_CERT_ARN)
 
     '''
     Hosted zones are automatically created when ssl certs are issues by AWS. Do not remove manually.
     '''
 
     def fetch_hosted_zone(self) -> r53.IHostedZone:
-        return r53.HostedZone.from_lookup(
+        return self.import_once("hosted-zone", lambda: r53.HostedZone.from_lookup(
             self, "HostedZoneImport",
             domain_name=f"{SECOND_LVL_DOMAIN}.{TOP_DOMAIN}"
-        )
+        ))
 
     '''
     Needless to say, authentication servers should obviously never be removed!
     '''
 
     def fetch_authentication_server(self) -> cognito.IUserPool:
-        return cognito.UserPool.from_user_pool_arn(
+        return self.import_once("user-pool", lambda: cognito.UserPool.from_user_pool_arn(
             self,
             id="AuthenticationServer",
             user_pool_arn=USER_POOL_ARN,
-        )
+        ))
+
+    def fetch_authentication_domain(self) -> cognito.IUserPoolDomain:
+        return self.import_once("user-pool-domain", lambda: cognito.UserPoolDomain.from_domain_name(
+            self, "AuthenticationServerDomain",
+            user_pool_domain_name=SERVER_PREFIX.lower(),
+        ))
+
+    '''
+    Alarms of an environment notify a single topic, to which the people on call subscribe.
+    '''
+
+    def create_alarms(
+            self,
+            name: str,
+            monitoring: MonitoringProfile,
+            thresholds: Dict[str, Tuple[cw.IMetric, float]],
+    ) -> List[cw.Alarm]:
+        topic = sns.Topic(self, f"{name}Alarms", display_name=f"{name} alarms")
+
+        alarms = []
+        for alarm_name, (metric, threshold) in thresholds.items():
+            alarm = cw.Alarm(
+                self, f"{name}{alarm_name}Alarm",
+                metric=metric,
+                threshold=threshold,
+                evaluation_periods=monitoring.evaluation_periods,
+                comparison_operator=cw.ComparisonOperator.GREATER_THAN_THRESHOLD,
+                treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
+            )
+            alarm.add_alarm_action(cw_actions.SnsAction(topic))
+            alarms.append(alarm)
+
+        return alarms
+
+    '''
+    CloudFront publishes its metrics in us-east-1 only, regardless of the region of the stack.
+    '''
+
+    def create_cloudfront_widgets(
+            self,
+            distribution: cf.Distribution,
+            name: str,
+            monitoring: MonitoringProfile,
+    ) -> List[cw.IWidget]:
+        def metric(metric_name: str, statistic: str) -> cw.Metric:
+            return cw.Metric(
+                namespace="AWS/CloudFront",
+                metric_name=metric_name,
+                dimensions_map=dict(DistributionId=distribution.distribution_id, Region="Global"),
+                statistic=statistic,
+                period=monitoring.period,
+                region="us-east-1",
+            )
+
+        widgets: List[cw.IWidget] = [
+            cw.GraphWidget(title="CloudFront requests", left=[metric("Requests", "Sum")]),
+            cw.GraphWidget(title="CloudFront 5xx error rate", left=[metric("5xxErrorRate", "Average")]),
+        ]
+
+        if monitoring.cloudfront_additional_metrics:
+            subscription = cf.CfnMonitoringSubscription
+            subscription(
+                self, f"{name}DistributionMonitoring",
+                distribution_id=distribution.distribution_id,
+                monitoring_subscription=subscription.MonitoringSubscriptionProperty(
+                    realtime_metrics_subscription_config=subscription.RealtimeMetricsSubscriptionConfigProperty(
+                        realtime_metrics_subscription_status="Enabled",
+                    ),
+                ),
+            )
+            widgets += [
+                cw.GraphWidget(title="CloudFront cache hit rate", left=[metric("CacheHitRate", "Average")]),
+                cw.GraphWidget(title="CloudFront origin latency", left=[
+                    metric("OriginLatency", statistic) for statistic in ("p50", "p90", "p99")
+                ]),
+            ]
+
+        return widgets
@@ -1,12 +1,86 @@
+import aws_cdk.aws_ecs as ecs
+import aws_cdk.aws_logs as logs
+from aws_cdk import Duration
+from aws_cdk import Size
 from constructs import Construct
 
+from app_config import BACKEND_REGIONS
 from project.application.base.backend_stack import BackendStack
+from project.application.base.profiles import (
+    ApiDistributionProfile,
+    BlueGreenProfile,
+    CacheProfile,
+    ComputeProfile,
+    MonitoringProfile,
+    NetworkProfile,
+    RolloutProfile,
+    ScalingProfile,
+)
 from project.application.base.stack_base import SECOND_LVL_DOMAIN, TOP_DOMAIN
+from project.performance_lint import NAT_PER_AZ, suppress
 
 CLUSTER_NAME = "Prd"
 
+REGIONS = BACKEND_REGIONS[CLUSTER_NAME]
+
 BE_DOMAIN = f"api.{SECOND_LVL_DOMAIN}.{TOP_DOMAIN}"
 
+SCALING = ScalingProfile(
+    min_capacity=2,
+    max_capacity=6,
+    cpu_target_percent=60,
+    memory_target_percent=75,
+    requests_per_target=500,
+)
+
+COMPUTE = ComputeProfile(
+    cpu=1024,
+    memory_limit_mib=2048,
+    cpu_architecture=ecs.CpuArchitecture.ARM64,
+)
+
+API_DISTRIBUTION = ApiDistributionProfile(
+    cacheable_paths=("/v3/api-docs*", "/swagger-ui/*"),
+)
+
+ROLLOUT = RolloutProfile(
+    circuit_breaker=True,
+    min_healthy_percent=100,
+    max_healthy_percent=200,
+    health_check_grace_period=Duration.seconds(90),
+    health_check_interval=Duration.seconds(10),
+    health_check_timeout=Duration.seconds(5),
+    healthy_threshold=2,
+    unhealthy_threshold=3,
+    deregistration_delay=Duration.seconds(30),
+    slow_start=Duration.seconds(30),
+)
+
+BLUE_GREEN = BlueGreenProfile(
+    traffic_shifting="canary",
+    step_percent=10,
+    step_interval=Duration.minutes(5),
+    termination_wait=Duration.minutes(15),
+)
+
+MONITORING = MonitoringProfile(
+    log_buffer_size=Size.mebibytes(8),
+    log_retention=logs.RetentionDays.THREE_MONTHS,
+    latency_p99_threshold=Duration.seconds(1),
+    server_error_threshold=5,
+    cloudfront_additional_metrics=True,
+)
+
+CACHE = CacheProfile(
+    node_type="cache.t4g.small",
+    replicas=1,
+)
+
+NETWORK = NetworkProfile(
+    nat_gateways=2,
+    interface_endpoints=True,
+)
+
 
 class ProductionBackend(BackendStack):
 
@@ -16,11 +90,24 @@ class ProductionBackend(BackendStack):
         registry = self.fetch_registry()
         hosted_zone = self.fetch_hosted_zone()
         ssl_cert = self.fetch_regional_ssl_cert()
+        global_ssl_cert = self.fetch_global_ssl_cert()
 
         auth_server = self.fetch_authentication_server()
         server_client = self.create_server_authentication_client(auth_server, CLUSTER_NAME)
         swagger_client = self.create_swagger_authentication_client(auth_server, BE_DOMAIN, CLUSTER_NAME)
 
-        cluster = self.create_cluster(CLUSTER_NAME)
-        backend = self.create_service(cluster, CLUSTER_NAME, registry, ssl_cert, server_client, swagger_client)
-        self.create_dns_record(hosted_zone, backend.load_balancer, BE_DOMAIN)
+        cluster = self.create_cluster(CLUSTER_NAME, MONITORING, NETWORK)
+        suppress(cluster.vpc, NAT_PER_AZ, "Outbound traffic must survive the loss of a zone in production")
+        cache = self.create_cache(cluster.vpc, CLUSTER_NAME, CACHE)
+        backend = self.create_service(
+            cluster, CLUSTER_NAME, registry, ssl_cert, server_client, swagger_client,
+            scaling=SCALING,
+            compute=COMPUTE,
+            rollout=ROLLOUT,
+            monitoring=MONITORING,
+            cache=cache,
+            blue_green=BLUE_GREEN,
+        )
+        api = self.create_api_distribution(backend, global_ssl_cert, CLUSTER_NAME, BE_DOMAIN, API_DISTRIBUTION)
+        self.create_dns_record(hosted_zone, backend.load_balancer, BE_DOMAIN, api, latency_routing=len(REGIONS) > 1)
+        self.create_monitoring(backend, CLUSTER_NAME, MONITORING, api, cache)
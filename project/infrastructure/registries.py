@@ -1,7 +1,22 @@
 import aws_cdk.aws_ecr as ecr
+from typing import Tuple
+
+from aws_cdk import Duration
 from aws_cdk import Stack
 from constructs import Construct
 
+from app_config import BACKEND_ECR_ARNS, PRIMARY_REGION
+
+REPOSITORY_NAME = "backend-registry"
+
+# Images of builds are tagged with this prefix and expire once enough newer builds exist; release versions are
+# tagged without it and kept, so the image an environment is pinned to never expires
+BUILD_TAG_PREFIX = "build-"
+MAX_BUILD_IMAGE_COUNT = 50
+UNTAGGED_IMAGE_AGE = Duration.days(7)
+
+REPLICA_REGIONS = tuple(sorted(region for region in BACKEND_ECR_ARNS if region != PRIMARY_REGION))
+
 
 class Registries(Stack):
 
@@ -9,8 +24,61 @@ class Registries(Stack):
         super().__init__(scope, construct_id, **kwargs)
         self.create_registries()
 
+    '''
+    Tags are immutable, so a version always refers to the image it was pushed as. Untagged images, such as
+    layers of interrupted pushes, expire after a week; of the build images only the most recent are kept.
+    '''
+
     def create_registries(self) -> ecr.Repository:
-        return ecr.Repository(
+        repository = ecr.Repository(
             self, "BackendRegistry",
-            repository_name="backend-registry"
+            repository_name=REPOSITORY_NAME,
+            image_tag_mutability=ecr.TagMutability.IMMUTABLE,
+            image_scan_on_push=True,
+            lifecycle_rules=[
+                ecr.LifecycleRule(
+                    rule_priority=1,
+                    description="Expire untagged images",
+                    tag_status=ecr.TagStatus.UNTAGGED,
+                    max_image_age=UNTAGGED_IMAGE_AGE,
+                ),
+                ecr.LifecycleRule(
+                    rule_priority=2,
+                    description=f"Keep the {MAX_BUILD_IMAGE_COUNT} most recent build images",
+                    tag_status=ecr.TagStatus.TAGGED,
+                    tag_prefix_list=[BUILD_TAG_PREFIX],
+                    max_image_count=MAX_BUILD_IMAGE_COUNT,
+                ),
+            ],
+        )
+
+        if REPLICA_REGIONS:
+            self.create_replication(REPLICA_REGIONS)
+
+        return repository
+
+    '''
+    Replication is configured once per registry, so this stack owns the replication of the whole account
+    registry in its region. Pushed images are copied to the repository of the same name in each backend region,
+    which ECR creates on first replication; backends pull from the registry of their own region.
+    '''
+
+    def create_replication(self, regions: Tuple[str, ...]) -> ecr.CfnReplicationConfiguration:
+        return ecr.CfnReplicationConfiguration(
+            self, "BackendRegistryReplication",
+            replication_configuration=ecr.CfnReplicationConfiguration.ReplicationConfigurationProperty(
+                rules=[ecr.CfnReplicationConfiguration.ReplicationRuleProperty(
+                    destinations=[
+                        ecr.CfnReplicationConfiguration.ReplicationDestinationProperty(
+                            region=region,
+                            registry_id=self.account,
+                        )
+                        for region in regions
+                    ],
+                    repository_filters=[ecr.CfnReplicationConfiguration.RepositoryFilterProperty(
+                        filter=REPOSITORY_NAME,
+                        filter_type="PREFIX_MATCH",
+                    )],
+                )],
+            ),
         )
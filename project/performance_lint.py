@@ -0,0 +1,245 @@
+"""
+Lint that reports constructs which are known to be slow or costly: services with a fixed task count, a NAT
+gateway in every zone, mutable image tags, CloudFront behaviors that do not cache or compress, secrets imported
+more than once and small log buffers. Findings are reported as warnings or errors on the construct, so the
+toolkit prints them with their construct path, and `cdk synth --strict` fails on warnings as well.
+
+The severity of each rule can be changed, or the rule turned off, through the perf-lint context value:
+
+    cdk synth -c 'perf-lint={"latest-image-tag": "error", "nat-per-az": "off"}'
+
+A construct that breaks a rule on purpose is exempted with suppress(), which applies to its children as well.
+"""
+import json
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import aws_cdk as cdk
+import aws_cdk.aws_ec2 as ec2
+from aws_cdk import Size, cx_api
+from constructs import IConstruct
+
+LINT_CONTEXT_KEY = "perf-lint"
+SUPPRESSION_METADATA = "perf-lint:suppress"
+
+FIXED_DESIRED_COUNT = "fixed-desired-count"
+NAT_PER_AZ = "nat-per-az"
+LATEST_IMAGE_TAG = "latest-image-tag"
+UNCACHED_BEHAVIOR = "uncached-behavior"
+DUPLICATE_SECRET_IMPORT = "duplicate-secret-import"
+SMALL_LOG_BUFFER = "small-log-buffer"
+
+WARNING = "warning"
+ERROR = "error"
+OFF = "off"
+
+DEFAULT_SEVERITIES = {
+    FIXED_DESIRED_COUNT: WARNING,
+    NAT_PER_AZ: WARNING,
+    LATEST_IMAGE_TAG: WARNING,
+    UNCACHED_BEHAVIOR: ERROR,
+    DUPLICATE_SECRET_IMPORT: ERROR,
+    SMALL_LOG_BUFFER: WARNING,
+}
+
+# Docker blocks or drops log lines once a non-blocking buffer fills up, which a JVM stack trace easily does
+MIN_LOG_BUFFER = Size.mebibytes(4)
+
+BUFFER_UNITS = {"": 1, "b": 1, "k": 1024, "kb": 1024, "m": 1024 ** 2, "mb": 1024 ** 2, "g": 1024 ** 3, "gb": 1024 ** 3}
+
+
+@dataclass(frozen=True)
+class Finding:
+    rule: str
+    severity: str
+    path: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.severity.upper()} [{self.rule}] {self.path}: {self.message}"
+
+
+def suppress(scope: IConstruct, rule: str, reason: str) -> None:
+    """
+    Exempts a construct and its children from a rule. The reason is kept in the construct metadata.
+    """
+    scope.node.add_metadata(SUPPRESSION_METADATA, {"rule": rule, "reason": reason})
+
+
+def is_suppressed(node: IConstruct, rule: str) -> bool:
+    return any(
+        entry.type == SUPPRESSION_METADATA and entry.data["rule"] == rule
+        for scope in node.node.scopes
+        for entry in scope.node.metadata
+    )
+
+
+'''
+Rules read the properties of resources from the synthesized template of their stack, which holds them resolved
+to plain values and with property overrides applied; the typed property getters of the L1 resources cannot be
+used, as jsii fails to convert the lazy values the L2 constructs set there. Resources are mapped back to their
+construct through their logical id. Findings are annotations on those constructs, which only reach the cloud
+assembly when it is synthesized again, so synth_with_lint only synthesizes the app a second time when the lint
+found anything.
+'''
+
+
+def synth_with_lint(app: cdk.App, lint: "PerformanceLint") -> cx_api.CloudAssembly:
+    assembly = app.synth()
+
+    for stack in app.node.children:
+        if isinstance(stack, cdk.Stack):
+            lint.check_stack(stack, assembly.get_stack_artifact(stack.artifact_id).template)
+
+    return app.synth(force=True) if lint.findings else assembly
+
+
+def image_name(image: object) -> Optional[str]:
+    """
+    Returns the last path segment of an image reference, e.g. "backend-registry:latest", or None when that
+    segment is not known at synth time.
+    """
+    if isinstance(image, dict) and "Fn::Join" in image:
+        separator, parts = image["Fn::Join"]
+        image = separator.join(part if isinstance(part, str) else "\0" for part in parts)
+    if not isinstance(image, str):
+        return None
+
+    name = image.rsplit("/", 1)[-1]
+    return None if "\0" in name else name
+
+
+def buffer_bytes(value: str) -> Optional[int]:
+    match = re.fullmatch(r"(\d+)\s*([a-zA-Z]*)", value.strip())
+    if not match or match.group(2).lower() not in BUFFER_UNITS:
+        return None
+    return int(match.group(1)) * BUFFER_UNITS[match.group(2).lower()]
+
+
+class PerformanceLint:
+
+    def __init__(self, severities: Optional[Dict[str, str]] = None, min_log_buffer: Size = MIN_LOG_BUFFER) -> None:
+        unknown = set(severities or {}) - set(DEFAULT_SEVERITIES)
+        if unknown:
+            raise ValueError(f"Unknown performance lint rules {', '.join(sorted(unknown))}")
+        invalid = {rule for rule, severity in (severities or {}).items() if severity not in (WARNING, ERROR, OFF)}
+        if invalid:
+            raise ValueError(f"Severity of {', '.join(sorted(invalid))} must be one of {WARNING}, {ERROR}, {OFF}")
+
+        self.severities = {**DEFAULT_SEVERITIES, **(severities or {})}
+        self.min_log_buffer = min_log_buffer
+        self.findings: List[Finding] = []
+
+    def check_stack(self, stack: cdk.Stack, template: dict) -> None:
+        resources = template.get("Resources", {})
+        self.check_secret_imports(stack)
+
+        for node in stack.node.find_all():
+            if isinstance(node, ec2.Vpc):
+                self.check_nat_gateways(node)
+            elif cdk.CfnResource.is_cfn_resource(node) and cdk.Stack.of(node) is stack:
+                self.check_resource(node, stack.get_logical_id(node), resources)
+
+    def check_resource(self, resource: cdk.CfnResource, logical_id: str, resources: Dict[str, dict]) -> None:
+        resource_type = resources.get(logical_id, {}).get("Type")
+        properties = resources.get(logical_id, {}).get("Properties", {})
+
+        if resource_type == "AWS::ECS::Service":
+            self.check_desired_count(resource, logical_id, properties, resources)
+        elif resource_type == "AWS::ECS::TaskDefinition":
+            self.check_containers(resource, properties)
+        elif resource_type == "AWS::CloudFront::Distribution":
+            self.check_behaviors(resource, properties)
+
+    def report(self, node: IConstruct, rule: str, message: str) -> None:
+        severity = self.severities[rule]
+        if severity == OFF or is_suppressed(node, rule):
+            return
+
+        finding = Finding(rule, severity, node.node.path, message)
+        self.findings.append(finding)
+
+        text = f"[{rule}] {message}"
+        if severity == ERROR:
+            cdk.Annotations.of(node).add_error(text)
+        else:
+            cdk.Annotations.of(node).add_warning(text)
+
+    def check_desired_count(
+            self,
+            service: cdk.CfnResource,
+            logical_id: str,
+            properties: dict,
+            resources: Dict[str, dict],
+    ) -> None:
+        scaled = any(
+            resource["Type"] == "AWS::ApplicationAutoScaling::ScalableTarget"
+            and resource["Properties"].get("ScalableDimension") == "ecs:service:DesiredCount"
+            and logical_id in json.dumps(resource["Properties"].get("ResourceId"))
+            for resource in resources.values()
+        )
+        if not scaled:
+            count = properties.get("DesiredCount", 1)
+            self.report(service, FIXED_DESIRED_COUNT, f"Service runs a fixed {count} tasks without auto scaling")
+
+    def check_nat_gateways(self, vpc: ec2.Vpc) -> None:
+        nat_gateways = sum(isinstance(child, ec2.CfnNatGateway) for child in vpc.node.find_all())
+        zones = len(vpc.availability_zones)
+
+        if nat_gateways > 1 and nat_gateways >= zones:
+            self.report(vpc, NAT_PER_AZ, f"{nat_gateways} NAT gateways, one in each of {zones} zones")
+
+    def check_containers(self, task_definition: cdk.CfnResource, properties: dict) -> None:
+        for container in properties.get("ContainerDefinitions", []):
+            name = container["Name"]
+            repository_and_tag = image_name(container["Image"])
+
+            if repository_and_tag and (repository_and_tag.endswith(":latest") or
+                                       not re.search(r"[:@]", repository_and_tag)):
+                self.report(
+                    task_definition, LATEST_IMAGE_TAG,
+                    f"Container {name} uses a mutable image tag, tasks of one deployment may run different images",
+                )
+
+            options = container.get("LogConfiguration", {}).get("Options", {})
+            if options.get("mode") == "non-blocking":
+                size = buffer_bytes(options.get("max-buffer-size", "1m"))
+                minimum = self.min_log_buffer.to_bytes()
+                if size is not None and size < minimum:
+                    self.report(
+                        task_definition, SMALL_LOG_BUFFER,
+                        f"Container {name} buffers {size} bytes of logs, less than {minimum}",
+                    )
+
+    def check_behaviors(self, distribution: cdk.CfnResource, properties: dict) -> None:
+        config = properties.get("DistributionConfig", {})
+        behaviors = [config.get("DefaultCacheBehavior", {}), *config.get("CacheBehaviors", [])]
+
+        for behavior in behaviors:
+            path = behavior.get("PathPattern", "*")
+            if "CachePolicyId" not in behavior:
+                self.report(distribution, UNCACHED_BEHAVIOR, f"Behavior {path} has no cache policy")
+            if not behavior.get("Compress"):
+                self.report(distribution, UNCACHED_BEHAVIOR, f"Behavior {path} does not compress responses")
+
+    def check_secret_imports(self, stack: cdk.Stack) -> None:
+        imports: Dict[str, List[IConstruct]] = {}
+
+        for construct in stack.node.find_all():
+            # Imported secrets have an arn, but no resource of their own
+            if hasattr(construct, "secret_arn") and construct.node.default_child is None:
+                arn = json.dumps(stack.resolve(construct.secret_arn))
+                imports.setdefault(arn, []).append(construct)
+
+        for duplicates in imports.values():
+            for duplicate in duplicates[1:]:
+                self.report(
+                    duplicate, DUPLICATE_SECRET_IMPORT,
+                    f"Secret is imported {len(duplicates)} times in this stack, first at {duplicates[0].node.path}",
+                )
+
+
+def lint_severities(app: cdk.App) -> Dict[str, str]:
+    value = app.node.try_get_context(LINT_CONTEXT_KEY) or {}
+    return json.loads(value) if isinstance(value, str) else value
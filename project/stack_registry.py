@@ -0,0 +1,83 @@
+"""
+Registry of all stacks of the app. Stack modules are only imported when their stack is created, so an app
+that builds a selection of the stacks does not pay for importing and constructing the others. The registry
+itself does not load the CDK, so tools can read it without starting the jsii runtime.
+"""
+import fnmatch
+import importlib
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional
+
+from app_config import BACKEND_REGIONS, PRIMARY_REGION
+
+if TYPE_CHECKING:
+    import aws_cdk as cdk
+
+SELECTION_CONTEXT_KEY = "stacks"
+SELECTION_ENVIRONMENT_VARIABLE = "CDK_STACKS"
+
+# The image of a backend is passed per cluster, e.g. `cdk deploy -c backend-image:Prd=1.4.2`
+IMAGE_CONTEXT_KEY = "backend-image"
+
+# Image of backends that are synthesized but not deployed, see project/tooling/cdk_context.py
+PLACEHOLDER_IMAGE = "0.0.0-placeholder"
+
+
+@dataclass(frozen=True)
+class StackEntry:
+    name: str
+    module: str
+    class_name: str
+    region: str = PRIMARY_REGION
+
+    def create(self, app: "cdk.App", account: Optional[str]) -> "cdk.Stack":
+        import aws_cdk as cdk
+
+        stack_class = getattr(importlib.import_module(self.module), self.class_name)
+        return stack_class(app, self.name, env=cdk.Environment(account=account, region=self.region))
+
+
+def regional_stack_name(name: str, region: str) -> str:
+    return name if region == PRIMARY_REGION else f"{name}-{region}"
+
+
+def image_context_key(cluster_name: str) -> str:
+    return f"{IMAGE_CONTEXT_KEY}:{cluster_name}"
+
+
+def backend_entries(name: str, module: str, cluster_name: str) -> List[StackEntry]:
+    return [
+        StackEntry(regional_stack_name(name, region), module, name, region)
+        for region in BACKEND_REGIONS[cluster_name]
+    ]
+
+
+STACKS: List[StackEntry] = [
+    StackEntry("Permissions", "project.infrastructure.permissions", "Permissions"),
+    StackEntry("ImageRegistries", "project.infrastructure.registries", "Registries"),
+    StackEntry("AuthenticationServer", "project.infrastructure.authentication", "Authentication"),
+    *backend_entries("ProductionBackend", "project.application.production_backend", "Prd"),
+    StackEntry("ProductionFrontend", "project.application.production_frontend", "ProductionFrontend"),
+    *backend_entries("AcceptanceBackend", "project.application.acceptance_backend", "Acc"),
+    StackEntry("AcceptanceFrontend", "project.application.acceptance_frontend", "AcceptanceFrontend"),
+]
+
+
+'''
+Stacks are selected by a comma separated list of names or glob patterns, e.g. "Production*,ImageRegistries".
+Without a selection all stacks are built. Selected stacks keep their order in the registry.
+'''
+
+
+def select_stacks(selection: Optional[str]) -> List[StackEntry]:
+    if not selection:
+        return list(STACKS)
+
+    patterns = [pattern.strip() for pattern in selection.split(",") if pattern.strip()]
+    unmatched = [p for p in patterns if not any(fnmatch.fnmatchcase(entry.name, p) for entry in STACKS)]
+
+    if unmatched:
+        available = ", ".join(entry.name for entry in STACKS)
+        raise ValueError(f"No stacks match {', '.join(unmatched)}; available stacks are {available}")
+
+    return [entry for entry in STACKS if any(fnmatch.fnmatchcase(entry.name, p) for p in patterns)]
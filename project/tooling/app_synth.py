@@ -0,0 +1,75 @@
+"""
+Builds the selected stacks into an App and synthesizes it. app.py and the workers of parallel_synth both synthesize
+through this module, so either way stacks are taken from the synth cache, repeated imports are reported and the
+performance lint runs over every stack.
+"""
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import aws_cdk as cdk
+
+from project.performance_lint import PerformanceLint, lint_severities, synth_with_lint
+from project.stack_registry import StackEntry
+from project.tooling.synth_cache import CACHE_CONTEXT_KEY, CACHE_ENVIRONMENT_VARIABLE, SynthCache, cache_dir
+
+
+def stack_reports(app: cdk.App, lint: PerformanceLint) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Returns what synthesis reports of each stack of the app: its repeated imports and its lint findings.
+    """
+    reports = {}
+
+    for stack in app.node.children:
+        if not isinstance(stack, cdk.Stack):
+            continue
+
+        stats = getattr(stack, "import_stats", None)
+        reports[stack.node.id] = {
+            "imports": [
+                f"{stack.stack_name}: {stats.hits} repeated imports deduplicated, "
+                f"saving {stats.constructs_saved} constructs and {stats.resources_saved} resources"
+            ] if stats and stats.hits else [],
+            "findings": [str(finding) for finding in lint.findings if finding.path.split("/")[0] == stack.node.id],
+        }
+
+    return reports
+
+
+def synth_app(
+        app: cdk.App,
+        entries: List[StackEntry],
+        account: Optional[str],
+        context: Dict[str, object],
+) -> Path:
+    """
+    Synthesizes the stacks into the output directory of the app and returns that directory. The context is the
+    context of the app without the values that only control the tooling, which the synth cache fingerprints.
+    """
+    cache_setting = app.node.try_get_context(CACHE_CONTEXT_KEY)
+    directory = cache_dir(os.environ.get(CACHE_ENVIRONMENT_VARIABLE) if cache_setting is None else cache_setting)
+    cache = SynthCache(directory, account, context) if directory else None
+
+    for entry in entries:
+        if cache and cache.lookup(entry):
+            continue
+        entry.create(app, account)
+
+    lint = PerformanceLint(lint_severities(app))
+    outdir = Path(synth_with_lint(app, lint).directory)
+    reports = stack_reports(app, lint)
+
+    # Cached stacks are not constructed, so what their last synth reported is replayed
+    if cache:
+        reports.update(cache.complete(outdir, [entry.name for entry in entries], reports))
+
+    for kind in ("imports", "findings"):
+        for entry in entries:
+            for line in reports[entry.name][kind]:
+                print(line, file=sys.stderr)
+
+    if cache:
+        print(cache.stats, file=sys.stderr)
+
+    return outdir
@@ -0,0 +1,137 @@
+"""
+Releases a backend image to a backend stack with blue/green deployments. The latest task definition of the
+stack is registered again with the new image and deployed through the CodeDeploy deployment group of the
+stack, which shifts traffic to the new tasks step by step and rolls back when a rollback alarm goes off.
+
+    python -m project.tooling.backend_deployer ProductionBackend \\
+        123456789012.dkr.ecr.eu-west-1.amazonaws.com/backend@sha256:...
+
+The latest task definition includes changes registered by cdk deploy, so those are released as well. Use
+--dry-run to print the task definition and AppSpec without deploying.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+from project.tooling.frontend_publisher import stack_outputs
+
+# Fields describe_task_definition returns that register_task_definition does not accept
+READ_ONLY_FIELDS = (
+    "taskDefinitionArn", "revision", "status", "requiresAttributes", "compatibilities",
+    "registeredAt", "registeredBy", "deregisteredAt",
+)
+
+FINAL_STATUSES = ("Succeeded", "Failed", "Stopped")
+POLL_INTERVAL_SECONDS = 15
+
+
+def revised_task_definition(task_definition: Dict, container_name: str, image: str) -> Dict:
+    """
+    Returns the registration request for a copy of the task definition that runs `image` in the container.
+    """
+    if not any(container["name"] == container_name for container in task_definition["containerDefinitions"]):
+        raise ValueError(f"Task definition {task_definition['family']} has no container {container_name}")
+
+    revision = {key: value for key, value in task_definition.items() if key not in READ_ONLY_FIELDS}
+    revision["containerDefinitions"] = [
+        {**container, "image": image} if container["name"] == container_name else container
+        for container in task_definition["containerDefinitions"]
+    ]
+    return revision
+
+
+def app_spec(task_definition: Dict, container_name: str, service: Dict) -> Dict:
+    container = next(c for c in task_definition["containerDefinitions"] if c["name"] == container_name)
+    properties = dict(
+        TaskDefinition=task_definition["taskDefinitionArn"],
+        LoadBalancerInfo=dict(
+            ContainerName=container_name,
+            ContainerPort=container["portMappings"][0]["containerPort"],
+        ),
+    )
+
+    # The replacement tasks only run on the capacity providers of the service when the AppSpec names them
+    if service.get("capacityProviderStrategy"):
+        properties["CapacityProviderStrategy"] = [
+            {key[0].upper() + key[1:]: value for key, value in strategy.items()}
+            for strategy in service["capacityProviderStrategy"]
+        ]
+
+    return dict(version=0.0, Resources=[dict(TargetService=dict(Type="AWS::ECS::Service", Properties=properties))])
+
+
+def wait_for_deployment(client: object, deployment_id: str) -> Dict:
+    status = None
+    while True:
+        deployment = client.get_deployment(deploymentId=deployment_id)["deploymentInfo"]
+        if deployment["status"] != status:
+            status = deployment["status"]
+            print(f"Deployment {deployment_id} is {status}")
+        if status in FINAL_STATUSES:
+            return deployment
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def deploy(stack_name: str, image: str, wait: bool = True, dry_run: bool = False) -> int:
+    import boto3
+
+    outputs = stack_outputs(stack_name)
+    ecs = boto3.client("ecs")
+    codedeploy = boto3.client("codedeploy")
+
+    container_name = outputs["BackendContainerName"]
+    current = ecs.describe_task_definition(taskDefinition=outputs["BackendTaskFamily"])["taskDefinition"]
+    service = ecs.describe_services(
+        cluster=outputs["BackendClusterName"],
+        services=[outputs["BackendServiceName"]],
+    )["services"][0]
+
+    revision = revised_task_definition(current, container_name, image)
+    if dry_run:
+        print(json.dumps(revision, indent=2, default=str))
+        print(json.dumps(app_spec({**current, **revision}, container_name, service), indent=2))
+        return 0
+
+    registered = ecs.register_task_definition(**revision)["taskDefinition"]
+    print(f"Registered {registered['taskDefinitionArn']}")
+
+    deployment_id = codedeploy.create_deployment(
+        applicationName=outputs["BackendDeploymentApplication"],
+        deploymentGroupName=outputs["BackendDeploymentGroup"],
+        description=f"Deploy {image}",
+        revision=dict(
+            revisionType="AppSpecContent",
+            appSpecContent=dict(content=json.dumps(app_spec(registered, container_name, service))),
+        ),
+    )["deploymentId"]
+    print(f"Started deployment {deployment_id}")
+
+    if not wait:
+        return 0
+
+    deployment = wait_for_deployment(codedeploy, deployment_id)
+    if deployment["status"] != "Succeeded":
+        print(deployment.get("errorInformation", {}).get("message", "Deployment did not succeed"), file=sys.stderr)
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Release a backend image through blue/green deployment")
+    parser.add_argument("stack", help="name of the backend stack, e.g. ProductionBackend")
+    parser.add_argument("image", help="image to release, preferably pinned by digest")
+    parser.add_argument("--no-wait", action="store_true", help="return once the deployment has started")
+    parser.add_argument("--dry-run", action="store_true", help="print the task definition and AppSpec only")
+    args = parser.parse_args(argv)
+
+    try:
+        return deploy(args.stack, args.image, wait=not args.no_wait, dry_run=args.dry_run)
+    except (KeyError, ValueError) as error:
+        print(f"Cannot deploy {args.stack}: {error}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+Recommends task size, task count and scaling targets for a backend stack from the results of a load test.
+
+    python -m project.tooling.capacity_advisor load-test-results.json --p99-slo-ms 250 \\
+        --baseline-rps 40 --peak-rps 300
+
+The capacity of a task is the throughput of the busiest stage that still met the latency objective, divided by
+the number of tasks that served it. Task counts and the request count target keep `headroom` of that capacity
+in reserve, for the time it takes to scale out. A larger task size is only recommended when the peak would
+otherwise need more than `max_tasks` tasks, assuming throughput grows linearly with cpu.
+"""
+import argparse
+import json
+import math
+import sys
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from project.tooling.load_test import DEFAULT_RESULTS_FILE
+
+DEFAULT_RECOMMENDATION_FILE = Path("capacity-recommendation.json")
+
+
+@dataclass(frozen=True)
+class CapacityRecommendation:
+    cpu: int
+    memory_limit_mib: int
+    min_capacity: int
+    max_capacity: int
+    requests_per_target: int
+    cpu_target_percent: Optional[int]
+    task_capacity_rps: float
+    knee_found: bool
+    notes: List[str]
+
+
+def sustainable_stage(results: dict, p99_slo_ms: float, max_error_rate: float) -> Optional[dict]:
+    """
+    Returns the stage with the highest throughput that met the latency objective and error budget.
+    """
+    passing = [
+        stage for stage in results["stages"]
+        if stage["latency_ms"]["p99"] <= p99_slo_ms and stage["error_rate"] <= max_error_rate
+    ]
+    return max(passing, key=lambda stage: stage["throughput_rps"], default=None)
+
+
+def fargate_memory_options() -> Dict[int, Tuple[int, ...]]:
+    # Imported when needed, as loading the profiles starts the CDK
+    from project.application.base.profiles import FARGATE_MEMORY_MIB
+
+    return FARGATE_MEMORY_MIB
+
+
+def memory_for(cpu: int, memory_per_cpu: float) -> int:
+    wanted = cpu * memory_per_cpu
+    options = fargate_memory_options()[cpu]
+    return next((memory for memory in options if memory >= wanted), options[-1])
+
+
+def recommend(
+        results: dict,
+        p99_slo_ms: float,
+        max_error_rate: float,
+        baseline_rps: float,
+        peak_rps: float,
+        headroom: float = 0.7,
+        min_tasks: int = 2,
+        max_tasks: int = 10,
+        cpu_at_knee: Optional[float] = None,
+) -> CapacityRecommendation:
+    target = results["target"]
+    if not target.get("cpu") or not target.get("memory_limit_mib"):
+        raise ValueError("The results do not record the task size under test, run the load test with --cpu and "
+                         "--memory")
+    if target["cpu"] not in fargate_memory_options():
+        raise ValueError(f"The task size under test has {target['cpu']} cpu units, Fargate tasks have one of "
+                         f"{sorted(fargate_memory_options())}")
+
+    stage = sustainable_stage(results, p99_slo_ms, max_error_rate)
+    if stage is None:
+        raise ValueError(f"No stage met a p99 of {p99_slo_ms}ms with at most {max_error_rate:.2%} errors, "
+                         f"test with less concurrency or a larger task")
+    if stage["throughput_rps"] <= 0:
+        raise ValueError(f"The stage at concurrency {stage['concurrency']} met the objective without serving "
+                         f"any requests, check the url and requests of the load test")
+
+    notes = []
+    knee_found = stage is not results["stages"][-1]
+    if not knee_found:
+        notes.append("The last stage still met the objective, so the task capacity is a lower bound")
+
+    cpu, memory_per_cpu = target["cpu"], target["memory_limit_mib"] / target["cpu"]
+    task_capacity = stage["throughput_rps"] / target.get("tasks", 1)
+    usable = task_capacity * headroom
+
+    while math.ceil(peak_rps / usable) > max_tasks and cpu * 2 in fargate_memory_options():
+        cpu, usable, task_capacity = cpu * 2, usable * 2, task_capacity * 2
+    if cpu != target["cpu"]:
+        notes.append(f"Enlarged the task to {cpu} cpu units to serve the peak with at most {max_tasks} tasks, "
+                     f"load test this size to confirm its capacity")
+
+    min_capacity = max(min_tasks, math.ceil(baseline_rps / usable))
+    max_capacity = max(min_capacity, math.ceil(peak_rps / usable))
+    if max_capacity > max_tasks:
+        notes.append(f"The peak needs {max_capacity} tasks even at the largest task size")
+
+    return CapacityRecommendation(
+        cpu=cpu,
+        memory_limit_mib=memory_for(cpu, memory_per_cpu),
+        min_capacity=min_capacity,
+        max_capacity=max_capacity,
+        # Target tracking on request count works with requests per target per minute
+        requests_per_target=max(1, math.floor(usable * 60)),
+        cpu_target_percent=max(20, min(90, round(cpu_at_knee * headroom))) if cpu_at_knee else None,
+        task_capacity_rps=task_capacity,
+        knee_found=knee_found,
+        notes=notes,
+    )
+
+
+def profile_source(recommendation: CapacityRecommendation) -> str:
+    """
+    Returns the recommendation as the profile constants of a backend stack.
+    """
+    cpu_target = (
+        f"    cpu_target_percent={recommendation.cpu_target_percent},\n"
+        if recommendation.cpu_target_percent is not None else ""
+    )
+    return (
+        f"SCALING = ScalingProfile(\n"
+        f"    min_capacity={recommendation.min_capacity},\n"
+        f"    max_capacity={recommendation.max_capacity},\n"
+        f"{cpu_target}"
+        f"    requests_per_target={recommendation.requests_per_target},\n"
+        f")\n"
+        f"\n"
+        f"COMPUTE = ComputeProfile(\n"
+        f"    cpu={recommendation.cpu},\n"
+        f"    memory_limit_mib={recommendation.memory_limit_mib},\n"
+        f"    cpu_architecture=ecs.CpuArchitecture.ARM64,\n"
+        f")\n"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Recommend backend capacity from load test results")
+    parser.add_argument("results", type=Path, nargs="?", default=DEFAULT_RESULTS_FILE, help="load test results")
+    parser.add_argument("--p99-slo-ms", type=float, required=True, help="highest acceptable p99 latency")
+    parser.add_argument("--max-error-rate", type=float, default=0.001, help="highest acceptable error rate")
+    parser.add_argument("--baseline-rps", type=float, required=True, help="requests per second off-peak")
+    parser.add_argument("--peak-rps", type=float, required=True, help="requests per second at peak")
+    parser.add_argument("--headroom", type=float, default=0.7, help="share of task capacity to plan for")
+    parser.add_argument("--min-tasks", type=int, default=2, help="lowest task count, for availability")
+    parser.add_argument("--max-tasks", type=int, default=10, help="task count above which tasks are enlarged")
+    parser.add_argument("--cpu-at-knee", type=float,
+                        help="average cpu percentage of the tasks during the sustainable stage, from CloudWatch")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_RECOMMENDATION_FILE, help="output file")
+    args = parser.parse_args(argv)
+
+    try:
+        recommendation = recommend(
+            json.loads(args.results.read_text()),
+            p99_slo_ms=args.p99_slo_ms,
+            max_error_rate=args.max_error_rate,
+            baseline_rps=args.baseline_rps,
+            peak_rps=args.peak_rps,
+            headroom=args.headroom,
+            min_tasks=args.min_tasks,
+            max_tasks=args.max_tasks,
+            cpu_at_knee=args.cpu_at_knee,
+        )
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    args.output.write_text(json.dumps(asdict(recommendation), indent=2))
+    print(f"A task serves {recommendation.task_capacity_rps:.1f} rps within the objective")
+    for note in recommendation.notes:
+        print(f"Note: {note}")
+    print()
+    print(profile_source(recommendation))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""
+Context of the app as the CDK toolkit would pass it: the feature flags of cdk.json, overlaid with the cached
+lookups of cdk.context.json. Tools that build the app without the toolkit use this to synthesize offline.
+Tools whose assemblies are never deployed add placeholder backend images, which deployments pass themselves.
+"""
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional
+
+from app_config import BACKEND_REGIONS
+from project.stack_registry import PLACEHOLDER_IMAGE, image_context_key
+
+ROOT = Path(__file__).resolve().parents[2]
+
+CDK_JSON = ROOT / "cdk.json"
+CDK_CONTEXT_JSON = ROOT / "cdk.context.json"
+
+# The toolkit leaves construct stack traces out of the metadata unless it runs with --debug
+TOOLKIT_CONTEXT = {"aws:cdk:disable-stack-trace": True}
+
+# Set by the toolkit when it runs the app; context too large for the environment is passed in a file instead
+CONTEXT_ENVIRONMENT_VARIABLE = "CDK_CONTEXT_JSON"
+CONTEXT_OVERFLOW_ENVIRONMENT_VARIABLE = "CONTEXT_OVERFLOW_LOCATION_ENV"
+
+
+def load_context() -> Dict[str, object]:
+    context = {**TOOLKIT_CONTEXT, **json.loads(CDK_JSON.read_text()).get("context", {})}
+    if CDK_CONTEXT_JSON.is_file():
+        context.update(json.loads(CDK_CONTEXT_JSON.read_text()))
+    return context
+
+
+def toolkit_context() -> Optional[Dict[str, object]]:
+    """
+    Returns the context the toolkit passed to this process, or None when it does not run under the toolkit.
+    """
+    if os.environ.get(CONTEXT_OVERFLOW_ENVIRONMENT_VARIABLE):
+        return json.loads(Path(os.environ[CONTEXT_OVERFLOW_ENVIRONMENT_VARIABLE]).read_text())
+    if os.environ.get(CONTEXT_ENVIRONMENT_VARIABLE):
+        return json.loads(os.environ[CONTEXT_ENVIRONMENT_VARIABLE])
+    return None
+
+
+def placeholder_images() -> Dict[str, str]:
+    return {image_context_key(cluster_name): PLACEHOLDER_IMAGE for cluster_name in BACKEND_REGIONS}
+
+
+def cached_account(context: Dict[str, object]) -> Optional[str]:
+    for key in context:
+        match = re.search(r":account=(\d{12})(:|$)", key)
+        if match:
+            return match.group(1)
+    return None
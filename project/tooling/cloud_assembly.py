@@ -0,0 +1,168 @@
+"""
+Splits a cloud assembly into the parts that belong to each stack, and adds such parts to another assembly. As
+the stacks of the app do not reference each other, an assembly combined from stacks that were synthesized
+separately is identical to an assembly of the stacks synthesized together.
+"""
+import filecmp
+import json
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+MANIFEST_FILE = "manifest.json"
+TREE_FILE = "tree.json"
+
+ASSET_MANIFEST_TYPE = "cdk:asset-manifest"
+STACK_TYPE = "aws:cloudformation:stack"
+
+
+@dataclass
+class StackArtifacts:
+    stack_id: str
+    # Manifest entries of the stack and its asset manifest, in manifest order
+    artifacts: Dict[str, dict]
+    tree: Optional[dict]
+    # Files and directories of the stack, relative to the assembly directory
+    files: List[str]
+
+    def to_json(self) -> dict:
+        return self.__dict__
+
+    @classmethod
+    def from_json(cls, value: dict) -> "StackArtifacts":
+        return cls(**value)
+
+
+def read_json(path: Path) -> dict:
+    return json.loads(path.read_text())
+
+
+def write_json(path: Path, value: dict) -> None:
+    # Formatted like the CDK writes its files, so a rewritten file is identical to a synthesized one
+    path.write_text(json.dumps(value, indent=2, ensure_ascii=False))
+
+
+def asset_sources(asset_manifest: dict) -> List[str]:
+    return [
+        *(asset["source"]["path"] for asset in asset_manifest.get("files", {}).values()),
+        *(asset["source"]["directory"] for asset in asset_manifest.get("dockerImages", {}).values()
+          if "directory" in asset["source"]),
+    ]
+
+
+def extract_stack(directory: Path, stack_id: str) -> StackArtifacts:
+    manifest = read_json(directory / MANIFEST_FILE)
+    stack = manifest["artifacts"][stack_id]
+    dependencies = set(stack.get("dependencies", []))
+
+    artifacts = {
+        artifact_id: artifact
+        for artifact_id, artifact in manifest["artifacts"].items()
+        if artifact_id == stack_id or (artifact_id in dependencies and artifact["type"] == ASSET_MANIFEST_TYPE)
+    }
+
+    files = [stack["properties"]["templateFile"]]
+    for artifact in artifacts.values():
+        if artifact["type"] == ASSET_MANIFEST_TYPE:
+            asset_manifest_file = artifact["properties"]["file"]
+            files.append(asset_manifest_file)
+            files.extend(asset_sources(read_json(directory / asset_manifest_file)))
+
+    tree_file = directory / TREE_FILE
+    tree = read_json(tree_file)["tree"]["children"].get(stack_id) if tree_file.is_file() else None
+
+    return StackArtifacts(stack_id, artifacts, tree, list(dict.fromkeys(files)))
+
+
+def copy_files(stack: StackArtifacts, source: Path, target: Path) -> None:
+    for file in stack.files:
+        if (source / file).is_dir():
+            shutil.copytree(source / file, target / file, dirs_exist_ok=True)
+        else:
+            shutil.copy2(source / file, target / file)
+
+
+def ordered(entries: Dict[str, dict], groups: Iterable[Dict[str, dict]]) -> Dict[str, dict]:
+    result = {}
+    for group in groups:
+        result.update(group)
+    result.update((key, value) for key, value in entries.items() if key not in result)
+    return result
+
+
+'''
+Stacks are added to the manifest and tree in the given order, which must be the order in which the app creates
+them. Entries that do not belong to a stack, like the tree artifact, stay behind the stacks.
+'''
+
+
+def add_stacks(directory: Path, stacks: Dict[str, StackArtifacts], order: List[str]) -> None:
+    manifest = read_json(directory / MANIFEST_FILE)
+    present = {
+        stack_id: extract_stack(directory, stack_id)
+        for stack_id in order
+        if stack_id not in stacks and stack_id in manifest["artifacts"]
+    }
+    combined = {**present, **stacks}
+
+    manifest["artifacts"] = ordered(
+        manifest["artifacts"],
+        (combined[stack_id].artifacts for stack_id in order if stack_id in combined),
+    )
+    write_json(directory / MANIFEST_FILE, manifest)
+
+    tree_file = directory / TREE_FILE
+    if tree_file.is_file():
+        tree = read_json(tree_file)
+        tree["tree"]["children"] = ordered(
+            tree["tree"]["children"],
+            ({stack_id: combined[stack_id].tree} for stack_id in order
+             if stack_id in combined and combined[stack_id].tree is not None),
+        )
+        write_json(tree_file, tree)
+
+
+def compare_assemblies(expected: Path, actual: Path) -> List[str]:
+    """
+    Returns the paths of the files that differ between two assemblies, or that only one of them contains.
+    """
+    expected_files = {p.relative_to(expected).as_posix() for p in expected.rglob("*") if p.is_file()}
+    actual_files = {p.relative_to(actual).as_posix() for p in actual.rglob("*") if p.is_file()}
+
+    return sorted(
+        path
+        for path in expected_files | actual_files
+        if path not in expected_files
+        or path not in actual_files
+        or not filecmp.cmp(expected / path, actual / path, shallow=False)
+    )
+
+
+def merge_assemblies(sources: List[Path], target: Path, order: List[str]) -> None:
+    """
+    Combines assemblies of disjoint sets of stacks into one. The sources must hold consecutive runs of the stacks
+    in the given order, so missing context lookups are listed in the order a single synth would list them.
+    """
+    shutil.rmtree(target, ignore_errors=True)
+    shutil.copytree(sources[0], target)
+
+    manifest = read_json(target / MANIFEST_FILE)
+    missing = {entry["key"]: entry for entry in manifest.get("missing", [])}
+    stacks = {}
+
+    for source in sources[1:]:
+        source_manifest = read_json(source / MANIFEST_FILE)
+        for entry in source_manifest.get("missing", []):
+            missing.setdefault(entry["key"], entry)
+
+        for stack_id, artifact in source_manifest["artifacts"].items():
+            if artifact["type"] == STACK_TYPE:
+                stacks[stack_id] = extract_stack(source, stack_id)
+                copy_files(stacks[stack_id], source, target)
+
+    if missing:
+        manifest["missing"] = list(missing.values())
+        write_json(target / MANIFEST_FILE, manifest)
+
+    add_stacks(target, stacks, order)
@@ -0,0 +1,346 @@
+"""
+Prefetches the context lookups of the app, so synth runs offline. The selected stacks are synthesized without
+cached lookups to find every lookup they need; lookups that are not cached, or whose entry expired, are then
+resolved in one pass, grouped per provider, account and region. The values are stored in cdk.context.json,
+with the time they were fetched and until when they are trusted.
+
+    python -m project.tooling.context_prefetch                   # fetch missing and expired lookups
+    python -m project.tooling.context_prefetch -s 'Production*'  # only the lookups of the selected stacks
+    python -m project.tooling.context_prefetch --refresh         # fetch all lookups again
+    python -m project.tooling.context_prefetch --check           # report missing and expired lookups only
+
+The app refuses to synthesize when a lookup it needs is missing or expired, instead of leaving the lookup to the
+toolkit; pass `-c context-lookups=online` to let the toolkit look it up. `--stand-in` answers lookups from a
+file in the format of cdk.context.json instead of from AWS.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Protocol, Set, Tuple
+
+from project.stack_registry import SELECTION_ENVIRONMENT_VARIABLE, StackEntry, select_stacks
+from project.tooling.cdk_context import CDK_CONTEXT_JSON, CDK_JSON, cached_account, placeholder_images
+from project.tooling.cloud_assembly import MANIFEST_FILE, read_json
+
+LOOKUP_CONTEXT_KEY = "context-lookups"
+LOOKUP_ENVIRONMENT_VARIABLE = "CDK_CONTEXT_LOOKUPS"
+OFFLINE = "offline"
+ONLINE = "online"
+
+# Kept in cdk.context.json next to the entries it describes, so both are committed and reset together
+METADATA_CONTEXT_KEY = "context-prefetch"
+
+# Hosted zones and availability zones of an account practically never change
+PROVIDER_TTLS = {
+    "hosted-zone": timedelta(days=30),
+    "availability-zones": timedelta(days=30),
+}
+DEFAULT_TTL = timedelta(days=7)
+
+LOOKUP_KEY = re.compile(r"^[a-z][a-z0-9-]*:account=")
+
+# Lookups that depend on the values of other lookups only show up once those are resolved
+MAX_ROUNDS = 5
+
+
+@dataclass(frozen=True)
+class Lookup:
+    key: str
+    provider: str
+    props: Dict[str, object] = field(hash=False, compare=False)
+
+    @property
+    def environment(self) -> Tuple[str, str]:
+        return str(self.props.get("account")), str(self.props.get("region"))
+
+
+@dataclass
+class PrefetchResult:
+    fetched: List[str] = field(default_factory=list)
+    cached: List[str] = field(default_factory=list)
+
+
+class LookupProvider(Protocol):
+
+    def resolve(self, lookups: List[Lookup]) -> Dict[str, object]:
+        ...
+
+
+class StandInProvider:
+    """
+    Answers lookups from a mapping of context keys to values, such as the entries of a cdk.context.json.
+    """
+
+    def __init__(self, values: Dict[str, object]) -> None:
+        self.values = values
+        self.requests: List[List[str]] = []
+
+    def resolve(self, lookups: List[Lookup]) -> Dict[str, object]:
+        self.requests.append([lookup.key for lookup in lookups])
+        unknown = [lookup.key for lookup in lookups if lookup.key not in self.values]
+        if unknown:
+            raise ValueError(f"The stand-in has no value for {', '.join(unknown)}")
+        return {lookup.key: self.values[lookup.key] for lookup in lookups}
+
+
+class AwsProvider:
+    """
+    Resolves lookups with the credentials of the environment, the way the toolkit's context providers do. All
+    lookups of one provider, account and region are answered by the same calls, and groups run concurrently.
+    """
+
+    def __init__(self, max_workers: int = 8) -> None:
+        self.max_workers = max_workers
+
+    def resolve(self, lookups: List[Lookup]) -> Dict[str, object]:
+        groups: Dict[Tuple[str, str, str], List[Lookup]] = defaultdict(list)
+        for lookup in lookups:
+            groups[(lookup.provider, *lookup.environment)].append(lookup)
+
+        values = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for group_values in pool.map(self.resolve_group, groups.values()):
+                values.update(group_values)
+        return values
+
+    def resolve_group(self, lookups: List[Lookup]) -> Dict[str, object]:
+        provider = lookups[0].provider
+        if provider == "availability-zones":
+            return self.availability_zones(lookups)
+        if provider == "hosted-zone":
+            return self.hosted_zones(lookups)
+        raise ValueError(f"Context provider {provider} is not supported by the prefetch, "
+                         f"synthesize with -c {LOOKUP_CONTEXT_KEY}={ONLINE} to let the toolkit look it up")
+
+    @staticmethod
+    def availability_zones(lookups: List[Lookup]) -> Dict[str, object]:
+        import boto3
+
+        region = lookups[0].environment[1]
+        zones = boto3.client("ec2", region_name=region).describe_availability_zones()["AvailabilityZones"]
+        names = [zone["ZoneName"] for zone in zones if zone["State"] == "available"]
+        return {lookup.key: names for lookup in lookups}
+
+    @staticmethod
+    def hosted_zones(lookups: List[Lookup]) -> Dict[str, object]:
+        import boto3
+
+        zones = []
+        for page in boto3.client("route53").get_paginator("list_hosted_zones").paginate():
+            zones.extend(page["HostedZones"])
+
+        values = {}
+        for lookup in lookups:
+            if lookup.props.get("vpcId"):
+                raise ValueError(f"Hosted zone lookups by vpc are not supported by the prefetch: {lookup.key}")
+
+            name = str(lookup.props["domainName"]).rstrip(".") + "."
+            private = bool(lookup.props.get("privateZone", False))
+            matches = [zone for zone in zones if zone["Name"] == name and zone["Config"]["PrivateZone"] == private]
+            if len(matches) != 1:
+                raise ValueError(f"Found {len(matches)} hosted zones named {name}, expected exactly one")
+
+            values[lookup.key] = {"Id": matches[0]["Id"], "Name": matches[0]["Name"]}
+        return values
+
+
+def lookup_mode(setting: Optional[str]) -> str:
+    mode = setting or OFFLINE
+    if mode not in (OFFLINE, ONLINE):
+        raise ValueError(f"{LOOKUP_CONTEXT_KEY} must be {OFFLINE} or {ONLINE}, got {mode}")
+    return mode
+
+
+def key_properties(key: str) -> Dict[str, str]:
+    return dict(part.split("=", 1) for part in key.split(":")[1:] if "=" in part)
+
+
+def read_context_file(path: Path) -> Dict[str, object]:
+    return json.loads(path.read_text()) if path.is_file() else {}
+
+
+def write_context_file(path: Path, context: Dict[str, object]) -> None:
+    path.write_text(json.dumps(context, indent=2) + "\n")
+
+
+def timestamp(moment: datetime) -> str:
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_timestamp(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+def is_expired(key: str, context: Dict[str, object], now: datetime) -> bool:
+    entry = context.get(METADATA_CONTEXT_KEY, {}).get(key)
+    return entry is not None and parse_timestamp(entry["expires_at"]) <= now
+
+
+def missing_lookups(assembly_dir: Path) -> List[Lookup]:
+    return [
+        Lookup(missing["key"], missing["provider"], missing["props"])
+        for missing in read_json(assembly_dir / MANIFEST_FILE).get("missing", [])
+    ]
+
+
+'''
+A synth can only report the lookups whose entries are missing, as the CDK does not record which entries it read.
+Expired entries are therefore found by environment: every lookup entry of an account and region of the
+synthesized stacks is checked. Entries without metadata, such as those the toolkit cached, never expire.
+'''
+
+
+def offline_problems(
+        missing: Iterable[Lookup],
+        context: Dict[str, object],
+        environments: Set[Tuple[str, str]],
+        now: datetime,
+) -> List[str]:
+    problems = [f"missing {lookup.key}" for lookup in missing]
+
+    metadata = context.get(METADATA_CONTEXT_KEY, {})
+    for key in sorted(key for key in context if LOOKUP_KEY.match(key)):
+        properties = key_properties(key)
+        if (properties.get("account"), properties.get("region")) in environments and is_expired(key, context, now):
+            problems.append(f"expired {key} at {metadata[key]['expires_at']}")
+
+    return problems
+
+
+def problem_report(problems: List[str], selection: Optional[str]) -> str:
+    selection_argument = f" -s '{selection}'" if selection else ""
+    return "\n".join([
+        "Context lookups are missing or expired, refresh them with",
+        f"    python -m project.tooling.context_prefetch{selection_argument}",
+        f"or synthesize with -c {LOOKUP_CONTEXT_KEY}={ONLINE} to let the toolkit look them up:",
+        *[f"  {problem}" for problem in problems],
+    ])
+
+
+def required_lookups(entries: List[StackEntry], account: str, context: Dict[str, object]) -> List[Lookup]:
+    """
+    Synthesizes the stacks with the given context and returns the lookups that were missing from it. The images
+    of the backends do not affect their lookups, so placeholders are used unless the context names them.
+    """
+    import aws_cdk as cdk
+
+    with tempfile.TemporaryDirectory() as outdir:
+        app = cdk.App(context={**placeholder_images(), **context}, outdir=outdir)
+        for entry in entries:
+            entry.create(app, account)
+        return missing_lookups(Path(app.synth().directory))
+
+
+def feature_flags() -> Dict[str, object]:
+    return dict(json.loads(CDK_JSON.read_text()).get("context", {}))
+
+
+def prefetch(
+        entries: List[StackEntry],
+        account: str,
+        provider: LookupProvider,
+        context_file: Path = CDK_CONTEXT_JSON,
+        now: Optional[datetime] = None,
+        refresh: bool = False,
+) -> PrefetchResult:
+    now = now or datetime.now(timezone.utc)
+    cached = read_context_file(context_file)
+    metadata = dict(cached.get(METADATA_CONTEXT_KEY, {}))
+    result = PrefetchResult()
+
+    resolved: Dict[str, object] = {}
+    for _ in range(MAX_ROUNDS):
+        lookups = [
+            lookup for lookup in required_lookups(entries, account, {**feature_flags(), **resolved})
+            if lookup.key not in resolved
+        ]
+        if not lookups:
+            break
+
+        due = [
+            lookup for lookup in lookups
+            if refresh or lookup.key not in cached or is_expired(lookup.key, cached, now)
+        ]
+        fetched = provider.resolve(due) if due else {}
+
+        for lookup in lookups:
+            if lookup.key in fetched:
+                resolved[lookup.key] = cached[lookup.key] = fetched[lookup.key]
+                metadata[lookup.key] = dict(
+                    provider=lookup.provider,
+                    fetched_at=timestamp(now),
+                    expires_at=timestamp(now + PROVIDER_TTLS.get(lookup.provider, DEFAULT_TTL)),
+                )
+                result.fetched.append(lookup.key)
+            else:
+                resolved[lookup.key] = cached[lookup.key]
+                result.cached.append(lookup.key)
+    else:
+        raise ValueError(f"Lookups were still missing after {MAX_ROUNDS} rounds")
+
+    if result.fetched:
+        cached[METADATA_CONTEXT_KEY] = dict(sorted(metadata.items()))
+        write_context_file(context_file, cached)
+
+    return result
+
+
+def check(
+        entries: List[StackEntry],
+        account: str,
+        context_file: Path = CDK_CONTEXT_JSON,
+        now: Optional[datetime] = None,
+) -> List[str]:
+    context = read_context_file(context_file)
+    missing = required_lookups(entries, account, {**feature_flags(), **context})
+    environments = {(account, entry.region) for entry in entries}
+    return offline_problems(missing, context, environments, now or datetime.now(timezone.utc))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prefetch the context lookups of the app")
+    parser.add_argument("-s", "--stacks", default=os.environ.get(SELECTION_ENVIRONMENT_VARIABLE),
+                        help="comma separated stack names or glob patterns, defaults to all")
+    parser.add_argument("--account", default=os.environ.get("CDK_ACCOUNT"), help="account of the stacks")
+    parser.add_argument("--refresh", action="store_true", help="fetch all lookups, also those that did not expire")
+    parser.add_argument("--check", action="store_true", help="only report missing and expired lookups")
+    parser.add_argument("--stand-in", type=Path, help="answer lookups from this file instead of from AWS")
+    args = parser.parse_args(argv)
+
+    entries = select_stacks(args.stacks)
+    account = args.account or cached_account(read_context_file(CDK_CONTEXT_JSON))
+    if not account:
+        print("No account given, pass --account or set CDK_ACCOUNT", file=sys.stderr)
+        return 1
+
+    if args.check:
+        problems = check(entries, account)
+        if problems:
+            print(problem_report(problems, args.stacks), file=sys.stderr)
+            return 1
+        print("All context lookups are cached and current")
+        return 0
+
+    provider = StandInProvider(read_context_file(args.stand_in)) if args.stand_in else AwsProvider()
+    try:
+        result = prefetch(entries, account, provider, refresh=args.refresh)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+
+    print(f"Fetched {len(result.fetched)} lookups, {len(result.cached)} cached")
+    for key in result.fetched:
+        print(f"  {key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Publishes a frontend build to the bucket of a frontend stack. Only files whose content or metadata changed
+since the previous publish are uploaded, and only the changed paths that are not content hashed are
+invalidated on the distribution.
+
+    python -m project.tooling.frontend_publisher ProductionFrontend ./dist
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import mimetypes
+import re
+import sys
+import time
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Protocol
+
+from project.application.base.profiles import PUBLISHER_PREFIX, DistributionProfile
+
+MANIFEST_KEY = f"{PUBLISHER_PREFIX}manifest.json"
+
+# Above this many paths a single wildcard invalidation is cheaper than invalidating each path
+MAX_INVALIDATION_PATHS = 100
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    digest: str
+    content_type: str
+    cache_control: str
+
+
+@dataclass
+class PublishResult:
+    uploaded: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    invalidated: List[str] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class PreparedFile:
+    key: str
+    body: bytes
+    entry: ManifestEntry
+
+
+class ObjectStore(Protocol):
+
+    def read(self, key: str) -> Optional[bytes]:
+        ...
+
+    def write(self, key: str, body: bytes, entry: ManifestEntry) -> None:
+        ...
+
+
+class DirectoryObjectStore:
+    """
+    Stand-in for the bucket which stores objects as files, with their metadata in a sidecar file.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+
+    def read(self, key: str) -> Optional[bytes]:
+        path = self.root / key
+        return path.read_bytes() if path.is_file() else None
+
+    def write(self, key: str, body: bytes, entry: ManifestEntry) -> None:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        path.with_name(f"{path.name}.metadata.json").write_text(json.dumps(entry.__dict__, indent=2))
+
+
+class S3ObjectStore:
+
+    def __init__(self, bucket_name: str) -> None:
+        import boto3
+
+        self.bucket_name = bucket_name
+        self.client = boto3.client("s3")
+
+    def read(self, key: str) -> Optional[bytes]:
+        try:
+            return self.client.get_object(Bucket=self.bucket_name, Key=key)["Body"].read()
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def write(self, key: str, body: bytes, entry: ManifestEntry) -> None:
+        self.client.put_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=body,
+            ContentType=entry.content_type,
+            CacheControl=entry.cache_control,
+        )
+
+
+def cloudfront_invalidator(distribution_id: str) -> Callable[[List[str]], None]:
+    import boto3
+
+    client = boto3.client("cloudfront")
+
+    def invalidate(paths: List[str]) -> None:
+        client.create_invalidation(
+            DistributionId=distribution_id,
+            InvalidationBatch=dict(
+                Paths=dict(Quantity=len(paths), Items=paths),
+                CallerReference=str(time.time_ns()),
+            ),
+        )
+
+    return invalidate
+
+
+class FrontendPublisher:
+
+    def __init__(self, store: ObjectStore, distribution: DistributionProfile) -> None:
+        self.store = store
+        self.distribution = distribution
+        self.static_prefixes = tuple(path.lstrip("/").rstrip("*") for path in distribution.static_asset_paths)
+
+    def is_immutable(self, key: str) -> bool:
+        return key.startswith(self.static_prefixes)
+
+    def cache_control(self, key: str) -> str:
+        if self.is_immutable(key):
+            return f"public, max-age={int(self.distribution.static_asset_ttl.to_seconds())}, immutable"
+        return "no-cache"
+
+    def prepare(self, build_dir: Path) -> Dict[str, PreparedFile]:
+        prepared = {}
+
+        for path in sorted(p for p in build_dir.rglob("*") if p.is_file()):
+            key = path.relative_to(build_dir).as_posix()
+            if key.startswith(PUBLISHER_PREFIX):
+                continue
+
+            body = path.read_bytes()
+            prepared[key] = PreparedFile(key, body, ManifestEntry(
+                digest=hashlib.sha256(body).hexdigest(),
+                content_type=mimetypes.guess_type(key)[0] or "application/octet-stream",
+                cache_control=self.cache_control(key),
+            ))
+
+        return prepared
+
+    def previous_manifest(self) -> Dict[str, ManifestEntry]:
+        raw = self.store.read(MANIFEST_KEY)
+        if raw is None:
+            return {}
+        # Entries of earlier publishers may hold fields the manifest no longer records
+        names = {f.name for f in fields(ManifestEntry)}
+        return {
+            key: ManifestEntry(**{name: value for name, value in entry.items() if name in names})
+            for key, entry in json.loads(raw).items()
+        }
+
+    def invalidation_paths(self, keys: List[str]) -> List[str]:
+        paths = set()
+        for key in keys:
+            if self.is_immutable(key):
+                continue
+            paths.add(f"/{key}")
+            if key == "index.html" or key.endswith("/index.html"):
+                paths.add(f"/{key[:-len('index.html')]}")
+
+        return ["/*"] if len(paths) > MAX_INVALIDATION_PATHS else sorted(paths)
+
+    def publish(
+            self,
+            build_dir: Path,
+            invalidate: Optional[Callable[[List[str]], None]] = None,
+    ) -> PublishResult:
+        result = PublishResult()
+        previous = self.previous_manifest()
+        prepared = self.prepare(build_dir)
+
+        # Immutable assets go first, so a new index.html never references an asset that is not uploaded yet
+        for file in sorted(prepared.values(), key=lambda f: (not self.is_immutable(f.key), f.key)):
+            if previous.get(file.key) == file.entry:
+                result.unchanged.append(file.key)
+                continue
+            self.store.write(file.key, file.body, file.entry)
+            result.uploaded.append(file.key)
+
+        # Files removed from the build are kept, as cached pages may still reference them
+        manifest = {**previous, **{key: file.entry for key, file in prepared.items()}}
+        self.store.write(
+            MANIFEST_KEY,
+            json.dumps({key: entry.__dict__ for key, entry in sorted(manifest.items())}, indent=2).encode(),
+            ManifestEntry(digest="", content_type="application/json", cache_control="no-cache"),
+        )
+
+        result.invalidated = self.invalidation_paths(result.uploaded)
+        if invalidate and result.invalidated:
+            invalidate(result.invalidated)
+
+        return result
+
+
+def stack_outputs(stack_name: str) -> Dict[str, str]:
+    import boto3
+
+    stack = boto3.client("cloudformation").describe_stacks(StackName=stack_name)["Stacks"][0]
+    return {output["OutputKey"]: output["OutputValue"] for output in stack.get("Outputs", [])}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Publish a frontend build to a frontend stack")
+    parser.add_argument("stack", help="name of the frontend stack, e.g. ProductionFrontend")
+    parser.add_argument("build_dir", type=Path, help="directory containing the frontend build")
+    parser.add_argument("--target-dir", type=Path, help="publish to a local directory instead of the bucket")
+    args = parser.parse_args(argv)
+
+    module_name = re.sub(r"(?<!^)(?=[A-Z])", "_", args.stack).lower()
+    environment = importlib.import_module(f"project.application.{module_name}")
+
+    if args.target_dir:
+        store, invalidate = DirectoryObjectStore(args.target_dir), None
+    else:
+        outputs = stack_outputs(args.stack)
+        store = S3ObjectStore(outputs["FrontendBucketName"])
+        invalidate = cloudfront_invalidator(outputs["FrontendDistributionId"])
+
+    result = FrontendPublisher(store, environment.DISTRIBUTION).publish(args.build_dir, invalidate)
+
+    print(f"Uploaded {len(result.uploaded)} files, {len(result.unchanged)} unchanged")
+    print(f"Invalidated {', '.join(result.invalidated) or 'nothing'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+"""
+Load generator for the backend. A weighted mix of requests is sent by a growing number of concurrent clients,
+one stage per concurrency level, and the latency and throughput of every stage are written to a results file.
+The capacity advisor turns that file into task size, task count and scaling settings.
+
+    python -m project.tooling.load_test https://api.example.com --request health=GET:/actuator/health \\
+        --stages 4,8,16,32 --stage-duration 30 --tasks 1 --cpu 1024 --memory 2048
+
+Latencies are recorded in histograms with a bounded relative error, like HdrHistogram. Clients wait for each
+response before they send their next request, so latencies are those of a closed system at that concurrency.
+"""
+import argparse
+import asyncio
+import json
+import random
+import ssl
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_RESULTS_FILE = Path("load-test-results.json")
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+# Buckets of 2**11 sub-buckets keep the relative error of recorded values below 0.1%
+SUB_BUCKET_BITS = 11
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies in microseconds. Values are grouped in buckets whose width grows with the value, so
+    the histogram stays small while every percentile is accurate to the precision of SUB_BUCKET_BITS.
+    """
+
+    def __init__(self, buckets: Optional[Dict[int, int]] = None) -> None:
+        self.buckets: Dict[int, int] = dict(buckets or {})
+
+    @staticmethod
+    def bucket_of(value: int) -> Tuple[int, int]:
+        shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+        lowest = (value >> shift) << shift
+        return lowest, lowest + (1 << shift) - 1
+
+    def record(self, value: int) -> None:
+        lowest, _ = self.bucket_of(max(0, value))
+        self.buckets[lowest] = self.buckets.get(lowest, 0) + 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for lowest, count in other.buckets.items():
+            self.buckets[lowest] = self.buckets.get(lowest, 0) + count
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def percentile(self, percentile: float) -> int:
+        """
+        Returns the highest value that is equivalent to the value at the given percentile.
+        """
+        total = self.count
+        if not total:
+            return 0
+
+        rank, seen = max(1, round(total * percentile / 100)), 0
+        for lowest in sorted(self.buckets):
+            seen += self.buckets[lowest]
+            if seen >= rank:
+                return self.bucket_of(lowest)[1]
+        return self.bucket_of(max(self.buckets))[1]
+
+    def mean(self) -> float:
+        total = self.count
+        return sum(lowest * count for lowest, count in self.buckets.items()) / total if total else 0.0
+
+    def to_json(self) -> dict:
+        return {
+            "unit": "us",
+            "sub_bucket_bits": SUB_BUCKET_BITS,
+            "buckets": {str(lowest): count for lowest, count in sorted(self.buckets.items())},
+        }
+
+    @classmethod
+    def from_json(cls, value: dict) -> "LatencyHistogram":
+        return cls({int(lowest): count for lowest, count in value["buckets"].items()})
+
+
+@dataclass(frozen=True)
+class RequestSpec:
+    name: str
+    method: str
+    path: str
+    weight: int = 1
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: Optional[str] = None
+
+    @classmethod
+    def parse(cls, value: str) -> "RequestSpec":
+        """
+        Parses NAME=METHOD:PATH[:WEIGHT], e.g. "orders=GET:/api/orders:3".
+        """
+        name, _, spec = value.partition("=")
+        method, _, rest = spec.partition(":")
+        path, _, weight = rest.rpartition(":") if rest.rsplit(":", 1)[-1].isdigit() else (rest, "", "1")
+        if not (name and method and path.startswith("/")):
+            raise ValueError(f"Requests are given as NAME=METHOD:PATH[:WEIGHT], got {value}")
+        return cls(name, method.upper(), path, int(weight))
+
+
+@dataclass
+class RequestStats:
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+    def add(self, status: Optional[int], latency_us: int) -> None:
+        if status is None or status >= 500:
+            self.errors += 1
+        key = str(status) if status is not None else "failed"
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        self.latency.record(latency_us)
+
+    def to_json(self, seconds: float) -> dict:
+        count = self.latency.count
+        return {
+            "requests": count,
+            "errors": self.errors,
+            "error_rate": self.errors / count if count else 0.0,
+            "throughput_rps": count / seconds if seconds else 0.0,
+            "statuses": self.statuses,
+            "latency_ms": {
+                "mean": self.latency.mean() / 1000,
+                **{f"p{p:g}": self.latency.percentile(p) / 1000 for p in PERCENTILES},
+                "max": self.latency.percentile(100) / 1000,
+            },
+            "histogram": self.latency.to_json(),
+        }
+
+
+class HttpConnection:
+    """
+    Minimal HTTP/1.1 client connection that is kept alive between requests, so every request does not pay for
+    a new TCP and TLS handshake.
+    """
+
+    def __init__(self, url: str, timeout: float) -> None:
+        parts = urlsplit(url)
+        self.secure = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.secure else 80)
+        self.host_header = parts.netloc
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def close(self) -> None:
+        if self.writer:
+            self.writer.close()
+            self.reader, self.writer = None, None
+
+    async def request(self, spec: RequestSpec) -> int:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=ssl.create_default_context() if self.secure else None,
+            )
+
+        body = spec.body.encode() if spec.body is not None else b""
+        headers = {"Host": self.host_header, "Content-Length": str(len(body)), **spec.headers}
+        head = f"{spec.method} {self.base_path}{spec.path} HTTP/1.1\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        self.writer.write(head.encode() + b"\r\n" + body)
+        await self.writer.drain()
+
+        status, keep_alive = await asyncio.wait_for(self.read_response(spec.method), self.timeout)
+        if not keep_alive:
+            await self.close()
+        return status
+
+    async def read_response(self, method: str) -> Tuple[int, bool]:
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        version, status = status_line.decode().split(" ", 2)[:2]
+
+        headers = {}
+        while (line := await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if method == "HEAD" or status in ("204", "304"):
+            pass
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            while size := int((await self.reader.readline()).split(b";")[0], 16):
+                await self.reader.readexactly(size + 2)
+            while await self.reader.readline() not in (b"\r\n", b"\n", b""):
+                pass
+        elif "content-length" in headers:
+            await self.reader.readexactly(int(headers["content-length"]))
+        else:
+            await self.reader.read()
+            return int(status), False
+
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        return int(status), keep_alive
+
+
+async def run_client(
+        url: str,
+        mix: List[RequestSpec],
+        timeout: float,
+        measure_from: float,
+        stop_at: float,
+        stats: Dict[str, RequestStats],
+) -> None:
+    connection = HttpConnection(url, timeout)
+    weights = [spec.weight for spec in mix]
+
+    try:
+        while time.perf_counter() < stop_at:
+            spec = random.choices(mix, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = await connection.request(spec)
+            # A server that closes the connection mid-response fails the request; the next one reconnects
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+                status = None
+                await connection.close()
+
+            if started >= measure_from:
+                stats[spec.name].add(status, int((time.perf_counter() - started) * 1_000_000))
+    finally:
+        await connection.close()
+
+
+async def run_stage(url: str, mix: List[RequestSpec], concurrency: int, duration: float, warmup: float,
+                    timeout: float) -> dict:
+    stats = {spec.name: RequestStats() for spec in mix}
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    await asyncio.gather(*(
+        run_client(url, mix, timeout, measure_from, stop_at, stats)
+        for _ in range(concurrency)
+    ))
+
+    total = RequestStats()
+    for request_stats in stats.values():
+        total.latency.merge(request_stats.latency)
+        total.errors += request_stats.errors
+        for status, count in request_stats.statuses.items():
+            total.statuses[status] = total.statuses.get(status, 0) + count
+
+    return {
+        "concurrency": concurrency,
+        "duration_s": duration,
+        **total.to_json(duration),
+        "requests_by_name": {name: request_stats.to_json(duration) for name, request_stats in stats.items()},
+    }
+
+
+async def run_load_test(
+        url: str,
+        mix: List[RequestSpec],
+        stages: List[int],
+        duration: float,
+        warmup: float,
+        timeout: float,
+        target: Dict[str, object],
+) -> dict:
+    results = []
+    for concurrency in stages:
+        stage = await run_stage(url, mix, concurrency, duration, warmup, timeout)
+        print(
+            f"concurrency {concurrency}: {stage['throughput_rps']:.1f} rps, "
+            f"p50 {stage['latency_ms']['p50']:.1f}ms, p99 {stage['latency_ms']['p99']:.1f}ms, "
+            f"errors {stage['error_rate']:.2%}",
+            file=sys.stderr,
+        )
+        results.append(stage)
+
+    return {
+        "url": url,
+        "target": target,
+        # Headers are left out, as they may carry credentials
+        "mix": [dict(name=spec.name, method=spec.method, path=spec.path, weight=spec.weight) for spec in mix],
+        "stages": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure latency and throughput of the backend under load")
+    parser.add_argument("url", help="base url of the backend, e.g. https://api.example.com")
+    parser.add_argument("-r", "--request", action="append", default=[], type=RequestSpec.parse,
+                        help="request of the mix as NAME=METHOD:PATH[:WEIGHT], may be repeated")
+    parser.add_argument("--scenario", type=Path, help="json file with a list of requests, which may carry "
+                                                      "headers and a body")
+    parser.add_argument("--header", action="append", default=[], help="header for every request, NAME:VALUE")
+    parser.add_argument("--stages", default="1,2,4,8,16,32", help="comma separated concurrency per stage")
+    parser.add_argument("--stage-duration", type=float, default=30.0, help="measured seconds per stage")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds at the start of each stage")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds before a request counts as failed")
+    parser.add_argument("--tasks", type=int, default=1, help="number of tasks serving the load")
+    parser.add_argument("--cpu", type=int, help="cpu units of each task")
+    parser.add_argument("--memory", type=int, help="memory limit of each task in MiB")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_RESULTS_FILE, help="results file")
+    args = parser.parse_args(argv)
+
+    if args.cpu is not None:
+        from project.application.base.profiles import FARGATE_MEMORY_MIB
+
+        if args.cpu not in FARGATE_MEMORY_MIB:
+            parser.error(f"--cpu must be one of {sorted(FARGATE_MEMORY_MIB)}, got {args.cpu}")
+        if args.memory is not None and args.memory not in FARGATE_MEMORY_MIB[args.cpu]:
+            parser.error(f"--memory {args.memory} is not supported by Fargate for cpu {args.cpu}")
+
+    mix = list(args.request)
+    if args.scenario:
+        mix.extend(RequestSpec(**request) for request in json.loads(args.scenario.read_text()))
+    if not mix:
+        parser.error("at least one request is required, through --request or --scenario")
+
+    headers = {name.strip(): value.strip() for name, value in (header.split(":", 1) for header in args.header)}
+    mix = [RequestSpec(s.name, s.method, s.path, s.weight, {**headers, **s.headers}, s.body) for s in mix]
+
+    results = asyncio.run(run_load_test(
+        args.url,
+        mix,
+        stages=[int(stage) for stage in args.stages.split(",")],
+        duration=args.stage_duration,
+        warmup=args.warmup,
+        timeout=args.timeout,
+        target={"tasks": args.tasks, "cpu": args.cpu, "memory_limit_mib": args.memory},
+    ))
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Synthesizes the stacks of the app in parallel. The stacks are split into consecutive runs, each synthesized by a
+separate process with its own App and jsii runtime, and the resulting assemblies are merged into one. This works
+because the stacks share resources by ARN from app_config.py instead of through cross-stack references. Workers
+synthesize like app.py does, with the synth cache, import statistics and performance lint.
+
+    python -m project.tooling.parallel_synth -s '*Frontend'      # synthesize the frontends into cdk.out
+    python -m project.tooling.parallel_synth -j 4 --compare      # also synthesize with app.py, compare and report
+
+Backend stacks need their images, which are passed as context like to the toolkit:
+
+    python -m project.tooling.parallel_synth -c backend-image:Prd=1.4.2 -c backend-image:Acc=1.5.0
+
+It can be used as the app of the CDK toolkit as well, which passes the context and output directory:
+
+    cdk synth --app "python -m project.tooling.parallel_synth"
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from project.stack_registry import (
+    SELECTION_CONTEXT_KEY,
+    SELECTION_ENVIRONMENT_VARIABLE,
+    StackEntry,
+    select_stacks,
+)
+from project.tooling.cdk_context import (
+    CONTEXT_ENVIRONMENT_VARIABLE,
+    CONTEXT_OVERFLOW_ENVIRONMENT_VARIABLE,
+    ROOT,
+    cached_account,
+    load_context,
+    toolkit_context,
+)
+from project.tooling.cloud_assembly import compare_assemblies, merge_assemblies
+from project.tooling.context_prefetch import (
+    LOOKUP_CONTEXT_KEY,
+    LOOKUP_ENVIRONMENT_VARIABLE,
+    OFFLINE,
+    lookup_mode,
+    missing_lookups,
+    offline_problems,
+    problem_report,
+)
+from project.tooling.synth_cache import CACHE_CONTEXT_KEY, app_context
+
+# Set by the CDK toolkit when it runs the app
+OUTDIR_ENVIRONMENT_VARIABLE = "CDK_OUTDIR"
+
+DEFAULT_OUTDIR = ROOT / "cdk.out"
+
+
+def synthesize(names: List[str], outdir: str, account: Optional[str], context: Dict[str, object]) -> None:
+    # Runs in a worker, which imports the CDK and starts its own jsii runtime
+    import aws_cdk as cdk
+
+    from project.tooling.app_synth import synth_app
+
+    app = cdk.App(context=context, outdir=outdir)
+    synth_app(app, select_stacks(",".join(names)), account, app_context(context))
+
+
+def split(entries: List[StackEntry], workers: int) -> List[List[str]]:
+    size, remainder = divmod(len(entries), workers)
+    runs, start = [], 0
+    for index in range(min(workers, len(entries))):
+        end = start + size + (1 if index < remainder else 0)
+        runs.append([entry.name for entry in entries[start:end]])
+        start = end
+    return runs
+
+
+def synth_parallel(
+        entries: List[StackEntry],
+        outdir: Path,
+        workers: int,
+        account: Optional[str],
+        context: Dict[str, object],
+) -> float:
+    """
+    Synthesizes the stacks into the output directory with the given number of workers, and returns the seconds
+    it took.
+    """
+    started = time.perf_counter()
+    runs = split(entries, workers)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sources = [Path(tmp) / str(index) for index in range(len(runs))]
+
+        # Spawned rather than forked, as a forked worker would share the jsii runtime of its parent
+        with ProcessPoolExecutor(len(runs), mp_context=multiprocessing.get_context("spawn")) as executor:
+            for future in [
+                executor.submit(synthesize, run, str(source), account, context)
+                for run, source in zip(runs, sources)
+            ]:
+                future.result()
+
+        merge_assemblies(sources, outdir, [entry.name for entry in entries])
+
+    return time.perf_counter() - started
+
+
+def synth_with_app(
+        entries: List[StackEntry],
+        outdir: Path,
+        account: Optional[str],
+        context: Dict[str, object],
+) -> float:
+    """
+    Synthesizes the stacks with app.py in a single process and without the synth cache, the way the toolkit runs
+    it, and returns the seconds it took.
+    """
+    started = time.perf_counter()
+    context = {
+        **context,
+        SELECTION_CONTEXT_KEY: ",".join(entry.name for entry in entries),
+        CACHE_CONTEXT_KEY: "false",
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Passed in a file like the toolkit passes large contexts, which the environment may not hold
+        context_file = Path(tmp) / "context.json"
+        context_file.write_text(json.dumps(context))
+
+        environment = {key: value for key, value in os.environ.items() if key != CONTEXT_ENVIRONMENT_VARIABLE}
+        subprocess.run(
+            [sys.executable, "app.py"],
+            cwd=ROOT,
+            env={
+                **environment,
+                CONTEXT_OVERFLOW_ENVIRONMENT_VARIABLE: str(context_file),
+                OUTDIR_ENVIRONMENT_VARIABLE: str(outdir),
+                "CDK_ACCOUNT": account or "",
+            },
+            check=True,
+        )
+
+    return time.perf_counter() - started
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Synthesize the stacks of the app in parallel")
+    parser.add_argument("-s", "--stacks", default=os.environ.get(SELECTION_ENVIRONMENT_VARIABLE),
+                        help="comma separated stack names or glob patterns, defaults to all")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count() or 1, help="number of processes")
+    parser.add_argument("-o", "--outdir", type=Path,
+                        default=Path(os.environ.get(OUTDIR_ENVIRONMENT_VARIABLE) or DEFAULT_OUTDIR))
+    parser.add_argument("-c", "--context", action="append", default=[], metavar="KEY=VALUE",
+                        help="context value, as passed to the CDK toolkit")
+    parser.add_argument("--compare", action="store_true",
+                        help="also synthesize with app.py, report the speedup and compare the assemblies")
+    args = parser.parse_args(argv)
+
+    context = toolkit_context() or load_context()
+    for setting in args.context:
+        key, _, value = setting.partition("=")
+        context[key] = value
+
+    account = os.environ.get("CDK_ACCOUNT") or cached_account(context)
+    entries = select_stacks(args.stacks or context.get(SELECTION_CONTEXT_KEY))
+
+    parallel = synth_parallel(entries, args.outdir, args.workers, account, context)
+    print(f"Synthesized {len(entries)} stacks with {args.workers} workers in {parallel:.1f}s", file=sys.stderr)
+
+    lookup_setting = context.get(LOOKUP_CONTEXT_KEY) or os.environ.get(LOOKUP_ENVIRONMENT_VARIABLE)
+    if lookup_mode(lookup_setting) == OFFLINE:
+        problems = offline_problems(
+            missing_lookups(args.outdir),
+            app_context(context),
+            {(account, entry.region) for entry in entries},
+            datetime.now(timezone.utc),
+        )
+        if problems:
+            print(problem_report(problems, args.stacks), file=sys.stderr)
+            return 1
+
+    if not args.compare:
+        return 0
+
+    with tempfile.TemporaryDirectory() as app_outdir:
+        serial = synth_with_app(entries, Path(app_outdir), account, context)
+        differences = compare_assemblies(Path(app_outdir), args.outdir)
+
+    print(f"Synth with app.py took {serial:.1f}s, a speedup of {serial / parallel:.2f}x", file=sys.stderr)
+    for path in differences:
+        print(f"Differs from a synth with app.py: {path}", file=sys.stderr)
+
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
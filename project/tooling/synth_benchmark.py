@@ -0,0 +1,156 @@
+"""
+Measures the synthesis cost of every stack and compares it against the budgets in synth_budgets.json. Each
+stack is measured in a fresh interpreter, so import times are not hidden by modules another stack imported.
+
+    python -m project.tooling.synth_benchmark                       # measure all stacks, fail on budget overrun
+    python -m project.tooling.synth_benchmark -s 'Production*'      # measure a selection
+    python -m project.tooling.synth_benchmark --update-budgets      # write measurements plus headroom as budgets
+
+The benchmark runs offline against the lookups cached in cdk.context.json, with placeholder backend images.
+"""
+import argparse
+import importlib
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from project.tooling.cdk_context import ROOT, cached_account, load_context, placeholder_images
+
+BUDGETS_FILE = Path(__file__).with_name("synth_budgets.json")
+DEFAULT_RESULTS_FILE = ROOT / "synth-benchmark.json"
+
+# Budgets are written with headroom, as timings vary between machines and runs
+TIME_HEADROOM = 2.0
+SIZE_HEADROOM = 1.1
+
+TIME_METRICS = ("cdk_import_s", "stack_import_s", "construction_s", "synth_s")
+SIZE_METRICS = ("constructs", "resources", "template_bytes")
+
+
+'''
+The registry and the CDK are imported inside the measurement, as importing them at module level would hide the
+import time of the CDK.
+'''
+
+
+def measure(name: str, account: Optional[str]) -> Dict[str, float]:
+    started = time.perf_counter()
+    import aws_cdk as cdk
+    cdk_imported = time.perf_counter()
+    from project.stack_registry import select_stacks
+    entry, = select_stacks(name)
+    importlib.import_module(entry.module)
+    stack_imported = time.perf_counter()
+
+    with tempfile.TemporaryDirectory() as outdir:
+        app = cdk.App(context={**placeholder_images(), **load_context()}, outdir=outdir)
+        stack = entry.create(app, account)
+        constructed = time.perf_counter()
+        app.synth()
+        synthesized = time.perf_counter()
+
+        manifest = json.loads((Path(outdir) / "manifest.json").read_text())
+        if manifest.get("missing"):
+            keys = ", ".join(missing["key"] for missing in manifest["missing"])
+            raise RuntimeError(f"{entry.name} needs context that is not cached in cdk.context.json: {keys}")
+
+        template_file = Path(outdir) / f"{stack.artifact_id}.template.json"
+        template = json.loads(template_file.read_text())
+
+        return dict(
+            cdk_import_s=cdk_imported - started,
+            stack_import_s=stack_imported - cdk_imported,
+            construction_s=constructed - stack_imported,
+            synth_s=synthesized - constructed,
+            constructs=len(stack.node.find_all()),
+            resources=len(template.get("Resources", {})),
+            template_bytes=template_file.stat().st_size,
+        )
+
+
+def measure_in_subprocess(name: str, account: Optional[str]) -> Dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-m", "project.tooling.synth_benchmark", "--measure", name,
+         *(["--account", account] if account else [])],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Measuring {name} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def over_budget(name: str, measurement: Dict[str, float], budgets: Dict[str, Dict[str, float]]) -> List[str]:
+    budget = budgets.get(name)
+    if budget is None:
+        return [f"{name}: no budget, run with --update-budgets to add one"]
+
+    return [
+        f"{name}: {metric} is {round(measurement[metric], 3)}, budget {limit}"
+        for metric, limit in budget.items()
+        if measurement.get(metric, 0) > limit
+    ]
+
+
+def as_budget(measurement: Dict[str, float]) -> Dict[str, float]:
+    budget = {metric: round(max(measurement[metric] * TIME_HEADROOM, 0.1), 1) for metric in TIME_METRICS}
+    budget.update({metric: math.ceil(measurement[metric] * SIZE_HEADROOM) for metric in SIZE_METRICS})
+    return budget
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark stack synthesis against checked-in budgets")
+    parser.add_argument("-s", "--stacks", help="comma separated stack names or glob patterns, defaults to all")
+    parser.add_argument("-o", "--output", type=Path, default=DEFAULT_RESULTS_FILE, help="results file")
+    parser.add_argument("--account", default=os.environ.get("CDK_ACCOUNT"), help="account of the cached lookups")
+    parser.add_argument("--update-budgets", action="store_true", help="write the measurements as new budgets")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    account = args.account or cached_account(load_context())
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, account)))
+        return 0
+
+    from project.stack_registry import select_stacks
+
+    results = {}
+    for entry in select_stacks(args.stacks):
+        results[entry.name] = measure_in_subprocess(entry.name, account)
+        print(f"{entry.name}: " + ", ".join(
+            f"{metric}={value:.3f}" if isinstance(value, float) else f"{metric}={value}"
+            for metric, value in results[entry.name].items()
+        ))
+
+    args.output.write_text(json.dumps(results, indent=2) + "\n")
+
+    budgets = json.loads(BUDGETS_FILE.read_text()) if BUDGETS_FILE.is_file() else {}
+
+    if args.update_budgets:
+        budgets.update({name: as_budget(measurement) for name, measurement in results.items()})
+        BUDGETS_FILE.write_text(json.dumps(budgets, indent=2, sort_keys=True) + "\n")
+        print(f"Updated budgets in {BUDGETS_FILE.relative_to(ROOT)}")
+        return 0
+
+    violations = [
+        violation
+        for name, measurement in results.items()
+        for violation in over_budget(name, measurement, budgets)
+    ]
+
+    for violation in violations:
+        print(violation, file=sys.stderr)
+
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,270 @@
+"""
+Incremental synthesis. Each stack is fingerprinted on everything its template is derived from: the source of
+its module and of the local modules that module imports, the registry and app entry point, the context, the
+environment and the library versions. A stack whose fingerprint did not change since the previous synth is not
+constructed; its artifacts from that synth are added to the assembly instead, and what that synth reported for
+the stack, its import statistics and performance lint findings, is reported again.
+
+    python -m project.tooling.synth_cache --verify      # check a cached synth against a clean synth
+"""
+import argparse
+import ast
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from project.stack_registry import SELECTION_CONTEXT_KEY, StackEntry
+from project.tooling.cdk_context import (
+    CONTEXT_ENVIRONMENT_VARIABLE,
+    ROOT,
+    cached_account,
+    load_context,
+    placeholder_images,
+    toolkit_context,
+)
+from project.tooling.cloud_assembly import (
+    MANIFEST_FILE,
+    StackArtifacts,
+    add_stacks,
+    compare_assemblies,
+    copy_files,
+    extract_stack,
+    read_json,
+    write_json,
+)
+
+CACHE_CONTEXT_KEY = "synth-cache"
+CACHE_ENVIRONMENT_VARIABLE = "CDK_SYNTH_CACHE"
+DEFAULT_CACHE_DIR = ROOT / ".synth-cache"
+
+# Bump when the layout of the cache changes, which invalidates all entries
+CACHE_FORMAT = 2
+
+# Modules every stack depends on, besides its own module
+ENTRY_POINTS = ("app", "project.stack_registry")
+LIBRARIES = ("aws-cdk-lib", "constructs", "jsii")
+
+FINGERPRINT_FILE = "fingerprint"
+ARTIFACTS_FILE = "artifacts.json"
+REPORT_FILE = "report.json"
+FILES_DIR = "files"
+
+
+def module_path(module_name: str) -> Optional[Path]:
+    base = ROOT.joinpath(*module_name.split("."))
+    for path in (base.with_suffix(".py"), base / "__init__.py"):
+        if path.is_file():
+            return path
+    return None
+
+
+def imported_modules(path: Path) -> List[str]:
+    modules = []
+    for node in ast.walk(ast.parse(path.read_text(), str(path))):
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+            # The imported names may be modules themselves
+            modules.extend(f"{node.module}.{alias.name}" for alias in node.names)
+    return modules
+
+
+def local_sources(module_name: str) -> List[Path]:
+    """
+    Returns the source files of a module and of all modules of this repository it imports, directly or not.
+    """
+    sources, pending = {}, [module_name]
+
+    while pending:
+        name = pending.pop()
+        # Importing a module runs the __init__ of each of its packages as well
+        parts = name.split(".")
+        for package in (".".join(parts[:i]) for i in range(1, len(parts) + 1)):
+            path = module_path(package)
+            if path and package not in sources:
+                sources[package] = path
+                pending.extend(imported_modules(path))
+
+    return sorted(set(sources.values()))
+
+
+def app_context(context: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    """
+    Returns the context of the app, by default the context the toolkit passes to it, without the values that only
+    control this tooling.
+    """
+    if context is None:
+        context = toolkit_context() or {}
+
+    return {
+        key: value
+        for key, value in context.items()
+        if key not in (SELECTION_CONTEXT_KEY, CACHE_CONTEXT_KEY)
+    }
+
+
+def fingerprint(entry: StackEntry, account: Optional[str], context: Dict[str, object]) -> str:
+    digest = hashlib.sha256()
+
+    def add(label: str, value: bytes) -> None:
+        digest.update(f"{label}:{len(value)}:".encode())
+        digest.update(value)
+
+    add("format", str(CACHE_FORMAT).encode())
+    add("stack", json.dumps([entry.name, entry.module, entry.class_name, entry.region, account]).encode())
+    add("context", json.dumps(context, sort_keys=True).encode())
+
+    for library in LIBRARIES:
+        add(library, metadata.version(library).encode())
+
+    for path in sorted({source for module in (entry.module, *ENTRY_POINTS) for source in local_sources(module)}):
+        add(path.relative_to(ROOT).as_posix(), path.read_bytes())
+
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: List[str] = field(default_factory=list)
+    misses: List[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        return (
+            f"Synth cache: {len(self.hits)} hits, {len(self.misses)} misses"
+            + (f" (reused {', '.join(self.hits)})" if self.hits else "")
+        )
+
+
+class SynthCache:
+
+    def __init__(self, directory: Path, account: Optional[str], context: Dict[str, object]) -> None:
+        self.directory = directory
+        self.account = account
+        self.context = context
+        self.stats = CacheStats()
+        self.fingerprints: Dict[str, str] = {}
+
+    def entry_dir(self, stack_id: str) -> Path:
+        return self.directory / stack_id
+
+    def lookup(self, entry: StackEntry) -> bool:
+        """
+        Returns whether the stack can be taken from the cache, in which case it should not be constructed.
+        """
+        self.fingerprints[entry.name] = fingerprint(entry, self.account, self.context)
+
+        fingerprint_file = self.entry_dir(entry.name) / FINGERPRINT_FILE
+        if fingerprint_file.is_file() and fingerprint_file.read_text() == self.fingerprints[entry.name]:
+            self.stats.hits.append(entry.name)
+            return True
+
+        self.stats.misses.append(entry.name)
+        return False
+
+    def load(self, stack_id: str) -> StackArtifacts:
+        return StackArtifacts.from_json(read_json(self.entry_dir(stack_id) / ARTIFACTS_FILE))
+
+    def store(self, outdir: Path, stack_id: str, report: Dict[str, List[str]]) -> None:
+        stack = extract_stack(outdir, stack_id)
+        entry_dir = self.entry_dir(stack_id)
+
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        (entry_dir / FILES_DIR).mkdir(parents=True)
+        copy_files(stack, outdir, entry_dir / FILES_DIR)
+        write_json(entry_dir / ARTIFACTS_FILE, stack.to_json())
+        write_json(entry_dir / REPORT_FILE, report)
+        # Written last, so an interrupted store never leaves an entry that looks valid
+        (entry_dir / FINGERPRINT_FILE).write_text(self.fingerprints[stack_id])
+
+    def complete(
+            self,
+            outdir: Path,
+            order: List[str],
+            reports: Dict[str, Dict[str, List[str]]],
+    ) -> Dict[str, Dict[str, List[str]]]:
+        """
+        Adds the cached stacks to a synthesized assembly, and caches the stacks that were synthesized together with
+        their reports. Returns the reports of the cached stacks.
+        """
+        cached = {stack_id: self.load(stack_id) for stack_id in self.stats.hits}
+        for stack in cached.values():
+            copy_files(stack, self.entry_dir(stack.stack_id) / FILES_DIR, outdir)
+        add_stacks(outdir, cached, order)
+
+        # Stacks that still miss context lookups are synthesized again once the toolkit resolved them
+        if not read_json(outdir / MANIFEST_FILE).get("missing"):
+            for stack_id in self.stats.misses:
+                self.store(outdir, stack_id, reports[stack_id])
+
+        return {stack_id: read_json(self.entry_dir(stack_id) / REPORT_FILE) for stack_id in cached}
+
+
+def cache_dir(setting: Optional[str]) -> Optional[Path]:
+    """
+    Returns the cache directory for the synth-cache context value or environment variable. The cache is used by
+    default and disabled by "false".
+    """
+    if setting is None or setting is True or setting in ("", "true"):
+        return DEFAULT_CACHE_DIR
+    if setting is False or setting == "false":
+        return None
+    return Path(setting)
+
+
+def synth(outdir: Path, cache: str) -> None:
+    subprocess.run(
+        [sys.executable, "app.py"],
+        cwd=ROOT,
+        env={
+            **os.environ,
+            "CDK_OUTDIR": str(outdir),
+            CONTEXT_ENVIRONMENT_VARIABLE: json.dumps({**placeholder_images(), **load_context()}),
+            CACHE_ENVIRONMENT_VARIABLE: cache,
+            "CDK_ACCOUNT": os.environ.get("CDK_ACCOUNT") or cached_account(load_context()) or "",
+        },
+        check=True,
+    )
+
+
+def verify() -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        synth(tmp / "clean", "false")
+        synth(tmp / "cold", str(tmp / "cache"))
+        synth(tmp / "cached", str(tmp / "cache"))
+
+        differences = [
+            f"{run}/{path}"
+            for run in ("cold", "cached")
+            for path in compare_assemblies(tmp / "clean", tmp / run)
+        ]
+        for path in differences:
+            print(f"Differs from a clean synth: {path}", file=sys.stderr)
+
+    return 1 if differences else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the incremental synth cache")
+    parser.add_argument("--verify", action="store_true", help="check a cached synth against a clean synth")
+    parser.add_argument("--clear", action="store_true", help="remove the cache")
+    args = parser.parse_args(argv)
+
+    if args.clear:
+        shutil.rmtree(DEFAULT_CACHE_DIR, ignore_errors=True)
+    if args.verify:
+        return verify()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
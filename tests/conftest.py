@@ -0,0 +1,27 @@
+from typing import Callable, Dict
+
+import aws_cdk as cdk
+import pytest
+from aws_cdk.assertions import Template
+
+from project.stack_registry import select_stacks
+from project.tooling.cdk_context import cached_account, load_context, placeholder_images
+
+
+@pytest.fixture(scope="session")
+def stack_template() -> Callable[[str], Template]:
+    """
+    Synthesizes a stack of the app offline, against the lookups cached in cdk.context.json, and returns its
+    template. Every stack is synthesized once per session, in an App of its own.
+    """
+    context = {**placeholder_images(), **load_context()}
+    templates: Dict[str, Template] = {}
+
+    def synthesize(name: str) -> Template:
+        if name not in templates:
+            entry, = select_stacks(name)
+            stack = entry.create(cdk.App(context=context), cached_account(context))
+            templates[name] = Template.from_stack(stack)
+        return templates[name]
+
+    return synthesize
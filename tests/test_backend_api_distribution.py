@@ -0,0 +1,80 @@
+import aws_cdk.aws_cloudfront as cf
+from aws_cdk.assertions import Match
+
+from project.application import production_backend
+
+
+def api_distribution(template):
+    logical_id, = template.find_resources("AWS::CloudFront::Distribution")
+    return logical_id, template.to_json()["Resources"][logical_id]["Properties"]["DistributionConfig"]
+
+
+def test_cacheable_paths_are_cached_with_the_profile_ttl(stack_template):
+    template = stack_template("ProductionBackend")
+    profile = production_backend.API_DISTRIBUTION
+    ttl = int(profile.cache_ttl.to_seconds())
+
+    cache_policy, = template.find_resources("AWS::CloudFront::CachePolicy", {
+        "Properties": {"CachePolicyConfig": Match.object_like({
+            "DefaultTTL": ttl,
+            "MaxTTL": ttl,
+            "MinTTL": 0,
+            "ParametersInCacheKeyAndForwardedToOrigin": {
+                "CookiesConfig": {"CookieBehavior": "none"},
+                "HeadersConfig": {"HeaderBehavior": "none"},
+                "QueryStringsConfig": {"QueryStringBehavior": "all"},
+                "EnableAcceptEncodingBrotli": True,
+                "EnableAcceptEncodingGzip": True,
+            },
+        })},
+    })
+    # The Host header reaches the load balancer, whose certificate is validated against the backend domain
+    request_policy, = template.find_resources("AWS::CloudFront::OriginRequestPolicy", {
+        "Properties": {"OriginRequestPolicyConfig": Match.object_like({
+            "CookiesConfig": {"CookieBehavior": "none"},
+            "HeadersConfig": {"HeaderBehavior": "whitelist", "Headers": ["Host"]},
+            "QueryStringsConfig": {"QueryStringBehavior": "all"},
+        })},
+    })
+
+    _, config = api_distribution(template)
+    behaviors = {behavior["PathPattern"]: behavior for behavior in config["CacheBehaviors"]}
+    assert set(behaviors) == set(profile.cacheable_paths)
+    for behavior in behaviors.values():
+        assert behavior["CachePolicyId"] == {"Ref": cache_policy}
+        assert behavior["OriginRequestPolicyId"] == {"Ref": request_policy}
+        assert behavior["AllowedMethods"] == ["GET", "HEAD", "OPTIONS"]
+        assert behavior["Compress"] is True
+
+
+def test_other_requests_pass_through_uncached(stack_template):
+    _, config = api_distribution(stack_template("ProductionBackend"))
+
+    default = config["DefaultCacheBehavior"]
+    assert default["CachePolicyId"] == cf.CachePolicy.CACHING_DISABLED.cache_policy_id
+    assert default["OriginRequestPolicyId"] == cf.OriginRequestPolicy.ALL_VIEWER.origin_request_policy_id
+    assert "POST" in default["AllowedMethods"]
+    assert default["ViewerProtocolPolicy"] == "redirect-to-https"
+
+
+def test_edge_keeps_connections_to_the_load_balancer_alive(stack_template):
+    template = stack_template("ProductionBackend")
+    profile = production_backend.API_DISTRIBUTION
+    distribution, config = api_distribution(template)
+
+    load_balancer, = template.find_resources("AWS::ElasticLoadBalancingV2::LoadBalancer")
+    origin, = config["Origins"]
+    assert origin["DomainName"] == {"Fn::GetAtt": [load_balancer, "DNSName"]}
+    assert origin["CustomOriginConfig"]["OriginProtocolPolicy"] == "https-only"
+    assert origin["CustomOriginConfig"]["OriginKeepaliveTimeout"] == int(profile.keepalive_timeout.to_seconds())
+    assert origin["CustomOriginConfig"]["OriginReadTimeout"] == int(profile.read_timeout.to_seconds())
+    assert config["HttpVersion"] == "http2and3"
+
+    template.has_resource_properties("AWS::Route53::RecordSet", {
+        "Name": f"{production_backend.BE_DOMAIN}.",
+        "AliasTarget": Match.object_like({"DNSName": {"Fn::GetAtt": [distribution, "DomainName"]}}),
+    })
+
+
+def test_acceptance_has_no_api_distribution(stack_template):
+    stack_template("AcceptanceBackend").resource_count_is("AWS::CloudFront::Distribution", 0)
@@ -0,0 +1,144 @@
+import re
+
+import pytest
+from aws_cdk import Duration
+from aws_cdk.assertions import Match
+
+from project.application import production_backend
+from project.application.base.profiles import BlueGreenProfile
+
+CLUSTER_NAME = production_backend.CLUSTER_NAME
+
+
+def logical_id(template, resource_type, name):
+    resource, = (
+        key for key in template.find_resources(resource_type) if re.fullmatch(f"{name}[0-9A-F]{{8}}", key)
+    )
+    return resource
+
+
+def listener(template, port):
+    resource, = template.find_resources("AWS::ElasticLoadBalancingV2::Listener", {"Properties": {"Port": port}})
+    return resource
+
+
+def test_test_listener_forwards_to_the_green_target_group(stack_template):
+    template = stack_template("ProductionBackend")
+    green = logical_id(template, "AWS::ElasticLoadBalancingV2::TargetGroup", f"{CLUSTER_NAME}BackendGreenTargetGroup")
+
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::Listener", {
+        "Port": production_backend.BLUE_GREEN.test_listener_port,
+        "Protocol": "HTTPS",
+        "DefaultActions": [{"Type": "forward", "TargetGroupArn": {"Ref": green}}],
+    })
+
+
+def test_rollback_alarms_watch_both_target_groups(stack_template):
+    template = stack_template("ProductionBackend")
+    monitoring = production_backend.MONITORING
+    green = logical_id(template, "AWS::ElasticLoadBalancingV2::TargetGroup", f"{CLUSTER_NAME}BackendGreenTargetGroup")
+    blue = logical_id(
+        template, "AWS::ElasticLoadBalancingV2::TargetGroup", f"{CLUSTER_NAME}BackendServiceLBPublicListenerECSGroup",
+    )
+    thresholds = dict(
+        Latency=("TargetResponseTime", monitoring.latency_p99_threshold.to_seconds()),
+        TargetErrors=("HTTPCode_Target_5XX_Count", monitoring.server_error_threshold),
+    )
+
+    for color, target_group in (("Blue", blue), ("Green", green)):
+        for alarm_name, (metric_name, threshold) in thresholds.items():
+            alarm = logical_id(
+                template, "AWS::CloudWatch::Alarm", f"{CLUSTER_NAME}Backend{color}{alarm_name}RollbackAlarm",
+            )
+            properties = template.to_json()["Resources"][alarm]["Properties"]
+            assert properties["MetricName"] == metric_name
+            assert properties["Threshold"] == threshold
+            assert properties["EvaluationPeriods"] == monitoring.evaluation_periods
+            assert {"Name": "TargetGroup", "Value": {"Fn::GetAtt": [target_group, "TargetGroupFullName"]}} in (
+                properties["Dimensions"]
+            )
+            # Rollback alarms stop the deployment, they do not page anyone
+            assert "AlarmActions" not in properties
+
+
+def test_deployment_group_rolls_back_on_failures_and_alarms(stack_template):
+    template = stack_template("ProductionBackend")
+    blue_green = production_backend.BLUE_GREEN
+    alarms = [
+        {"Name": {"Ref": logical_id(template, "AWS::CloudWatch::Alarm", f"{CLUSTER_NAME}Backend{name}RollbackAlarm")}}
+        for name in ("BlueLatency", "BlueTargetErrors", "GreenLatency", "GreenTargetErrors")
+    ]
+
+    template.has_resource_properties("AWS::CodeDeploy::DeploymentGroup", {
+        "DeploymentStyle": {"DeploymentOption": "WITH_TRAFFIC_CONTROL", "DeploymentType": "BLUE_GREEN"},
+        "AlarmConfiguration": {"Alarms": alarms, "Enabled": True},
+        "AutoRollbackConfiguration": {
+            "Enabled": True,
+            "Events": ["DEPLOYMENT_FAILURE", "DEPLOYMENT_STOP_ON_REQUEST", "DEPLOYMENT_STOP_ON_ALARM"],
+        },
+        "BlueGreenDeploymentConfiguration": Match.object_like({
+            "TerminateBlueInstancesOnDeploymentSuccess": {
+                "Action": "TERMINATE",
+                "TerminationWaitTimeInMinutes": int(blue_green.termination_wait.to_minutes()),
+            },
+        }),
+        "DeploymentConfigName": {
+            "Ref": logical_id(template, "AWS::CodeDeploy::DeploymentConfig", f"{CLUSTER_NAME}BackendDeploymentConfig"),
+        },
+        "LoadBalancerInfo": {
+            "TargetGroupPairInfoList": [Match.object_like({
+                "ProdTrafficRoute": {"ListenerArns": [{"Ref": listener(template, 443)}]},
+                "TestTrafficRoute": {"ListenerArns": [{"Ref": listener(template, blue_green.test_listener_port)}]},
+            })],
+        },
+    })
+
+
+def test_canary_shifts_a_step_and_then_the_rest(stack_template):
+    blue_green = production_backend.BLUE_GREEN
+    assert blue_green.traffic_shifting == "canary"
+
+    stack_template("ProductionBackend").has_resource_properties("AWS::CodeDeploy::DeploymentConfig", {
+        "ComputePlatform": "ECS",
+        "TrafficRoutingConfig": {
+            "Type": "TimeBasedCanary",
+            "TimeBasedCanary": {
+                "CanaryPercentage": blue_green.step_percent,
+                "CanaryInterval": int(blue_green.step_interval.to_minutes()),
+            },
+        },
+    })
+
+
+def test_outputs_name_what_the_pipeline_deploys(stack_template):
+    template = stack_template("ProductionBackend")
+    deployment_group, = template.find_resources("AWS::CodeDeploy::DeploymentGroup")
+    application, = template.find_resources("AWS::CodeDeploy::Application")
+    service = logical_id(template, "AWS::ECS::Service", f"{CLUSTER_NAME}BackendService")
+
+    outputs = {name: output["Value"] for name, output in template.to_json()["Outputs"].items()}
+    assert outputs["BackendDeploymentApplication"] == {"Ref": application}
+    assert outputs["BackendDeploymentGroup"] == {"Ref": deployment_group}
+    assert outputs["BackendServiceName"] == {"Fn::GetAtt": [service, "Name"]}
+    assert outputs["BackendContainerName"] == f"{CLUSTER_NAME}BackendContainer"
+    assert {"BackendClusterName", "BackendTaskFamily"} <= outputs.keys()
+
+
+def test_acceptance_has_no_blue_green_deployments(stack_template):
+    template = stack_template("AcceptanceBackend")
+
+    template.resource_count_is("AWS::CodeDeploy::DeploymentGroup", 0)
+    template.resource_count_is("AWS::ElasticLoadBalancingV2::Listener", 2)
+    assert "BackendDeploymentGroup" not in template.to_json().get("Outputs", {})
+
+
+@pytest.mark.parametrize("settings", [
+    dict(traffic_shifting="rolling"),
+    dict(step_percent=100),
+    dict(step_interval=Duration.seconds(90)),
+    dict(test_listener_port=443),
+    dict(termination_wait=Duration.days(3)),
+])
+def test_invalid_blue_green_profiles_are_rejected(settings):
+    with pytest.raises(ValueError):
+        BlueGreenProfile(**settings)
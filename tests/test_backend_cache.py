@@ -0,0 +1,97 @@
+import re
+
+import pytest
+
+from project.application import acceptance_backend, production_backend
+from project.application.base.profiles import CACHE_ENGINE_VERSIONS, CacheProfile
+
+BACKENDS = (
+    ("ProductionBackend", production_backend),
+    ("AcceptanceBackend", acceptance_backend),
+)
+
+
+def cache_security_group(template, cluster_name):
+    security_group, = template.find_resources("AWS::EC2::SecurityGroup", {
+        "Properties": {"GroupDescription": f"{cluster_name} backend cache"},
+    })
+    return security_group
+
+
+def service_security_group(template, cluster_name):
+    security_group, = (
+        logical_id for logical_id in template.find_resources("AWS::EC2::SecurityGroup")
+        if re.fullmatch(f"{cluster_name}BackendServiceSecurityGroup[0-9A-F]{{8}}", logical_id)
+    )
+    return security_group
+
+
+def container_environment(template):
+    definition, = template.find_resources("AWS::ECS::TaskDefinition").values()
+    container, = definition["Properties"]["ContainerDefinitions"]
+    return {variable["Name"]: variable["Value"] for variable in container["Environment"]}
+
+
+def test_replication_group_follows_the_cache_profile(stack_template):
+    for name, backend in BACKENDS:
+        template = stack_template(name)
+        cache = backend.CACHE
+        subnet_group, = template.find_resources("AWS::ElastiCache::SubnetGroup")
+
+        template.has_resource_properties("AWS::ElastiCache::ReplicationGroup", {
+            "ReplicationGroupId": f"{backend.CLUSTER_NAME.lower()}-backend-cache",
+            "Engine": cache.engine,
+            "EngineVersion": cache.version,
+            "CacheNodeType": cache.node_type,
+            "NumCacheClusters": cache.replicas + 1,
+            "AutomaticFailoverEnabled": cache.replicas > 0,
+            "MultiAZEnabled": cache.replicas > 0,
+            "Port": cache.port,
+            "CacheSubnetGroupName": {"Ref": subnet_group},
+            "SecurityGroupIds": [{"Fn::GetAtt": [cache_security_group(template, backend.CLUSTER_NAME), "GroupId"]}],
+            "TransitEncryptionEnabled": True,
+            "AtRestEncryptionEnabled": True,
+        })
+
+
+def test_only_the_service_reaches_the_cache(stack_template):
+    for name, backend in BACKENDS:
+        template = stack_template(name)
+        security_group = cache_security_group(template, backend.CLUSTER_NAME)
+
+        ingress = template.find_resources("AWS::EC2::SecurityGroupIngress", {
+            "Properties": {"GroupId": {"Fn::GetAtt": [security_group, "GroupId"]}},
+        })
+        rule, = (rule["Properties"] for rule in ingress.values())
+        assert (rule["IpProtocol"], rule["FromPort"], rule["ToPort"]) == ("tcp", backend.CACHE.port, backend.CACHE.port)
+        assert rule["SourceSecurityGroupId"] == {
+            "Fn::GetAtt": [service_security_group(template, backend.CLUSTER_NAME), "GroupId"],
+        }
+
+        # The cache never opens connections itself
+        egress, = template.to_json()["Resources"][security_group]["Properties"]["SecurityGroupEgress"]
+        assert egress["Description"] == "Disallow all traffic"
+
+
+def test_service_connects_to_the_cache_over_tls(stack_template):
+    for name, backend in BACKENDS:
+        template = stack_template(name)
+        replication_group, = template.find_resources("AWS::ElastiCache::ReplicationGroup")
+
+        environment = container_environment(template)
+        assert environment["CACHE_HOST"] == {"Fn::GetAtt": [replication_group, "PrimaryEndPoint.Address"]}
+        assert environment["CACHE_READER_HOST"] == {"Fn::GetAtt": [replication_group, "ReaderEndPoint.Address"]}
+        assert environment["CACHE_PORT"] == str(backend.CACHE.port)
+        assert environment["CACHE_TLS"] == "true"
+
+
+@pytest.mark.parametrize("engine", sorted(CACHE_ENGINE_VERSIONS))
+def test_engine_version_defaults_per_engine(engine):
+    assert CacheProfile(engine=engine).version == CACHE_ENGINE_VERSIONS[engine]
+    assert CacheProfile(engine=engine, engine_version="7.0").version == "7.0"
+
+
+@pytest.mark.parametrize("settings", [dict(engine="memcached"), dict(replicas=6), dict(replicas=-1)])
+def test_invalid_cache_profiles_are_rejected(settings):
+    with pytest.raises(ValueError):
+        CacheProfile(**settings)
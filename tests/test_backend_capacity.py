@@ -0,0 +1,88 @@
+import pytest
+from aws_cdk import Duration
+from aws_cdk.assertions import Match
+
+from project.application import acceptance_backend
+from project.application.base.profiles import CapacityProfile, ScheduleProfile
+
+
+def scheduled_actions(template):
+    target, = template.find_resources("AWS::ApplicationAutoScaling::ScalableTarget").values()
+    return {action["ScheduledActionName"]: action for action in target["Properties"]["ScheduledActions"]}
+
+
+def test_acceptance_runs_above_its_base_on_fargate_spot(stack_template):
+    template = stack_template("AcceptanceBackend")
+    capacity = acceptance_backend.CAPACITY
+
+    template.has_resource_properties("AWS::ECS::ClusterCapacityProviderAssociations", {
+        "CapacityProviders": ["FARGATE", "FARGATE_SPOT"],
+    })
+    template.has_resource_properties("AWS::ECS::Service", {
+        "LaunchType": Match.absent(),
+        "CapacityProviderStrategy": [
+            {"CapacityProvider": "FARGATE", "Base": capacity.on_demand_base, "Weight": capacity.on_demand_weight},
+            {"CapacityProvider": "FARGATE_SPOT", "Weight": capacity.spot_weight},
+        ],
+    })
+
+
+def test_production_runs_on_fargate_only(stack_template):
+    template = stack_template("ProductionBackend")
+
+    template.resource_count_is("AWS::ECS::ClusterCapacityProviderAssociations", 0)
+    template.has_resource_properties("AWS::ECS::Service", {
+        "LaunchType": "FARGATE",
+        "CapacityProviderStrategy": Match.absent(),
+    })
+
+
+def test_acceptance_is_prewarmed_and_scaled_to_zero_outside_working_hours(stack_template):
+    schedule = acceptance_backend.SCHEDULE
+    scaling = acceptance_backend.SCALING
+    actions = scheduled_actions(stack_template("AcceptanceBackend"))
+
+    # The prewarm starts 20 minutes before the day starts at 07:00
+    assert schedule.prewarm_time == (6, 40)
+    assert {
+        name: (action["Schedule"], action["ScalableTargetAction"]["MinCapacity"],
+               action["ScalableTargetAction"]["MaxCapacity"])
+        for name, action in actions.items()
+    } == {
+        "AccPrewarm": ("cron(40 6 ? * MON-FRI *)", scaling.max_capacity, scaling.max_capacity),
+        "AccDayStart": ("cron(0 7 ? * MON-FRI *)", scaling.min_capacity, scaling.max_capacity),
+        "AccDayEnd": ("cron(0 20 ? * MON-FRI *)", 0, 0),
+    }
+
+
+def test_scheduled_actions_run_in_the_time_zone_of_the_profile(stack_template):
+    actions = scheduled_actions(stack_template("AcceptanceBackend"))
+
+    assert {action["Timezone"] for action in actions.values()} == {acceptance_backend.SCHEDULE.time_zone}
+
+
+def test_production_has_no_schedule(stack_template):
+    stack_template("ProductionBackend").has_resource_properties("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "ScheduledActions": Match.absent(),
+    })
+
+
+@pytest.mark.parametrize("settings", [
+    dict(on_demand_base=-1),
+    dict(spot_weight=-1),
+    dict(on_demand_weight=0, spot_weight=0),
+])
+def test_invalid_capacity_profiles_are_rejected(settings):
+    with pytest.raises(ValueError):
+        CapacityProfile(**settings)
+
+
+@pytest.mark.parametrize("settings", [
+    dict(day_start_hour=19, day_end_hour=8),
+    dict(day_end_hour=24),
+    dict(day_start_hour=0, prewarm=Duration.minutes(30)),
+    dict(prewarm=Duration.minutes(0)),
+])
+def test_invalid_schedules_are_rejected(settings):
+    with pytest.raises(ValueError):
+        ScheduleProfile(**settings)
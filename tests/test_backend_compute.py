@@ -0,0 +1,48 @@
+import pytest
+
+from project.application import acceptance_backend, production_backend
+from project.application.base.profiles import MIN_NON_HEAP_MIB, ComputeProfile
+
+BACKENDS = (
+    ("ProductionBackend", production_backend.COMPUTE),
+    ("AcceptanceBackend", acceptance_backend.COMPUTE),
+)
+
+
+def container_environment(template):
+    definition, = template.find_resources("AWS::ECS::TaskDefinition").values()
+    container, = definition["Properties"]["ContainerDefinitions"]
+    return {variable["Name"]: variable["Value"] for variable in container["Environment"]}
+
+
+def test_tasks_run_on_arm64_with_the_profile_size(stack_template):
+    for name, compute in BACKENDS:
+        stack_template(name).has_resource_properties("AWS::ECS::TaskDefinition", {
+            "Cpu": str(compute.cpu),
+            "Memory": str(compute.memory_limit_mib),
+            "RuntimePlatform": {"CpuArchitecture": "ARM64", "OperatingSystemFamily": "LINUX"},
+        })
+
+
+def test_jvm_is_sized_to_the_task(stack_template):
+    for name, compute in BACKENDS:
+        assert container_environment(stack_template(name))["JAVA_TOOL_OPTIONS"] == compute.java_tool_options
+
+    # 75% of the memory limit, with a fixed heap so the JVM does not size it for the host
+    assert production_backend.COMPUTE.java_tool_options.split() == [
+        "-Xms1536m", "-Xmx1536m", "-XX:ActiveProcessorCount=1", "-XX:+UseG1GC", "-XX:MaxGCPauseMillis=200",
+        "-XX:+ExitOnOutOfMemoryError",
+    ]
+    assert acceptance_backend.COMPUTE.java_tool_options.split() == [
+        "-Xms768m", "-Xmx768m", "-XX:ActiveProcessorCount=1", "-XX:+UseSerialGC", "-XX:+ExitOnOutOfMemoryError",
+    ]
+
+
+def test_small_tasks_keep_memory_outside_the_heap():
+    assert ComputeProfile(cpu=256, memory_limit_mib=512).heap_mib == 512 - MIN_NON_HEAP_MIB
+
+
+@pytest.mark.parametrize("cpu, memory_limit_mib", [(768, 2048), (512, 512), (1024, 1024)])
+def test_task_sizes_fargate_does_not_have_are_rejected(cpu, memory_limit_mib):
+    with pytest.raises(ValueError):
+        ComputeProfile(cpu=cpu, memory_limit_mib=memory_limit_mib)
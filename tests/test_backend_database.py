@@ -0,0 +1,159 @@
+import aws_cdk as cdk
+import aws_cdk.aws_ec2 as ec2
+import pytest
+from aws_cdk.assertions import Match, Template
+
+from project.application.base.backend_stack import BackendStack
+from project.application.base.profiles import DatabaseProfile
+from project.tooling.cdk_context import cached_account, load_context, placeholder_images
+
+CLUSTER_NAME = "Acc"
+
+EXISTING_SECRET_ARN = "arn:aws:secretsmanager:eu-west-1:046201199215:secret:backend-db-AbCdEf"
+EXISTING_DATABASE = DatabaseProfile(
+    existing_cluster="backend-db",
+    existing_secret_arn=EXISTING_SECRET_ARN,
+    existing_security_group="sg-0123456789abcdef0",
+)
+
+
+class DatabaseBackend(BackendStack):
+
+    def __init__(self, scope, construct_id, database: DatabaseProfile, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        cluster = self.create_cluster(CLUSTER_NAME)
+        pooled = self.create_database(cluster.vpc, CLUSTER_NAME, database)
+        self.create_service(
+            cluster, CLUSTER_NAME, self.fetch_registry(), self.fetch_regional_ssl_cert(), None, None,
+            database=pooled,
+        )
+
+
+def database_backend(database: DatabaseProfile) -> Template:
+    context = {**placeholder_images(), **load_context()}
+    stack = DatabaseBackend(
+        cdk.App(context=context), "DatabaseBackend", database,
+        env=cdk.Environment(account=cached_account(context), region="eu-west-1"),
+    )
+    return Template.from_stack(stack)
+
+
+def logical_id(template: Template, resource_type: str) -> str:
+    logical_id, = template.find_resources(resource_type)
+    return logical_id
+
+
+def security_group_of(template: Template, proxy: str) -> str:
+    group, = template.to_json()["Resources"][proxy]["Properties"]["VpcSecurityGroupIds"]
+    return group["Fn::GetAtt"][0]
+
+
+def database_environment(template: Template) -> dict:
+    definition, = template.find_resources("AWS::ECS::TaskDefinition").values()
+    container, = definition["Properties"]["ContainerDefinitions"]
+    return {
+        **{variable["Name"]: variable["Value"] for variable in container["Environment"]},
+        **{secret["Name"]: secret["ValueFrom"] for secret in container["Secrets"]},
+    }
+
+
+def jdbc_url(endpoint):
+    return {"Fn::Join": ["", ["jdbc:postgresql://", endpoint, ":5432/backend?sslmode=require"]]}
+
+
+def assert_service_reaches_proxy(template: Template, proxy_security_group: str) -> None:
+    template.has_resource_properties("AWS::EC2::SecurityGroupIngress", {
+        "GroupId": {"Fn::GetAtt": [proxy_security_group, "GroupId"]},
+        "SourceSecurityGroupId": {
+            "Fn::GetAtt": [Match.string_like_regexp("BackendServiceSecurityGroup"), "GroupId"],
+        },
+        "FromPort": 5432,
+        "ToPort": 5432,
+    })
+
+
+def test_proxy_pools_connections_to_a_new_cluster():
+    profile = DatabaseProfile(readers=1)
+    template = database_backend(profile)
+    cluster = logical_id(template, "AWS::RDS::DBCluster")
+    proxy = logical_id(template, "AWS::RDS::DBProxy")
+    secret = logical_id(template, "AWS::SecretsManager::SecretTargetAttachment")
+    proxy_security_group = security_group_of(template, proxy)
+
+    template.has_resource_properties("AWS::RDS::DBCluster", {
+        "DatabaseName": profile.database_name,
+        "StorageEncrypted": True,
+        "DeletionProtection": True,
+    })
+    template.resource_count_is("AWS::RDS::DBInstance", 1 + profile.readers)
+    template.has_resource_properties("AWS::RDS::DBProxy", {
+        "EngineFamily": "POSTGRESQL",
+        "RequireTLS": True,
+        "IdleClientTimeout": int(profile.idle_client_timeout.to_seconds()),
+        "Auth": [Match.object_like({"SecretArn": {"Ref": secret}})],
+    })
+    template.has_resource_properties("AWS::RDS::DBProxyTargetGroup", {
+        "DBProxyName": {"Ref": proxy},
+        "DBClusterIdentifiers": [{"Ref": cluster}],
+        "ConnectionPoolConfigurationInfo": {
+            "MaxConnectionsPercent": profile.max_connections_percent,
+            "MaxIdleConnectionsPercent": profile.max_idle_connections_percent,
+            "ConnectionBorrowTimeout": int(profile.borrow_timeout.to_seconds()),
+        },
+    })
+    template.has_resource_properties("AWS::EC2::SecurityGroupIngress", {
+        "GroupId": {"Fn::GetAtt": [Match.string_like_regexp("DatabaseSecurityGroup"), "GroupId"]},
+        "SourceSecurityGroupId": {"Fn::GetAtt": [proxy_security_group, "GroupId"]},
+    })
+    assert_service_reaches_proxy(template, proxy_security_group)
+
+    reader = logical_id(template, "AWS::RDS::DBProxyEndpoint")
+    template.has_resource_properties("AWS::RDS::DBProxyEndpoint", {"TargetRole": "READ_ONLY"})
+
+    environment = database_environment(template)
+    assert environment["DATABASE_URL"] == jdbc_url({"Fn::GetAtt": [proxy, "Endpoint"]})
+    assert environment["DATABASE_READER_URL"] == jdbc_url({"Fn::GetAtt": [reader, "Endpoint"]})
+    assert environment["DATABASE_MAX_POOL_SIZE"] == str(profile.application_pool_size)
+    assert environment["DATABASE_USERNAME"] == {"Fn::Join": ["", [{"Ref": secret}, ":username::"]]}
+    assert environment["DATABASE_PASSWORD"] == {"Fn::Join": ["", [{"Ref": secret}, ":password::"]]}
+
+
+def test_proxy_pools_connections_to_an_existing_cluster():
+    template = database_backend(EXISTING_DATABASE)
+    proxy = logical_id(template, "AWS::RDS::DBProxy")
+    proxy_security_group = security_group_of(template, proxy)
+
+    template.resource_count_is("AWS::RDS::DBCluster", 0)
+    template.resource_count_is("AWS::RDS::DBProxyEndpoint", 0)
+    template.has_resource_properties("AWS::RDS::DBProxy", {
+        "Auth": [Match.object_like({"SecretArn": EXISTING_SECRET_ARN})],
+    })
+    template.has_resource_properties("AWS::RDS::DBProxyTargetGroup", {
+        "DBProxyName": {"Ref": proxy},
+        "DBClusterIdentifiers": [EXISTING_DATABASE.existing_cluster],
+    })
+    template.has_resource_properties("AWS::EC2::SecurityGroupIngress", {
+        "GroupId": EXISTING_DATABASE.existing_security_group,
+        "SourceSecurityGroupId": {"Fn::GetAtt": [proxy_security_group, "GroupId"]},
+        "FromPort": 5432,
+        "ToPort": 5432,
+    })
+    assert_service_reaches_proxy(template, proxy_security_group)
+
+    environment = database_environment(template)
+    assert environment["DATABASE_URL"] == jdbc_url({"Fn::GetAtt": [proxy, "Endpoint"]})
+    assert environment["DATABASE_READER_URL"] == environment["DATABASE_URL"]
+    assert environment["DATABASE_USERNAME"] == f"{EXISTING_SECRET_ARN}:username::"
+    assert environment["DATABASE_PASSWORD"] == f"{EXISTING_SECRET_ARN}:password::"
+
+
+def test_database_is_only_pooled_in_the_primary_region():
+    context = load_context()
+    stack = BackendStack(
+        cdk.App(context=context), "DatabaseBackend",
+        env=cdk.Environment(account=cached_account(context), region="us-east-1"),
+    )
+
+    with pytest.raises(ValueError, match="only be pooled in the primary region"):
+        stack.create_database(ec2.Vpc(stack, "Vpc"), CLUSTER_NAME, DatabaseProfile())
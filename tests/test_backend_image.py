@@ -0,0 +1,53 @@
+import aws_cdk as cdk
+from aws_cdk.assertions import Annotations, Match, Template
+
+from project.stack_registry import image_context_key, select_stacks
+from project.tooling.cdk_context import cached_account, load_context
+
+DIGEST = "sha256:" + "0123456789abcdef" * 4
+
+
+def acceptance_backend(**images):
+    context = {**load_context(), **{image_context_key(cluster): image for cluster, image in images.items()}}
+    entry, = select_stacks("AcceptanceBackend")
+    return entry.create(cdk.App(context=context), cached_account(context))
+
+
+def image_errors(stack):
+    return Annotations.from_stack(stack).find_error("*", Match.string_like_regexp("backend-image:Acc"))
+
+
+def container_image(stack):
+    definition, = Template.from_stack(stack).find_resources("AWS::ECS::TaskDefinition").values()
+    container, = definition["Properties"]["ContainerDefinitions"]
+    return container["Image"]
+
+
+def test_missing_image_is_an_error_of_the_backend_stack():
+    stack = acceptance_backend()
+
+    assert len(image_errors(stack)) == 1
+    Annotations.from_stack(stack).has_error("*", Match.string_like_regexp("No backend image given"))
+
+
+def test_app_without_images_synthesizes_and_only_backends_report_errors():
+    context = load_context()
+    app = cdk.App(context=context)
+    stacks = [entry.create(app, cached_account(context)) for entry in select_stacks(None)]
+    app.synth()
+
+    failing = {stack.stack_name for stack in stacks if Annotations.from_stack(stack).find_error("*", Match.any_value())}
+    assert failing == {entry.name for entry in select_stacks("*Backend*")}
+
+
+def test_latest_image_is_an_error():
+    stack = acceptance_backend(Acc="latest")
+
+    Annotations.from_stack(stack).has_error("*", Match.string_like_regexp("must be a version or sha256 digest"))
+
+
+def test_digest_pins_the_image():
+    stack = acceptance_backend(Acc=DIGEST)
+
+    assert image_errors(stack) == []
+    assert f"@{DIGEST}" in str(container_image(stack))
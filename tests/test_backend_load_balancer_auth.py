@@ -0,0 +1,63 @@
+import pytest
+from aws_cdk.assertions import Match
+
+from project.application import acceptance_backend
+from project.application.base.profiles import LoadBalancerAuthProfile
+
+
+def logical_id(template, resource_type, name):
+    resource, = (key for key in template.find_resources(resource_type) if name in key)
+    return resource
+
+
+def test_listed_paths_are_authenticated_by_the_load_balancer(stack_template):
+    template = stack_template("AcceptanceBackend")
+    auth = acceptance_backend.LOAD_BALANCER_AUTH
+    client = logical_id(template, "AWS::Cognito::UserPoolClient", "AccBackendClient")
+    target_group = logical_id(template, "AWS::ElasticLoadBalancingV2::TargetGroup", "ECSGroup")
+
+    rules = template.find_resources("AWS::ElasticLoadBalancingV2::ListenerRule")
+    assert len(rules) == len(auth.paths)
+
+    for index, path in enumerate(auth.paths):
+        template.has_resource_properties("AWS::ElasticLoadBalancingV2::ListenerRule", {
+            "Priority": auth.first_rule_priority + index,
+            "Conditions": [{"Field": "path-pattern", "PathPatternConfig": {"Values": [path]}}],
+            "Actions": [
+                {
+                    "Order": 1,
+                    "Type": "authenticate-cognito",
+                    "AuthenticateCognitoConfig": Match.object_like({
+                        "Scope": auth.scope,
+                        "SessionTimeout": int(auth.session_timeout.to_seconds()),
+                        "UserPoolClientId": {"Ref": client},
+                    }),
+                },
+                {"Order": 2, "Type": "forward", "TargetGroupArn": {"Ref": target_group}},
+            ],
+        })
+
+
+def test_server_client_accepts_the_load_balancer_callback(stack_template):
+    template = stack_template("AcceptanceBackend")
+
+    template.has_resource_properties("AWS::Cognito::UserPoolClient", {
+        "GenerateSecret": True,
+        "CallbackURLs": [f"https://{acceptance_backend.BE_DOMAIN}/oauth2/idpresponse"],
+        "AllowedOAuthFlows": ["code"],
+    })
+
+    definition, = template.find_resources("AWS::ECS::TaskDefinition").values()
+    container, = definition["Properties"]["ContainerDefinitions"]
+    environment = {variable["Name"]: variable["Value"] for variable in container["Environment"]}
+    assert environment["OIDC_LOAD_BALANCER_PATHS"] == ",".join(acceptance_backend.LOAD_BALANCER_AUTH.paths)
+
+
+def test_production_leaves_authentication_to_the_application(stack_template):
+    stack_template("ProductionBackend").resource_count_is("AWS::ElasticLoadBalancingV2::ListenerRule", 0)
+
+
+@pytest.mark.parametrize("paths", [(), ("swagger-ui/*",)])
+def test_invalid_paths_are_rejected(paths):
+    with pytest.raises(ValueError):
+        LoadBalancerAuthProfile(paths=paths)
@@ -0,0 +1,37 @@
+from aws_cdk.assertions import Match
+
+from project.application import acceptance_backend, production_backend
+
+INTERFACE_SERVICES = ("ecr.api", "ecr.dkr", "secretsmanager", "logs")
+
+BACKENDS = (
+    ("ProductionBackend", production_backend.NETWORK),
+    ("AcceptanceBackend", acceptance_backend.NETWORK),
+)
+
+
+def test_tasks_reach_aws_services_through_vpc_endpoints(stack_template):
+    for name, network in BACKENDS:
+        assert network.interface_endpoints
+        template = stack_template(name)
+
+        template.resource_count_is("AWS::EC2::VPCEndpoint", len(INTERFACE_SERVICES) + 1)
+        template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+            "ServiceName": {"Fn::Join": ["", ["com.amazonaws.", {"Ref": "AWS::Region"}, ".s3"]]},
+            "VpcEndpointType": "Gateway",
+            "RouteTableIds": Match.any_value(),
+        })
+        for service in INTERFACE_SERVICES:
+            template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+                "ServiceName": Match.string_like_regexp(rf"^com\.amazonaws\.[a-z0-9-]+\.{service}$"),
+                "VpcEndpointType": "Interface",
+                "PrivateDnsEnabled": True,
+            })
+
+
+def test_nat_gateways_follow_the_network_profile(stack_template):
+    assert production_backend.NETWORK.nat_gateways == 2
+    assert acceptance_backend.NETWORK.nat_gateways == 1
+
+    for name, network in BACKENDS:
+        stack_template(name).resource_count_is("AWS::EC2::NatGateway", network.nat_gateways)
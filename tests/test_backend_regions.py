@@ -0,0 +1,104 @@
+import aws_cdk as cdk
+import aws_cdk.aws_cloudfront as cf
+import aws_cdk.aws_cloudfront_origins as cfo
+import aws_cdk.aws_ec2 as ec2
+import aws_cdk.aws_elasticloadbalancingv2 as elbv2
+import pytest
+from aws_cdk.assertions import Template
+
+from project import stack_registry
+from project.application.acceptance_backend import BE_DOMAIN
+from project.application.base.backend_stack import BackendStack
+from project.stack_registry import backend_entries, regional_stack_name
+from project.tooling.cdk_context import cached_account, load_context
+
+
+def backend_stack(region: str) -> BackendStack:
+    context = load_context()
+    return BackendStack(
+        cdk.App(context=context), "RegionalBackend",
+        env=cdk.Environment(account=cached_account(context), region=region),
+    )
+
+
+def load_balancer(stack: BackendStack) -> elbv2.ApplicationLoadBalancer:
+    return elbv2.ApplicationLoadBalancer(stack, "LoadBalancer", vpc=ec2.Vpc(stack, "Vpc"), internet_facing=True)
+
+
+def test_regions_outside_the_primary_region_get_their_own_stack(monkeypatch):
+    monkeypatch.setitem(stack_registry.BACKEND_REGIONS, "Acc", ("eu-west-1", "us-east-1"))
+
+    entries = backend_entries("AcceptanceBackend", "project.application.acceptance_backend", "Acc")
+
+    assert [(entry.name, entry.region) for entry in entries] == [
+        ("AcceptanceBackend", "eu-west-1"),
+        ("AcceptanceBackend-us-east-1", "us-east-1"),
+    ]
+    assert {entry.class_name for entry in entries} == {"AcceptanceBackend"}
+    assert regional_stack_name("AcceptanceBackend", "eu-west-1") == "AcceptanceBackend"
+
+
+def test_latency_record_routes_to_the_region_with_a_health_check():
+    stack = backend_stack("eu-west-1")
+    alb = load_balancer(stack)
+    stack.create_dns_record(stack.fetch_hosted_zone(), alb, BE_DOMAIN, latency_routing=True)
+    template = Template.from_stack(stack)
+
+    health_check, = template.find_resources("AWS::Route53::HealthCheck")
+    load_balancer_id, = template.find_resources("AWS::ElasticLoadBalancingV2::LoadBalancer")
+    template.has_resource_properties("AWS::Route53::HealthCheck", {
+        "HealthCheckConfig": {
+            "Type": "HTTPS",
+            "FullyQualifiedDomainName": {"Fn::GetAtt": [load_balancer_id, "DNSName"]},
+            "Port": 443,
+            "ResourcePath": "/actuator/health",
+            "RequestInterval": 30,
+            "FailureThreshold": 3,
+        },
+    })
+    template.has_resource_properties("AWS::Route53::RecordSet", {
+        "Name": f"{BE_DOMAIN}.",
+        "Type": "A",
+        "Region": "eu-west-1",
+        "SetIdentifier": "eu-west-1",
+        "HealthCheckId": {"Fn::GetAtt": [health_check, "HealthCheckId"]},
+    })
+
+
+def test_single_region_record_is_a_plain_alias():
+    stack = backend_stack("eu-west-1")
+    stack.create_dns_record(stack.fetch_hosted_zone(), load_balancer(stack), BE_DOMAIN)
+    template = Template.from_stack(stack)
+
+    template.resource_count_is("AWS::Route53::HealthCheck", 0)
+    record, = template.find_resources("AWS::Route53::RecordSet").values()
+    assert "SetIdentifier" not in record["Properties"]
+
+
+def test_api_distribution_cannot_be_latency_routed():
+    stack = backend_stack("eu-west-1")
+    alb = load_balancer(stack)
+    distribution = cf.Distribution(stack, "Distribution", default_behavior=cf.BehaviorOptions(
+        origin=cfo.LoadBalancerV2Origin(alb),
+    ))
+
+    with pytest.raises(ValueError, match="Latency routing"):
+        stack.create_dns_record(stack.fetch_hosted_zone(), alb, BE_DOMAIN, distribution, latency_routing=True)
+
+
+def test_cognito_clients_are_only_created_in_the_primary_region():
+    stack = backend_stack("us-east-1")
+    user_pool = stack.fetch_authentication_server()
+
+    assert stack.create_server_authentication_client(user_pool, "Acc", BE_DOMAIN) is None
+    assert stack.create_swagger_authentication_client(user_pool, BE_DOMAIN, "Acc") is None
+    Template.from_stack(stack).resource_count_is("AWS::Cognito::UserPoolClient", 0)
+
+
+def test_regions_need_their_own_certificate_and_registry():
+    stack = backend_stack("us-east-1")
+
+    with pytest.raises(ValueError, match="No regional ssl certificate configured for region us-east-1"):
+        stack.fetch_regional_ssl_cert()
+    with pytest.raises(ValueError, match="No backend registry configured for region us-east-1"):
+        stack.fetch_registry()
@@ -0,0 +1,58 @@
+from aws_cdk.assertions import Match
+
+from project.application import acceptance_backend, production_backend
+
+
+def seconds(duration):
+    return int(duration.to_seconds())
+
+
+def target_group(rollout):
+    return {
+        "HealthCheckIntervalSeconds": seconds(rollout.health_check_interval),
+        "HealthCheckTimeoutSeconds": seconds(rollout.health_check_timeout),
+        "HealthyThresholdCount": rollout.healthy_threshold,
+        "UnhealthyThresholdCount": rollout.unhealthy_threshold,
+        "TargetGroupAttributes": Match.array_with([
+            {"Key": "deregistration_delay.timeout_seconds", "Value": str(seconds(rollout.deregistration_delay))},
+            {"Key": "slow_start.duration_seconds", "Value": str(seconds(rollout.slow_start))},
+        ]),
+    }
+
+
+def test_target_groups_follow_the_rollout_profile(stack_template):
+    for name, rollout, count in (
+            ("ProductionBackend", production_backend.ROLLOUT, 2),
+            ("AcceptanceBackend", acceptance_backend.ROLLOUT, 1),
+    ):
+        template = stack_template(name)
+        groups = template.find_resources("AWS::ElasticLoadBalancingV2::TargetGroup", {
+            "Properties": target_group(rollout),
+        })
+        assert len(groups) == count
+
+
+def test_acceptance_rolls_back_through_the_circuit_breaker(stack_template):
+    rollout = acceptance_backend.ROLLOUT
+
+    stack_template("AcceptanceBackend").has_resource_properties("AWS::ECS::Service", {
+        "DeploymentConfiguration": Match.object_like({
+            "DeploymentCircuitBreaker": {"Enable": True, "Rollback": True},
+            "MinimumHealthyPercent": rollout.min_healthy_percent,
+            "MaximumPercent": rollout.max_healthy_percent,
+        }),
+        "HealthCheckGracePeriodSeconds": seconds(rollout.health_check_grace_period),
+    })
+
+
+def test_production_keeps_full_capacity_during_blue_green_deployments(stack_template):
+    rollout = production_backend.ROLLOUT
+
+    stack_template("ProductionBackend").has_resource_properties("AWS::ECS::Service", {
+        "DeploymentConfiguration": {
+            "MinimumHealthyPercent": rollout.min_healthy_percent,
+            "MaximumPercent": rollout.max_healthy_percent,
+        },
+        "DeploymentController": {"Type": "CODE_DEPLOY"},
+        "HealthCheckGracePeriodSeconds": seconds(rollout.health_check_grace_period),
+    })
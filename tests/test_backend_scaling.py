@@ -0,0 +1,55 @@
+from aws_cdk.assertions import Match
+
+from project.application import acceptance_backend, production_backend
+
+
+def scaling_policy(metric_type, target_value, scaling):
+    return {
+        "PolicyType": "TargetTrackingScaling",
+        "TargetTrackingScalingPolicyConfiguration": Match.object_like({
+            "PredefinedMetricSpecification": Match.object_like({"PredefinedMetricType": metric_type}),
+            "TargetValue": target_value,
+            "ScaleInCooldown": int(scaling.scale_in_cooldown.to_seconds()),
+            "ScaleOutCooldown": int(scaling.scale_out_cooldown.to_seconds()),
+        }),
+    }
+
+
+def test_production_scales_on_cpu_memory_and_requests(stack_template):
+    template = stack_template("ProductionBackend")
+    scaling = production_backend.SCALING
+
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "ScalableDimension": "ecs:service:DesiredCount",
+        "MinCapacity": scaling.min_capacity,
+        "MaxCapacity": scaling.max_capacity,
+    })
+    template.resource_count_is("AWS::ApplicationAutoScaling::ScalingPolicy", 3)
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalingPolicy", scaling_policy(
+        "ECSServiceAverageCPUUtilization", scaling.cpu_target_percent, scaling,
+    ))
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalingPolicy", scaling_policy(
+        "ECSServiceAverageMemoryUtilization", scaling.memory_target_percent, scaling,
+    ))
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalingPolicy", scaling_policy(
+        "ALBRequestCountPerTarget", scaling.requests_per_target, scaling,
+    ))
+
+
+def test_acceptance_scales_without_request_target(stack_template):
+    template = stack_template("AcceptanceBackend")
+    scaling = acceptance_backend.SCALING
+
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalableTarget", {
+        "MinCapacity": scaling.min_capacity,
+        "MaxCapacity": scaling.max_capacity,
+    })
+    template.resource_count_is("AWS::ApplicationAutoScaling::ScalingPolicy", 2)
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalingPolicy", scaling_policy(
+        "ECSServiceAverageCPUUtilization", scaling.cpu_target_percent, scaling,
+    ))
+
+
+def test_scaled_services_leave_the_task_count_to_auto_scaling(stack_template):
+    for name in ("ProductionBackend", "AcceptanceBackend"):
+        stack_template(name).has_resource_properties("AWS::ECS::Service", {"DesiredCount": Match.absent()})
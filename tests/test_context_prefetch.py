@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from project.stack_registry import select_stacks
+from project.tooling.cdk_context import CDK_CONTEXT_JSON, cached_account
+from project.tooling.context_prefetch import (
+    METADATA_CONTEXT_KEY,
+    PROVIDER_TTLS,
+    Lookup,
+    StandInProvider,
+    check,
+    offline_problems,
+    prefetch,
+    read_context_file,
+)
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+ZONES_KEY = "availability-zones:account=111111111111:region=eu-west-1"
+OTHER_REGION_KEY = "availability-zones:account=111111111111:region=us-east-1"
+TOOLKIT_KEY = "hosted-zone:account=111111111111:domainName=example.com:region=eu-west-1"
+
+
+def test_offline_problems_report_missing_and_expired_lookups_of_the_environments():
+    context = {
+        ZONES_KEY: ["eu-west-1a"],
+        OTHER_REGION_KEY: ["us-east-1a"],
+        TOOLKIT_KEY: {"Id": "/hostedzone/Z1", "Name": "example.com."},
+        METADATA_CONTEXT_KEY: {
+            ZONES_KEY: {"expires_at": "2025-12-31T00:00:00Z"},
+            OTHER_REGION_KEY: {"expires_at": "2025-12-31T00:00:00Z"},
+        },
+    }
+    missing = [Lookup("hosted-zone:account=111111111111:domainName=other.com:region=eu-west-1", "hosted-zone", {})]
+
+    problems = offline_problems(missing, context, {("111111111111", "eu-west-1")}, NOW)
+
+    # Entries of other environments are not checked, and entries the toolkit cached never expire
+    assert problems == [
+        f"missing {missing[0].key}",
+        f"expired {ZONES_KEY} at 2025-12-31T00:00:00Z",
+    ]
+    assert offline_problems([], context, {("111111111111", "eu-west-1")}, NOW - timedelta(days=2)) == []
+
+
+@pytest.fixture(scope="module")
+def stacks():
+    context = read_context_file(CDK_CONTEXT_JSON)
+    return select_stacks("AcceptanceBackend"), cached_account(context), context
+
+
+def test_prefetch_fetches_caches_expires_and_refreshes(stacks, tmp_path):
+    entries, account, current = stacks
+    stand_in = StandInProvider(current)
+    context_file = tmp_path / "cdk.context.json"
+
+    problems = check(entries, account, context_file, NOW)
+    assert problems and all(problem.startswith("missing ") for problem in problems)
+
+    first = prefetch(entries, account, stand_in, context_file, NOW)
+    assert len(first.fetched) == len(problems) and first.cached == []
+    # All lookups are resolved in a single pass
+    assert len(stand_in.requests) == 1
+    assert check(entries, account, context_file, NOW) == []
+
+    second = prefetch(entries, account, stand_in, context_file, NOW)
+    assert second.fetched == [] and sorted(second.cached) == sorted(first.fetched)
+    assert len(stand_in.requests) == 1
+
+    later = NOW + max(PROVIDER_TTLS.values()) + timedelta(days=1)
+    expired = check(entries, account, context_file, later)
+    assert len(expired) == len(first.fetched)
+    assert all(problem.startswith("expired ") for problem in expired)
+
+    third = prefetch(entries, account, stand_in, context_file, later)
+    assert sorted(third.fetched) == sorted(first.fetched)
+    assert check(entries, account, context_file, later) == []
+
+    metadata = read_context_file(context_file)[METADATA_CONTEXT_KEY]
+    assert {entry["fetched_at"] for entry in metadata.values()} == {"2026-02-01T00:00:00Z"}
+
+
+def test_refresh_fetches_lookups_that_did_not_expire(stacks, tmp_path):
+    entries, account, current = stacks
+    context_file = tmp_path / "cdk.context.json"
+    prefetch(entries, account, StandInProvider(current), context_file, NOW)
+
+    stand_in = StandInProvider(current)
+    refreshed = prefetch(entries, account, stand_in, context_file, NOW, refresh=True)
+
+    assert refreshed.fetched and refreshed.cached == []
+    assert len(stand_in.requests) == 1
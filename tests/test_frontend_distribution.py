@@ -0,0 +1,78 @@
+from aws_cdk.assertions import Match
+
+from project.application import acceptance_frontend, production_frontend
+
+
+def cache_policy(ttl):
+    seconds = int(ttl.to_seconds())
+    return {
+        "CachePolicyConfig": Match.object_like({
+            "DefaultTTL": seconds,
+            "MaxTTL": seconds,
+            "ParametersInCacheKeyAndForwardedToOrigin": Match.object_like({
+                "EnableAcceptEncodingBrotli": True,
+                "EnableAcceptEncodingGzip": True,
+            }),
+        }),
+    }
+
+
+def distribution_config(template):
+    distribution, = template.find_resources("AWS::CloudFront::Distribution").values()
+    return distribution["Properties"]["DistributionConfig"]
+
+
+def test_behaviors_are_cached_per_profile(stack_template):
+    for name, distribution in (
+            ("ProductionFrontend", production_frontend.DISTRIBUTION),
+            ("AcceptanceFrontend", acceptance_frontend.DISTRIBUTION),
+    ):
+        template = stack_template(name)
+        for ttl in (distribution.static_asset_ttl, distribution.index_ttl, distribution.default_ttl):
+            template.has_resource_properties("AWS::CloudFront::CachePolicy", cache_policy(ttl))
+
+        config = distribution_config(template)
+        behaviors = {behavior["PathPattern"]: behavior for behavior in config["CacheBehaviors"]}
+        assert set(behaviors) == {"/index.html", *distribution.static_asset_paths}
+        for behavior in [*behaviors.values(), config["DefaultCacheBehavior"]]:
+            assert behavior["Compress"] is distribution.compress
+            assert behavior["ViewerProtocolPolicy"] == "redirect-to-https"
+
+        static_policies = {behaviors[path]["CachePolicyId"]["Ref"] for path in distribution.static_asset_paths}
+        assert len(static_policies) == 1
+        assert static_policies.isdisjoint({
+            behaviors["/index.html"]["CachePolicyId"]["Ref"],
+            config["DefaultCacheBehavior"]["CachePolicyId"]["Ref"],
+        })
+
+
+def test_distributions_serve_http3(stack_template):
+    for name in ("ProductionFrontend", "AcceptanceFrontend"):
+        stack_template(name).has_resource_properties("AWS::CloudFront::Distribution", {
+            "DistributionConfig": Match.object_like({"HttpVersion": "http2and3", "IPV6Enabled": True}),
+        })
+
+
+def test_origin_shield_only_in_production(stack_template):
+    production, = distribution_config(stack_template("ProductionFrontend"))["Origins"]
+    assert production["OriginShield"] == {
+        "Enabled": True,
+        "OriginShieldRegion": production_frontend.DISTRIBUTION.origin_shield_region,
+    }
+
+    acceptance, = distribution_config(stack_template("AcceptanceFrontend"))["Origins"]
+    assert acceptance["OriginShield"] == {"Enabled": False}
+    assert acceptance_frontend.DISTRIBUTION.origin_shield_region is None
+
+
+def test_only_the_default_behavior_runs_the_viewer_request_function(stack_template):
+    for name in ("ProductionFrontend", "AcceptanceFrontend"):
+        template = stack_template(name)
+        function, = template.find_resources("AWS::CloudFront::Function")
+        config = distribution_config(template)
+
+        assert config["DefaultCacheBehavior"]["FunctionAssociations"] == [{
+            "EventType": "viewer-request",
+            "FunctionARN": {"Fn::GetAtt": [function, "FunctionARN"]},
+        }]
+        assert all("FunctionAssociations" not in behavior for behavior in config["CacheBehaviors"])
@@ -0,0 +1,99 @@
+import json
+
+from aws_cdk.assertions import Match
+
+from project.application.base.profiles import PUBLISHER_PREFIX, DistributionProfile
+from project.tooling.frontend_publisher import (
+    MANIFEST_KEY,
+    DirectoryObjectStore,
+    FrontendPublisher,
+    ManifestEntry,
+)
+
+INDEX = b"<html><script src='/assets/app.1a2b3c.js'></script></html>" * 50
+BUNDLE = b"console.log('frontend');" * 100
+
+
+def build(build_dir, files):
+    for key, body in files.items():
+        path = build_dir / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+    return build_dir
+
+
+def test_directory_store_keeps_body_and_metadata(tmp_path):
+    store = DirectoryObjectStore(tmp_path / "bucket")
+    entry = ManifestEntry(digest="abc", content_type="text/html", cache_control="no-cache")
+
+    assert store.read("index.html") is None
+
+    store.write("docs/index.html", b"<html></html>", entry)
+
+    assert store.read("docs/index.html") == b"<html></html>"
+    metadata = json.loads((tmp_path / "bucket" / "docs" / "index.html.metadata.json").read_text())
+    assert ManifestEntry(**metadata) == entry
+
+
+def test_publish_uploads_files_uncompressed(tmp_path):
+    store = DirectoryObjectStore(tmp_path / "bucket")
+    build_dir = build(tmp_path / "v1", {"index.html": INDEX, "assets/app.1a2b3c.js": BUNDLE})
+
+    result = FrontendPublisher(store, DistributionProfile()).publish(build_dir)
+
+    assert result.uploaded == ["assets/app.1a2b3c.js", "index.html"]
+    assert result.invalidated == ["/", "/index.html"]
+    assert store.read("index.html") == INDEX
+    assert store.read("assets/app.1a2b3c.js") == BUNDLE
+    assert json.loads(store.read(MANIFEST_KEY))["assets/app.1a2b3c.js"]["cache_control"] == (
+        "public, max-age=31536000, immutable"
+    )
+
+
+def test_publish_skips_unchanged_files(tmp_path):
+    store = DirectoryObjectStore(tmp_path / "bucket")
+    publisher = FrontendPublisher(store, DistributionProfile())
+    publisher.publish(build(tmp_path / "v1", {"index.html": INDEX, "assets/app.1a2b3c.js": BUNDLE}))
+
+    result = publisher.publish(build(tmp_path / "v2", {"index.html": INDEX + b"<!-- v2 -->"}))
+
+    assert result.uploaded == ["index.html"]
+    assert result.unchanged == []
+    assert result.invalidated == ["/", "/index.html"]
+    assert "assets/app.1a2b3c.js" in json.loads(store.read(MANIFEST_KEY))
+
+
+def test_publish_reuploads_files_of_gzip_manifests(tmp_path):
+    store = DirectoryObjectStore(tmp_path / "bucket")
+    previous = dict(digest="gzipped", content_type="text/html", cache_control="no-cache", content_encoding="gzip")
+    store.write(MANIFEST_KEY, json.dumps({"index.html": previous}).encode(), ManifestEntry("", "", ""))
+
+    result = FrontendPublisher(store, DistributionProfile()).publish(build(tmp_path / "v1", {"index.html": INDEX}))
+
+    assert result.uploaded == ["index.html"]
+    assert "content_encoding" not in json.loads(store.read(MANIFEST_KEY))["index.html"]
+
+
+def test_publish_keeps_publisher_objects_of_the_build_out_of_the_bucket(tmp_path):
+    store = DirectoryObjectStore(tmp_path / "bucket")
+    build_dir = build(tmp_path / "v1", {"index.html": INDEX, MANIFEST_KEY: b"{}"})
+
+    result = FrontendPublisher(store, DistributionProfile()).publish(build_dir)
+
+    assert result.uploaded == ["index.html"]
+    assert list(json.loads(store.read(MANIFEST_KEY))) == ["index.html"]
+
+
+def test_manifest_is_not_readable_through_the_distribution(stack_template):
+    assert MANIFEST_KEY.startswith(PUBLISHER_PREFIX)
+
+    for name in ("ProductionFrontend", "AcceptanceFrontend"):
+        stack_template(name).has_resource_properties("AWS::S3::BucketPolicy", {
+            "PolicyDocument": {"Statement": Match.array_with([Match.object_like({
+                "Effect": "Deny",
+                "Action": "s3:GetObject",
+                "Principal": {"AWS": "*"},
+                "Resource": {"Fn::Join": ["", [Match.any_value(), f"/{PUBLISHER_PREFIX}*"]]},
+                "Condition": {"StringNotEquals": {"aws:PrincipalAccount": Match.any_value()}},
+            })])},
+        })
@@ -0,0 +1,225 @@
+import asyncio
+
+import pytest
+
+from project.tooling.capacity_advisor import recommend, sustainable_stage
+from project.tooling import load_test
+from project.tooling.load_test import LatencyHistogram, RequestSpec, run_stage
+
+TARGET = {"tasks": 1, "cpu": 1024, "memory_limit_mib": 2048}
+
+
+def stage(concurrency, throughput_rps, p99, error_rate=0.0):
+    return {
+        "concurrency": concurrency,
+        "throughput_rps": throughput_rps,
+        "error_rate": error_rate,
+        "latency_ms": {"p99": p99},
+    }
+
+
+def load_test_results(*stages, target=TARGET):
+    return {"target": target, "stages": list(stages)}
+
+
+# The throughput levels off at 200 rps from 8 clients on, while the latency keeps growing
+RESULTS = load_test_results(
+    stage(4, 100.0, 50.0),
+    stage(8, 200.0, 90.0),
+    stage(16, 210.0, 400.0),
+    stage(32, 205.0, 900.0, error_rate=0.01),
+)
+
+
+def test_small_latencies_are_recorded_exactly():
+    histogram = LatencyHistogram()
+    for value in range(1, 101):
+        histogram.record(value)
+
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 50
+    assert histogram.percentile(99) == 99
+    assert histogram.percentile(100) == 100
+    assert histogram.mean() == 50.5
+
+
+def test_large_latencies_keep_their_relative_precision():
+    histogram = LatencyHistogram()
+    for value in (1_000_000, 1_000_001, 2_500_000):
+        histogram.record(value)
+
+    assert 1_000_001 <= histogram.percentile(50) <= 1_001_000
+    assert 2_500_000 <= histogram.percentile(100) <= 2_502_500
+
+
+def test_histograms_merge_and_round_trip_through_json():
+    first, second = LatencyHistogram(), LatencyHistogram()
+    first.record(10)
+    second.record(30)
+    first.merge(second)
+
+    restored = LatencyHistogram.from_json(first.to_json())
+    assert restored.buckets == first.buckets
+    assert restored.percentile(100) == 30
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("orders=GET:/api/orders:3", RequestSpec("orders", "GET", "/api/orders", 3)),
+    ("health=get:/actuator/health", RequestSpec("health", "GET", "/actuator/health", 1)),
+    ("item=GET:/items/a:b", RequestSpec("item", "GET", "/items/a:b", 1)),
+])
+def test_request_specs_are_parsed(value, expected):
+    assert RequestSpec.parse(value) == expected
+
+
+@pytest.mark.parametrize("value", ["GET:/api/orders", "orders=GET", "orders=GET:api/orders"])
+def test_malformed_request_specs_are_rejected(value):
+    with pytest.raises(ValueError):
+        RequestSpec.parse(value)
+
+
+def test_sustainable_stage_is_the_busiest_stage_within_the_objective():
+    assert sustainable_stage(RESULTS, p99_slo_ms=250, max_error_rate=0.001)["concurrency"] == 8
+    assert sustainable_stage(RESULTS, p99_slo_ms=1000, max_error_rate=0.001)["concurrency"] == 16
+    assert sustainable_stage(RESULTS, p99_slo_ms=1000, max_error_rate=0.05)["concurrency"] == 16
+    assert sustainable_stage(RESULTS, p99_slo_ms=10, max_error_rate=0.001) is None
+
+
+def test_recommendation_keeps_headroom_below_the_knee():
+    recommendation = recommend(RESULTS, p99_slo_ms=250, max_error_rate=0.001, baseline_rps=40, peak_rps=300,
+                               cpu_at_knee=60)
+
+    assert recommendation.knee_found
+    assert recommendation.task_capacity_rps == 200.0
+    assert (recommendation.cpu, recommendation.memory_limit_mib) == (1024, 2048)
+    # 70% of 200 rps leaves 140 rps per task
+    assert (recommendation.min_capacity, recommendation.max_capacity) == (2, 3)
+    assert recommendation.requests_per_target == 8400
+    assert recommendation.cpu_target_percent == 42
+    assert recommendation.notes == []
+
+
+def test_recommendation_enlarges_tasks_for_a_peak_beyond_max_tasks():
+    recommendation = recommend(RESULTS, p99_slo_ms=250, max_error_rate=0.001, baseline_rps=40, peak_rps=3000)
+
+    assert (recommendation.cpu, recommendation.memory_limit_mib) == (4096, 8192)
+    assert recommendation.max_capacity == 6
+    assert recommendation.cpu_target_percent is None
+    assert any("Enlarged the task to 4096 cpu units" in note for note in recommendation.notes)
+
+
+def test_recommendation_without_a_knee_is_a_lower_bound():
+    results = load_test_results(stage(4, 100.0, 50.0), stage(8, 200.0, 90.0))
+    recommendation = recommend(results, p99_slo_ms=250, max_error_rate=0.001, baseline_rps=40, peak_rps=300)
+
+    assert not recommendation.knee_found
+    assert recommendation.notes == ["The last stage still met the objective, so the task capacity is a lower bound"]
+
+
+def test_recommendation_needs_a_passing_stage_and_the_task_size():
+    with pytest.raises(ValueError, match="No stage met"):
+        recommend(RESULTS, p99_slo_ms=10, max_error_rate=0.001, baseline_rps=40, peak_rps=300)
+    with pytest.raises(ValueError, match="task size under test"):
+        recommend(load_test_results(*RESULTS["stages"], target={"tasks": 1}), p99_slo_ms=250,
+                  max_error_rate=0.001, baseline_rps=40, peak_rps=300)
+
+
+async def start_stub_server(workers: int, service_time: float) -> asyncio.AbstractServer:
+    """
+    Starts a local server that handles at most `workers` requests at a time, each taking `service_time`
+    seconds, so it saturates at workers / service_time requests per second like a task with a fixed capacity.
+    Requests for /truncated get a response that is cut off by closing the connection.
+    """
+    slots = asyncio.Semaphore(workers)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while request_line := await reader.readline():
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                await reader.readexactly(length)
+
+                async with slots:
+                    await asyncio.sleep(service_time)
+
+                if b" /truncated" in request_line:
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nok")
+                    await writer.drain()
+                    break
+
+                status = b"404 Not Found" if b" /missing" in request_line else b"200 OK"
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Length: 2\r\nContent-Type: text/plain\r\n\r\nok")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def test_stage_against_a_stub_server():
+    workers, service_time = 4, 0.01
+    mix = [
+        RequestSpec("fast", "GET", "/fast", 3),
+        RequestSpec("post", "POST", "/items", 1, body="{}"),
+        RequestSpec("missing", "GET", "/missing", 1),
+        RequestSpec("truncated", "GET", "/truncated", 1),
+    ]
+
+    async def run() -> dict:
+        server = await start_stub_server(workers, service_time)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await run_stage(f"http://127.0.0.1:{port}", mix, concurrency=2 * workers, duration=0.5,
+                                   warmup=0.1, timeout=5.0)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    result = asyncio.run(run())
+    by_name = result["requests_by_name"]
+
+    # The stub never serves more than its workers allow
+    assert 0 < result["throughput_rps"] <= 1.1 * workers / service_time
+    assert by_name["fast"]["statuses"] == {"200": by_name["fast"]["requests"]}
+    assert by_name["post"]["statuses"] == {"200": by_name["post"]["requests"]}
+    assert by_name["missing"]["statuses"] == {"404": by_name["missing"]["requests"]}
+    assert by_name["missing"]["errors"] == 0
+    # Cut off responses fail, and the client reconnects for its next request
+    assert by_name["truncated"]["requests"] > 0
+    assert by_name["truncated"]["statuses"] == {"failed": by_name["truncated"]["requests"]}
+    assert result["errors"] == by_name["truncated"]["requests"]
+
+
+@pytest.mark.parametrize("cpu", [768, 8192])
+def test_recommendation_rejects_task_sizes_fargate_does_not_have(cpu):
+    results = load_test_results(*RESULTS["stages"], target={"tasks": 1, "cpu": cpu, "memory_limit_mib": 2048})
+
+    with pytest.raises(ValueError, match=f"{cpu} cpu units"):
+        recommend(results, p99_slo_ms=250, max_error_rate=0.001, baseline_rps=40, peak_rps=300)
+
+
+def test_recommendation_rejects_a_sustainable_stage_without_throughput():
+    results = load_test_results(stage(4, 0.0, 0.0), stage(8, 0.0, 0.0))
+
+    with pytest.raises(ValueError, match="without serving any requests"):
+        recommend(results, p99_slo_ms=250, max_error_rate=0.001, baseline_rps=40, peak_rps=300)
+
+
+def test_enlarged_tasks_stop_at_the_largest_fargate_size():
+    recommendation = recommend(RESULTS, p99_slo_ms=250, max_error_rate=0.001, baseline_rps=40, peak_rps=30000)
+
+    assert recommendation.cpu == 4096
+    assert recommendation.max_capacity == 54
+    assert recommendation.notes[-1] == "The peak needs 54 tasks even at the largest task size"
+
+
+def test_load_test_rejects_task_sizes_fargate_does_not_have(capsys):
+    with pytest.raises(SystemExit):
+        load_test.main(["http://127.0.0.1:1", "-r", "get=GET:/", "--cpu", "768"])
+    assert "--cpu must be one of" in capsys.readouterr().err
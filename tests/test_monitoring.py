@@ -0,0 +1,109 @@
+import json
+import re
+
+from project.application import acceptance_backend, acceptance_frontend, production_backend, production_frontend
+
+BACKENDS = (
+    ("ProductionBackend", production_backend),
+    ("AcceptanceBackend", acceptance_backend),
+)
+
+FRONTENDS = (
+    ("ProductionFrontend", production_frontend.CLUSTER_NAME, production_frontend.MONITORING),
+    ("AcceptanceFrontend", acceptance_frontend.CLUSTER_NAME, acceptance_frontend.MONITORING),
+)
+
+
+def alarm(template, name):
+    properties, = (
+        resource["Properties"]
+        for logical_id, resource in template.find_resources("AWS::CloudWatch::Alarm").items()
+        if re.fullmatch(f"{name}[0-9A-F]{{8}}", logical_id)
+    )
+    return properties
+
+
+def dashboard_body(template):
+    dashboard, = template.find_resources("AWS::CloudWatch::Dashboard").values()
+    separator, parts = dashboard["Properties"]["DashboardBody"]["Fn::Join"]
+    # References are replaced by a string, which keeps the body valid json
+    return json.loads(separator.join(part if isinstance(part, str) else "ref" for part in parts))
+
+
+def widget_titles(body):
+    return [widget["properties"]["title"] for widget in body["widgets"]]
+
+
+def cloudfront_titles(monitoring):
+    titles = ["CloudFront requests", "CloudFront 5xx error rate"]
+    if monitoring.cloudfront_additional_metrics:
+        titles += ["CloudFront cache hit rate", "CloudFront origin latency"]
+    return titles
+
+
+def test_backend_alarms_follow_the_monitoring_profile(stack_template):
+    for name, backend in BACKENDS:
+        template = stack_template(name)
+        monitoring = backend.MONITORING
+        topic, = template.find_resources("AWS::SNS::Topic")
+        thresholds = dict(
+            Latency=monitoring.latency_p99_threshold.to_seconds(),
+            TargetErrors=monitoring.server_error_threshold,
+            LoadBalancerErrors=monitoring.server_error_threshold,
+            Cpu=monitoring.cpu_threshold_percent,
+            Memory=monitoring.memory_threshold_percent,
+            CacheCpu=backend.CACHE.engine_cpu_threshold_percent,
+            CacheMemory=backend.CACHE.memory_threshold_percent,
+        )
+
+        for alarm_name, threshold in thresholds.items():
+            properties = alarm(template, f"{backend.CLUSTER_NAME}Backend{alarm_name}Alarm")
+            assert properties["Threshold"] == threshold, alarm_name
+            assert properties["EvaluationPeriods"] == monitoring.evaluation_periods
+            assert properties["ComparisonOperator"] == "GreaterThanThreshold"
+            assert properties["TreatMissingData"] == "notBreaching"
+            assert properties["AlarmActions"] == [{"Ref": topic}]
+
+
+def test_latency_alarm_watches_the_p99(stack_template):
+    properties = alarm(stack_template("ProductionBackend"), "PrdBackendLatencyAlarm")
+
+    metric, = properties["Metrics"]
+    assert metric["MetricStat"]["Metric"]["MetricName"] == "TargetResponseTime"
+    assert metric["MetricStat"]["Stat"] == "p99"
+    assert metric["MetricStat"]["Period"] == int(production_backend.MONITORING.period.to_seconds())
+
+
+def test_backend_dashboards_show_latency_traffic_errors_and_saturation(stack_template):
+    for name, backend in BACKENDS:
+        template = stack_template(name)
+        template.has_resource_properties("AWS::CloudWatch::Dashboard", {
+            "DashboardName": f"{backend.CLUSTER_NAME}Backend",
+        })
+
+        titles = widget_titles(dashboard_body(template))
+        assert titles[:4] == ["Target response time", "Requests", "5xx responses", "Utilization"]
+        assert "Cache CacheHitRate" in titles
+
+    # Only production has an api distribution, whose metrics follow those of the service
+    production = widget_titles(dashboard_body(stack_template("ProductionBackend")))
+    assert production[-4:] == cloudfront_titles(production_backend.MONITORING)
+    assert not any(title.startswith("CloudFront") for title in widget_titles(dashboard_body(
+        stack_template("AcceptanceBackend"),
+    )))
+
+
+def test_frontend_dashboards_read_cloudfront_metrics_in_us_east_1(stack_template):
+    for name, cluster_name, monitoring in FRONTENDS:
+        template = stack_template(name)
+        template.has_resource_properties("AWS::CloudWatch::Dashboard", {"DashboardName": f"{cluster_name}Frontend"})
+        template.resource_count_is("AWS::CloudWatch::Alarm", 0)
+        template.resource_count_is(
+            "AWS::CloudFront::MonitoringSubscription", 1 if monitoring.cloudfront_additional_metrics else 0,
+        )
+
+        body = dashboard_body(template)
+        assert widget_titles(body) == cloudfront_titles(monitoring)
+        assert {
+            metric[-1]["region"] for widget in body["widgets"] for metric in widget["properties"]["metrics"]
+        } == {"us-east-1"}
@@ -0,0 +1,20 @@
+from project.tooling import parallel_synth
+
+
+def test_parallel_synth_matches_app_synth(tmp_path, monkeypatch, capsys):
+    monkeypatch.delenv("CDK_CONTEXT_JSON", raising=False)
+    monkeypatch.delenv("CONTEXT_OVERFLOW_LOCATION_ENV", raising=False)
+
+    exit_code = parallel_synth.main([
+        "-s", "Permissions,ImageRegistries",
+        "-j", "2",
+        "-o", str(tmp_path / "cdk.out"),
+        "-c", f"synth-cache={tmp_path / 'cache'}",
+        "--compare",
+    ])
+
+    assert exit_code == 0, capsys.readouterr().err
+    assert {path.name for path in (tmp_path / "cdk.out").glob("*.template.json")} == {
+        "Permissions.template.json",
+        "ImageRegistries.template.json",
+    }
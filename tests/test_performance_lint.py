@@ -0,0 +1,71 @@
+import aws_cdk as cdk
+import aws_cdk.aws_cloudfront as cf
+import aws_cdk.aws_cloudfront_origins as cfo
+import aws_cdk.aws_ecs as ecs
+import pytest
+from aws_cdk import Size
+
+from project.application.base.profiles import MonitoringProfile
+from project.performance_lint import (
+    FIXED_DESIRED_COUNT,
+    SMALL_LOG_BUFFER,
+    UNCACHED_BEHAVIOR,
+    PerformanceLint,
+    suppress,
+    synth_with_lint,
+)
+
+
+def log_buffer_findings(buffer_size):
+    app = cdk.App()
+    stack = cdk.Stack(app, "Stack")
+    task = ecs.FargateTaskDefinition(stack, "Task")
+    task.add_container(
+        "Container",
+        image=ecs.ContainerImage.from_registry("backend:1.0.0"),
+        logging=ecs.LogDrivers.aws_logs(
+            stream_prefix="backend",
+            mode=ecs.AwsLogDriverMode.NON_BLOCKING,
+            max_buffer_size=buffer_size,
+        ),
+    )
+
+    lint = PerformanceLint()
+    synth_with_lint(app, lint)
+    return [finding for finding in lint.findings if finding.rule == SMALL_LOG_BUFFER]
+
+
+@pytest.mark.parametrize("buffer_size", [Size.mebibytes(1), Size.mebibytes(2)])
+def test_small_log_buffers_are_reported(buffer_size):
+    assert len(log_buffer_findings(buffer_size)) == 1
+
+
+def test_default_log_buffer_is_not_reported():
+    assert log_buffer_findings(MonitoringProfile().log_buffer_size) == []
+
+
+def test_findings_are_annotations_in_the_synthesized_assembly():
+    app = cdk.App()
+    stack = cdk.Stack(app, "Stack")
+    cf.Distribution(
+        stack, "Distribution",
+        default_behavior=cf.BehaviorOptions(origin=cfo.HttpOrigin("example.com"), compress=False),
+    )
+    service = ecs.CfnService(stack, "Service", desired_count=3)
+    # Rules read the synthesized template, so overrides are taken into account
+    service.add_property_override("DesiredCount", 5)
+    suppress(ecs.CfnService(stack, "Suppressed"), FIXED_DESIRED_COUNT, "scaled outside of the stack")
+
+    lint = PerformanceLint()
+    assembly = synth_with_lint(app, lint)
+
+    assert [(finding.rule, finding.path, finding.message) for finding in lint.findings] == [
+        (UNCACHED_BEHAVIOR, "Stack/Distribution/Resource", "Behavior * does not compress responses"),
+        (FIXED_DESIRED_COUNT, "Stack/Service", "Service runs a fixed 5 tasks without auto scaling"),
+    ]
+
+    annotations = assembly.get_stack_artifact("Stack").messages
+    assert sorted((message.id, message.level.name) for message in annotations) == [
+        ("/Stack/Distribution/Resource", "ERROR"),
+        ("/Stack/Service", "WARNING"),
+    ]
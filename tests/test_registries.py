@@ -0,0 +1,67 @@
+import json
+
+import aws_cdk as cdk
+from aws_cdk.assertions import Template
+
+from app_config import PRIMARY_REGION
+from project.infrastructure import registries
+from project.infrastructure.registries import Registries
+from project.tooling.cdk_context import cached_account, load_context
+
+
+def lifecycle_rules(template):
+    repository, = template.find_resources("AWS::ECR::Repository").values()
+    return json.loads(repository["Properties"]["LifecyclePolicy"]["LifecyclePolicyText"])["rules"]
+
+
+def test_tags_are_immutable_and_scanned(stack_template):
+    stack_template("ImageRegistries").has_resource_properties("AWS::ECR::Repository", {
+        "RepositoryName": registries.REPOSITORY_NAME,
+        "ImageTagMutability": "IMMUTABLE",
+        "ImageScanningConfiguration": {"ScanOnPush": True},
+    })
+
+
+def test_untagged_and_old_build_images_expire(stack_template):
+    untagged, builds = lifecycle_rules(stack_template("ImageRegistries"))
+
+    assert (untagged["rulePriority"], untagged["selection"]) == (1, {
+        "tagStatus": "untagged",
+        "countType": "sinceImagePushed",
+        "countNumber": int(registries.UNTAGGED_IMAGE_AGE.to_days()),
+        "countUnit": "days",
+    })
+    assert (builds["rulePriority"], builds["selection"]) == (2, {
+        "tagStatus": "tagged",
+        "tagPrefixList": [registries.BUILD_TAG_PREFIX],
+        "countType": "imageCountMoreThan",
+        "countNumber": registries.MAX_BUILD_IMAGE_COUNT,
+    })
+    # Release versions are tagged without the build prefix, so no rule ever expires them
+    assert {rule["action"]["type"] for rule in (untagged, builds)} == {"expire"}
+
+
+def test_single_region_registry_is_not_replicated(stack_template):
+    assert registries.REPLICA_REGIONS == ()
+    stack_template("ImageRegistries").resource_count_is("AWS::ECR::ReplicationConfiguration", 0)
+
+
+def test_images_are_replicated_to_the_other_backend_regions(monkeypatch):
+    monkeypatch.setattr(registries, "REPLICA_REGIONS", ("us-east-1", "us-west-2"))
+    context = load_context()
+    account = cached_account(context)
+    stack = Registries(
+        cdk.App(context=context), "ImageRegistries", env=cdk.Environment(account=account, region=PRIMARY_REGION),
+    )
+
+    Template.from_stack(stack).has_resource_properties("AWS::ECR::ReplicationConfiguration", {
+        "ReplicationConfiguration": {
+            "Rules": [{
+                "Destinations": [
+                    {"Region": "us-east-1", "RegistryId": account},
+                    {"Region": "us-west-2", "RegistryId": account},
+                ],
+                "RepositoryFilters": [{"Filter": registries.REPOSITORY_NAME, "FilterType": "PREFIX_MATCH"}],
+            }],
+        },
+    })
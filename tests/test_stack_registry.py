@@ -0,0 +1,33 @@
+import aws_cdk as cdk
+import pytest
+from aws_cdk.assertions import Template
+
+from project.stack_registry import STACKS, select_stacks
+from project.tooling.cdk_context import cached_account, load_context, placeholder_images
+
+
+def names(entries):
+    return [entry.name for entry in entries]
+
+
+def test_selection_keeps_the_order_of_the_registry():
+    assert names(select_stacks(None)) == names(STACKS)
+    assert names(select_stacks("ImageRegistries, Production*")) == [
+        "ImageRegistries",
+        *(entry.name for entry in STACKS if entry.name.startswith("Production")),
+    ]
+
+
+@pytest.mark.parametrize("selection", ["Staging*", "ImageRegistries,Staging*"])
+def test_unknown_pattern_is_rejected(selection):
+    with pytest.raises(ValueError, match="No stacks match Staging\\*; available stacks are Permissions"):
+        select_stacks(selection)
+
+
+def test_selected_stack_is_identical_to_the_stack_in_a_full_app(stack_template):
+    context = {**placeholder_images(), **load_context()}
+    app = cdk.App(context=context)
+    stacks = [entry.create(app, cached_account(context)) for entry in select_stacks(None)]
+
+    for stack in stacks:
+        assert Template.from_stack(stack).to_json() == stack_template(stack.stack_name).to_json(), stack.stack_name
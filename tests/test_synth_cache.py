@@ -0,0 +1,51 @@
+import aws_cdk as cdk
+import aws_cdk.aws_cloudfront as cf
+import aws_cdk.aws_cloudfront_origins as cfo
+
+from project.stack_registry import StackEntry
+from project.tooling.app_synth import synth_app
+from project.tooling.cloud_assembly import compare_assemblies
+from project.tooling.synth_cache import CACHE_CONTEXT_KEY, synth
+
+
+class UncompressedDistribution(cdk.Stack):
+
+    def __init__(self, scope, construct_id, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+
+        cf.Distribution(
+            self, "Distribution",
+            default_behavior=cf.BehaviorOptions(origin=cfo.HttpOrigin("example.com"), compress=False),
+        )
+
+
+def reported_lines(stderr: str) -> list:
+    return [line for line in stderr.splitlines() if not line.startswith("Synth cache:")]
+
+
+def test_cached_synth_is_identical_to_a_cold_synth(tmp_path, capfd):
+    synth(tmp_path / "cold", str(tmp_path / "cache"))
+    cold = capfd.readouterr().err
+    synth(tmp_path / "cached", str(tmp_path / "cache"))
+    cached = capfd.readouterr().err
+
+    assert "Synth cache: 0 hits" in cold
+    assert "0 misses" in cached
+    assert compare_assemblies(tmp_path / "cold", tmp_path / "cached") == []
+    assert reported_lines(cached) == reported_lines(cold)
+
+
+def test_cached_stacks_report_their_lint_findings_again(tmp_path, capsys):
+    entries = [StackEntry("Uncompressed", __name__, UncompressedDistribution.__name__)]
+    context = {CACHE_CONTEXT_KEY: str(tmp_path / "cache")}
+
+    synth_app(cdk.App(outdir=str(tmp_path / "cold"), context=context), entries, None, {})
+    cold = capsys.readouterr().err
+    synth_app(cdk.App(outdir=str(tmp_path / "cached"), context=context), entries, None, {})
+    cached = capsys.readouterr().err
+
+    assert "Synth cache: 1 hits, 0 misses" in cached
+    assert "ERROR [uncached-behavior] Uncompressed/Distribution/Resource" in cold
+    assert reported_lines(cached) == reported_lines(cold)
+    # The findings are annotations in the cached manifest as well, so the toolkit still fails on errors
+    assert compare_assemblies(tmp_path / "cold", tmp_path / "cached") == []